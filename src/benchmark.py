@@ -0,0 +1,252 @@
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use('Agg')   # headless, the plot stage times the same drawing the app does without a window
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from decimation import LevelOfDetail
+from processing import CycleSplit, Normalizer, build_group_index, filter_data, load_dataset
+from readout import Readout
+from streaming import stream_dataset
+
+# timing and peak memory of every stage of the app, on synthetic logs shaped like the real ones. results are written as json,
+# so two versions can be compared stage by stage.
+#
+#   python benchmark.py --rows 100000 1000000 -o before.json
+#   python benchmark.py --rows 100000 1000000 -o after.json --compare before.json
+
+LOADS = ['usb', 'ac', 'dc']
+
+
+def make_fridgeplexor(directory, rows, yetis=4, cycles=50, seed=0):
+    # Mdata/Ydata pair, one meter per yeti. Ydata starts with the association row read_associations parses (mac -> (port, M_ID))
+    rng = np.random.default_rng(seed)
+    packets = max(rows // yetis, 1)
+    macs = [f'00:1B:44:11:3A:{i:02X}' for i in range(yetis)]
+
+    packet_num = np.tile(np.arange(packets), yetis)
+    meter = np.repeat(np.arange(1, yetis + 1), packets)
+    yeti = np.repeat(np.arange(yetis), packets)
+    cycle = packet_num * cycles // packets
+    load = cycle % len(LOADS)
+    epoch = 1.7e9 + packet_num * .5 + yeti * .01
+
+    voltage = 12 + .5 * np.sin(packet_num / 50) + rng.normal(0, .05, len(packet_num))
+    current = np.where(load == 0, 2.1, np.where(load == 1, 4.5, 8.2)) + rng.normal(0, .1, len(packet_num))
+    mdata = pd.DataFrame({'M_ID': meter, 'packet_num': packet_num, 'Voltage': voltage, 'Current': current,
+                          'Power': voltage * current, 'Temperature': 25 + cycle * .05 + rng.normal(0, .2, len(packet_num))})
+    ydata = pd.DataFrame({'mac': np.array(macs)[yeti], 'channel': np.array(LOADS)[load], 'cycle': cycle, 'packet_num': packet_num,
+                          'Epoch_Time': epoch, 'SOC': 100 - 100 * (packet_num % (packets // cycles + 1)) / (packets // cycles + 1),
+                          'Battery_V': 25 + rng.normal(0, .1, len(packet_num)), 'State': np.where(load == 0, 'CHG', 'DSG')})
+
+    mdata_file = Path(directory) / 'Mdata.csv'
+    ydata_file = Path(directory) / 'Ydata.csv'
+    mdata.to_csv(mdata_file)
+    with open(ydata_file, 'w', newline='') as file:
+        file.write('"' + repr({mac: (i, i + 1) for i, mac in enumerate(macs)}) + '"\n')
+        ydata.to_csv(file)
+    return [str(mdata_file), str(ydata_file)]
+
+
+def make_meter_log(directory, rows, meters=4, seed=0):
+    # long M_ID log, one row per meter per sample, with the text Time column the logger writes
+    rng = np.random.default_rng(seed)
+    samples = max(rows // meters, 1)
+    epoch = np.repeat(1.7e9 + np.arange(samples) * .2, meters)
+    df = pd.DataFrame({'M_ID': np.tile(np.arange(1, meters + 1), samples),
+                       'Voltage': 120 + rng.normal(0, .5, samples * meters), 'Current': rng.gamma(2, 1, samples * meters),
+                       'Time': pd.to_datetime(epoch, unit='s').strftime('%H:%M:%S.%f'), 'Epoch_Time': epoch})
+    filename = Path(directory) / 'Meters.csv'
+    df.to_csv(filename)
+    return [str(filename)]
+
+
+def make_mixed(directory, rows, seed=0):
+    # two logs of the same test at different rates, a fast serial log and a 10x slower one with a status text column
+    rng = np.random.default_rng(seed)
+    fast = pd.DataFrame({'Epoch_Time': 1.7e9 + np.arange(rows) * .1, 'Voltage': 12 + rng.normal(0, .05, rows), 'Current': rng.gamma(2, 1, rows)})
+    slow_rows = max(rows // 10, 1)
+    slow = pd.DataFrame({'Epoch_Time': 1.7e9 + .03 + np.arange(slow_rows), 'Temperature': 25 + rng.normal(0, .2, slow_rows),
+                         'Voltage': 12 + rng.normal(0, .05, slow_rows), 'Status': rng.choice(['OK', 'WARN'], slow_rows)})
+
+    filenames = [Path(directory) / 'Serial_fast.csv', Path(directory) / 'Serial_slow.csv']
+    fast.to_csv(filenames[0], index=False)
+    slow.to_csv(filenames[1], index=False)
+    return [str(f) for f in filenames]
+
+
+def measure(fn, repeat, memory):
+    # (result, seconds of every run, peak traced bytes of an extra run or None). gc runs before every run so one run's garbage isn't timed in the next
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def select_uncached(group_index, *selection):
+    # a filter selection as drop_filter_data makes it the first time, without the view cache of an earlier run
+    group_index.views.clear()
+    return group_index.select(*selection)
+
+
+def plot_lines(frame, x_axis, columns, cycles=None):
+    # what update_graph draws, a decimated line per column (per cycle with 'All'), on a window sized figure
+    fig, ax = plt.subplots(figsize=(16, 9), dpi=100)
+    lod = LevelOfDetail(ax)
+    readout = Readout()
+
+    for c in columns:
+        if cycles is None:
+            valid = frame[[x_axis, c]].dropna()
+            lod.plot(valid[x_axis], valid[c], linewidth=1)
+            readout.add(c, valid[x_axis], valid[c])
+        else:
+            x, y, raw_y, bounds = cycles.column(c)
+            for cycle, start, end in zip(cycles.cycles, bounds[:-1], bounds[1:]):
+                lod.plot(x[start:end], y[start:end], linewidth=1)
+                readout.add(f'{c}-{cycle}', x[start:end], y[start:end], raw_y[start:end])
+
+    ax.legend(list(readout.series)[:50])
+    fig.canvas.draw()
+    plt.close(fig)
+    return readout
+
+
+def crosshair(readout, clicks=1000, seed=0):
+    # the snap of crosshair_click/hover, nearest datapoint of every series for a sweep of cursor positions
+    rng = np.random.default_rng(seed)
+    lo = min(x[0] for x, _, _ in readout.series.values() if len(x))
+    hi = max(x[-1] for x, _, _ in readout.series.values() if len(x))
+    for x_value in rng.uniform(lo, hi, clicks):
+        for name in readout.series:
+            readout.nearest(name, x_value)
+
+
+def run_scenarios(rows, args):
+    results = []
+
+    def stage(scenario, name, fn):
+        result, seconds, peak = measure(fn, args.repeat, not args.no_memory)
+        results.append({'scenario': scenario, 'stage': name, 'rows': rows, 'seconds': seconds,
+                        'min': min(seconds), 'median': float(np.median(seconds)), 'peak_bytes': peak})
+        print(f'{scenario:>13} {name:<16} {rows:>10} rows {min(seconds):9.4f} s' + (f' {peak / 2**20:9.1f} MiB' if peak is not None else ''), file=sys.stderr)
+        return result
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        files = make_fridgeplexor(directory, rows, yetis=args.yetis, cycles=args.cycles)
+
+        full_df, filters = stage('fridgeplexor', 'import', lambda: load_dataset('fridgeplexor', files))
+        stage('fridgeplexor', 'stream_import', lambda: stream_dataset('fridgeplexor', files, Path(tempfile.mkdtemp(dir=directory)) / 'store')[0].close())
+        group_index = stage('fridgeplexor', 'group_index', lambda: build_group_index(full_df))
+
+        yeti, load, cycle = filters[0][0], filters[1][0], filters[2][0]
+        columns = [c for c in full_df.select_dtypes('number').columns if c not in ('cycle', 'Epoch_Time', 'M_ID')]
+        filtered = stage('fridgeplexor', 'filter', lambda: select_uncached(group_index, yeti, load, cycle, 'Epoch_Time'))
+        everything = filter_data(full_df, group_index, yeti, load, 'All', 'Epoch_Time')
+
+        stage('fridgeplexor', 'normalize', lambda: [Normalizer(everything).column(c, mode) for c in columns for mode in ('min-max', 'z-score', 'per-cycle')])
+        readout = stage('fridgeplexor', 'plot', lambda: plot_lines(filtered, 'Epoch_Time', columns))
+        stage('fridgeplexor', 'cycle_split', lambda: CycleSplit(everything, 'Epoch_Time'))
+        all_readout = stage('fridgeplexor', 'plot_all_cycles', lambda: plot_lines(everything, 'Epoch_Time', columns, CycleSplit(everything, 'Epoch_Time')))
+        stage('fridgeplexor', 'crosshair', lambda: crosshair(readout))
+        stage('fridgeplexor', 'crosshair_all', lambda: crosshair(all_readout, clicks=100))
+
+        full_df = group_index = filtered = everything = readout = all_readout = None     # freed before the next scenario is measured
+
+        files = make_meter_log(directory, rows, meters=args.meters)
+        stage('meters', 'import', lambda: load_dataset('single', files))
+
+        files = make_mixed(directory, rows)
+        stage('mixed', 'import_outer', lambda: load_dataset('mixed', files))
+        stage('mixed', 'import_nearest', lambda: load_dataset('mixed', files, align='nearest', tolerance=.5))
+
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {'commit': commit, 'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.processor(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'matplotlib': matplotlib.__version__}
+
+
+def compare(results, baseline, threshold):
+    # prints current/baseline of every stage both runs have, returns the number of stages slower than threshold
+    before = {(r['scenario'], r['stage'], r['rows']): r for r in baseline['results']}
+    regressions = 0
+    for r in results:
+        old = before.get((r['scenario'], r['stage'], r['rows']))
+        if old is None:
+            continue
+
+        ratio = r['min'] / old['min'] if old['min'] else float('inf')
+        flag = 'SLOWER' if ratio > threshold else ''
+        regressions += bool(flag)
+        print(f'{r["scenario"]:>13} {r["stage"]:<16} {r["rows"]:>10} rows {old["min"]:9.4f} -> {r["min"]:9.4f} s  x{ratio:5.2f} {flag}', file=sys.stderr)
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time every processing stage on synthetic logs and write the results as json.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000], help='rows per generated log, several sizes give a scaling run')
+    parser.add_argument('--yetis', type=int, default=4, help='yetis (each with one meter) in the generated Fridgeplexor logs')
+    parser.add_argument('--cycles', type=int, default=50, help='cycles in the generated Fridgeplexor logs')
+    parser.add_argument('--meters', type=int, default=4, help='meters in the generated M_ID log')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage, the fastest is the one compared')
+    parser.add_argument('--no-memory', action='store_true', help='skip the extra traced run per stage that measures peak memory')
+    parser.add_argument('-o', '--output', help='json file the results are written to, stdout if not given')
+    parser.add_argument('--compare', help='results json of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio that counts as a regression in --compare')
+    args = parser.parse_args(argv)
+
+    results = []
+    for rows in args.rows:
+        results += run_scenarios(rows, args)
+
+    report = {'environment': environment(), 'arguments': vars(args), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        return 1 if compare(results, baseline, args.threshold) else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
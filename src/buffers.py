@@ -0,0 +1,29 @@
+import numpy as np
+
+
+class GrowingArray:
+    # a 1d array that rows can be appended to in amortized O(appended) time. the buffer doubles when it is full, values is a view of the filled part
+
+    def __init__(self, values):
+        self.buffer = np.asarray(values)
+        self.length = len(self.buffer)
+
+
+    @property
+    def values(self):
+        return self.buffer[:self.length]
+
+
+    def extend(self, values):
+        values = np.asarray(values)
+        needed = self.length + len(values)
+        dtype = np.result_type(self.buffer, values)
+
+        if needed > len(self.buffer) or dtype != self.buffer.dtype:
+            buffer = np.empty(max(2 * needed, 1024), dtype=dtype)
+            buffer[:self.length] = self.values
+            self.buffer = buffer
+
+        self.buffer[self.length:needed] = values
+        self.length = needed
+        return self.values
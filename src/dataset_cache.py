@@ -0,0 +1,141 @@
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+from pathlib import Path
+
+# pyarrow is optional, without it every import just parses the csv files again. it is only imported when the cache is first read or
+# written, it takes a while to load and the app builds its DatasetCache before the window is up
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def default_cache_dir():
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'PostProcessor' / 'import_cache'
+
+
+class DatasetCache:
+    # Feather (arrow) copies of imported datasets, stored after the merge and column drop so a re-opened run skips the csv parse entirely.
+    # entries are keyed on import mode + path, size and mtime of every source file, and the least recently used ones are evicted past max_bytes.
+    # the ColumnStores of streamed imports (see streaming.stream_dataset) live next to it in streams/, keyed and evicted the same way
+
+    FORMAT = 4      # bump when the stored frames change shape, old entries then just miss and age out. stream stores are keyed with it too
+
+    def __init__(self, cache_dir=None, max_bytes=4 * 1024**3):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.stream_dir = self.cache_dir.parent / 'streams'
+        self.max_bytes = max_bytes
+        self.enabled = HAS_PYARROW
+        self.open_stores = set()    # stream stores of datasets that are open, never evicted (their columns are memory mapped)
+
+
+    def key(self, mode, filenames):
+        parts = [str(self.FORMAT), mode]
+        for filename in filenames:
+            stat = os.stat(filename)
+            parts.append(f'{os.path.abspath(filename)}|{stat.st_size}|{stat.st_mtime_ns}')
+
+        return hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+
+    def load(self, mode, filenames):
+        # returns (full_df, filters) for a previous import of exactly these files, or None
+        if not self.enabled:
+            return None
+
+        key = self.key(mode, filenames)
+        data_path = self.cache_dir / f'{key}.feather'
+        meta_path = self.cache_dir / f'{key}.json'
+
+        import pyarrow.feather as feather
+        try:
+            with open(meta_path, 'r') as file:
+                meta = json.load(file)
+            filters = tuple(meta['filters']) if meta['filters'] is not None else None
+            full_df = feather.read_table(data_path, memory_map=True).to_pandas()
+            full_df.attrs.update(meta.get('attrs', {}))     # e.g. the unmatched packet counts, feather doesn't keep attrs
+        except (OSError, ValueError, KeyError):
+            return None
+
+        os.utime(data_path)     # mark as recently used for the LRU eviction
+        return full_df, filters
+
+
+    def store(self, mode, filenames, full_df, filters):
+        if not self.enabled:
+            return
+
+        import pyarrow.feather as feather
+        key = self.key(mode, filenames)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data_path = self.cache_dir / f'{key}.feather'
+        tmp_path = self.cache_dir / f'{key}.feather.tmp'
+
+        try:
+            # uncompressed, so the file can be memory mapped on the next load
+            feather.write_feather(full_df.reset_index(drop=True), tmp_path, compression='uncompressed')
+            os.replace(tmp_path, data_path)
+            with open(self.cache_dir / f'{key}.json', 'w') as file:
+                json.dump({'mode': mode, 'files': [os.path.abspath(f) for f in filenames], 'filters': filters, 'attrs': full_df.attrs}, file)
+        except (OSError, ValueError, TypeError) as err:     # unsupported column types etc, just don't cache this dataset
+            print(err)
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self.evict(keep=data_path)
+
+
+    def stream_path(self, mode, filenames):
+        # where the ColumnStore of a streamed import goes, re-streaming the same files finds the finished store there
+        return self.stream_dir / self.key(mode, filenames)
+
+
+    def stream_used(self, store_path):
+        # marks a stream store as recently used and open, then evicts. an open store is kept even if it alone is past max_bytes
+        schema = Path(store_path) / 'schema.json'
+        if schema.exists():
+            os.utime(schema)
+        self.open_stores.add(Path(store_path))
+        self.evict()
+
+
+    def store_closed(self, store_path):
+        # the dataset of a stream store was replaced, it can be evicted again
+        self.open_stores.discard(Path(store_path))
+
+
+    def entries(self):
+        # (last used, bytes, path) of every feather entry and stream store
+        entries = []
+        for path in self.cache_dir.glob('*.feather') if self.cache_dir.exists() else []:
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        for path in self.stream_dir.iterdir() if self.stream_dir.exists() else []:
+            files = [f for f in path.iterdir() if f.is_file()] if path.is_dir() else []
+            schema = path / 'schema.json'
+            used = schema.stat().st_mtime if schema.exists() else path.stat().st_mtime      # a store that never finished has no schema
+            entries.append((used, sum(f.stat().st_size for f in files), path))
+        return sorted(entries, key=lambda entry: entry[0])
+
+
+    def evict(self, keep=None):
+        # deletes least recently used entries until the cache and the stream stores together fit in max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        entries = [entry for entry in entries if entry[2] != keep and entry[2] not in self.open_stores]
+
+        while entries and total > self.max_bytes:
+            _, size, oldest = entries.pop(0)
+            total -= size
+            if oldest.is_dir():     # a store that is still memory mapped (windows) can't be deleted, it goes on a later eviction
+                shutil.rmtree(oldest, ignore_errors=True)
+            else:
+                oldest.unlink(missing_ok=True)
+                oldest.with_suffix('.json').unlink(missing_ok=True)
+
+
+    def clear(self):
+        for path in list(self.cache_dir.glob('*.feather')) + list(self.cache_dir.glob('*.json')):
+            path.unlink(missing_ok=True)
+        shutil.rmtree(self.stream_dir, ignore_errors=True)
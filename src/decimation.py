@@ -0,0 +1,119 @@
+import numpy as np
+
+from buffers import GrowingArray
+
+
+def minmax_decimate(x, y, n_buckets):
+    # indices of the min and max y of every equal width x bucket (plus both end points), in x order. x must be sorted.
+    # keeping both extremes of a bucket means peaks and dropouts survive, which a plain every-nth-point stride would lose
+    if len(x) <= 2 * n_buckets:
+        return np.arange(len(x))
+
+    edges = np.linspace(x[0], x[-1], n_buckets + 1)
+    starts = np.unique(np.searchsorted(x, edges[:-1], side='left'))    # empty buckets collapse into the next one
+    lengths = np.diff(np.append(starts, len(x)))
+    bucket = np.repeat(np.arange(len(starts)), lengths)
+
+    keep = [np.array([0, len(x) - 1])]
+    for extreme in (np.fmin.reduceat(y, starts), np.fmax.reduceat(y, starts)):
+        hits = np.flatnonzero(y == extreme[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)       # first hit in each bucket
+        keep.append(hits[first])
+
+    return np.unique(np.concatenate(keep))
+
+
+class LevelOfDetail:
+    # keeps the full resolution data of every line plotted through it, and only hands matplotlib a min/max decimated copy of the visible x range,
+    # at most a few points per horizontal pixel. zooming or panning re-decimates just the new window, so detail comes back as you zoom in
+
+    def __init__(self, ax, points_per_pixel=2):
+        self.ax = ax
+        self.points_per_pixel = points_per_pixel
+        self.series = {}    # Line2D -> [x, y, x_is_sorted, last window (, x buffer, y buffer once extended)]
+        self.reset()
+
+
+    def reset(self):
+        # ax.clear() throws away the axes callbacks, so this has to be called after every clear
+        self.series = {}
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+
+    def plot(self, x, y, **kwargs):
+        x = np.asarray(x)
+        y = np.asarray(y)
+        x_is_sorted = len(x) < 2 or bool(np.all(x[1:] >= x[:-1]))
+        entry = [x, y, x_is_sorted, None]
+
+        line, = self.ax.plot(*self.decimated(entry, None), **kwargs)
+        self.series[line] = entry
+        return line
+
+
+    def extend(self, line, x, y):
+        # appends points to a line plotted through plot(), e.g. rows a live file gained. only the visible window is decimated again
+        x = np.asarray(x)
+        y = np.asarray(y)
+        entry = self.series[line]
+        old_x, old_y, x_is_sorted, _ = entry[:4]
+
+        if len(entry) == 4:     # the first extend copies the line's data into buffers that can grow
+            entry += [GrowingArray(old_x), GrowingArray(old_y)]
+        entry[0] = entry[4].extend(x)
+        entry[1] = entry[5].extend(y)
+        entry[2] = x_is_sorted and bool(np.all(x[1:] >= x[:-1])) and (not len(old_x) or not len(x) or x[0] >= old_x[-1])
+
+        line.set_data(*self.decimated(entry, self.ax.get_xlim()))
+
+
+    def remove(self, line):
+        self.series.pop(line, None)
+        line.remove()
+
+
+    def full_data(self, line):
+        # the undecimated x/y arrays of a line, for readouts that need every real datapoint
+        if line in self.series:
+            x, y = self.series[line][:2]
+            return x, y
+        return line.get_data()
+
+
+    def n_buckets(self):
+        return max(int(self.ax.bbox.width * self.points_per_pixel / 2), 1)
+
+
+    def window(self, x, xlim):
+        if xlim is None:
+            return 0, len(x)
+
+        # one point past each edge so the line still runs off the sides of the axes
+        lo = max(np.searchsorted(x, min(xlim), side='left') - 1, 0)
+        hi = min(np.searchsorted(x, max(xlim), side='right') + 1, len(x))
+        return int(lo), int(hi)
+
+
+    def decimated(self, entry, xlim):
+        x, y, x_is_sorted = entry[:3]
+        if not x_is_sorted:     # unsorted x (unfiltered data) can't be bucketed by x, draw it as is
+            return x, y
+
+        lo, hi = self.window(x, xlim)
+        n_buckets = self.n_buckets()
+        entry[3] = (lo, hi, n_buckets)
+        keep = minmax_decimate(x[lo:hi], y[lo:hi], n_buckets)
+        return x[lo:hi][keep], y[lo:hi][keep]
+
+
+    def on_xlim_changed(self, ax):
+        xlim = ax.get_xlim()
+        for line, entry in self.series.items():
+            x, _, x_is_sorted, window = entry[:4]
+            if not x_is_sorted:
+                continue
+
+            if window == self.window(x, xlim) + (self.n_buckets(),):   # same points as last time (happens on every autoscale during a draw)
+                continue
+
+            line.set_data(*self.decimated(entry, xlim))
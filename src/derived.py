@@ -0,0 +1,193 @@
+import ast
+import json
+import operator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from processing import FILTER_COLUMNS
+
+# derived channels, named expressions over the columns of a dataset, like
+#
+#   Power = Voltage * Current
+#   Meter Delta = "Voltage 3" - "Voltage 7"
+#   Efficiency = abs("Power Out") / "Power In"
+#
+# columns are bare names, or quoted when they aren't valid python names (the M_ID reshape's 'Voltage 3'). an expression is parsed once
+# and evaluated on whole columns with numpy, never row by row, and may use the channels defined before it. only arithmetic, numbers,
+# columns and the functions below are allowed, nothing in an expression can run arbitrary code
+
+FUNCTIONS = {
+    'abs': np.abs, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'minimum': np.minimum, 'maximum': np.maximum,
+}
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv, ast.Pow: operator.pow, ast.Mod: operator.mod}
+_UNARY = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+
+
+class Expression:
+    # one derived channel. columns are the names it reads (dataset columns or earlier channels)
+
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+        try:
+            self.tree = ast.parse(text.strip(), mode='eval').body
+        except SyntaxError as err:
+            raise ValueError(f'{name}: {err.msg}') from None
+        self.columns = []
+        self.check(self.tree)
+
+
+    def check(self, node):
+        # walks the expression once when it is defined, so a bad one fails then and not on its first plot
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            self.check(node.left)
+            self.check(node.right)
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+            self.check(node.operand)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and not node.keywords:
+            for arg in node.args:
+                self.check(arg)
+        elif isinstance(node, ast.Name) or (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+            column = node.id if isinstance(node, ast.Name) else node.value
+            if column not in self.columns:
+                self.columns.append(column)
+        elif not (isinstance(node, ast.Constant) and isinstance(node.value, (int, float))):
+            raise ValueError(f'{self.name}: {ast.unparse(node)} is not allowed in an expression')
+
+
+    def evaluate(self, resolve):
+        # resolve(column) gives the float64 values of a column, the result has the length of those
+        def walk(node):
+            if isinstance(node, ast.BinOp):
+                return _BINARY[type(node.op)](walk(node.left), walk(node.right))
+            if isinstance(node, ast.UnaryOp):
+                return _UNARY[type(node.op)](walk(node.operand))
+            if isinstance(node, ast.Call):
+                return FUNCTIONS[node.func.id](*[walk(arg) for arg in node.args])
+            if isinstance(node, ast.Name):
+                return resolve(node.id)
+            if isinstance(node.value, str):
+                return resolve(node.value)
+            return node.value
+
+        with np.errstate(divide='ignore', invalid='ignore'):    # a zero current gives inf/NaN on that row, not an error
+            return walk(self.tree)
+
+
+class DerivedChannels:
+    # the defined channels, in order. they are saved as {name: expression} json, the app keeps them next to its logs so they carry over to
+    # every run, the cli reads the same file with --derived
+
+    def __init__(self, definitions=None):
+        self.expressions = {}
+        self.set(definitions or {})
+
+
+    def __contains__(self, name):
+        return name in self.expressions
+
+
+    def __iter__(self):
+        return iter(self.expressions)
+
+
+    def __len__(self):
+        return len(self.expressions)
+
+
+    def set(self, definitions):
+        # replaces every channel, nothing changes if any of them is invalid
+        expressions = {}
+        for name, text in definitions.items():
+            name = name.strip()
+            if not name or name in FILTER_COLUMNS:
+                raise ValueError(f'{name!r} can not be the name of a derived channel')
+            expression = Expression(name, text)
+            if name in expression.columns:
+                raise ValueError(f'{name} uses itself')
+            expressions[name] = expression
+        self.expressions = expressions
+
+
+    def definitions(self):
+        return {name: expression.text for name, expression in self.expressions.items()}
+
+
+    def text(self):
+        return '\n'.join(f'{name} = {expression.text}' for name, expression in self.expressions.items())
+
+
+    def parse(self, text):
+        # 'name = expression' per line, blank lines and lines starting with # are skipped
+        definitions = {}
+        for line in text.splitlines():
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            name, sep, expression = line.partition('=')
+            if not sep:
+                raise ValueError(f"'{line.strip()}' is not 'name = expression'")
+            definitions[name.strip()] = expression.strip()
+        self.set(definitions)
+
+
+    def load(self, path):
+        with open(path) as file:
+            self.set(json.load(file))
+
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(self.definitions(), file, indent=2)
+
+
+    def available(self, columns):
+        # the channels that can be computed from these columns, every column they use (directly or through another channel) is there.
+        # a channel named like one of the columns is left out, the column wins
+        known = set(columns)
+        names = []
+        for name, expression in self.expressions.items():
+            if name not in known and all(c in known for c in expression.columns):
+                known.add(name)
+                names.append(name)
+        return names
+
+
+    def sources(self, names):
+        # the columns (not channels) that computing these channels reads, directly or through another channel
+        sources, pending = [], list(names)
+        while pending:
+            for column in self.expressions[pending.pop(0)].columns:
+                if column in self.expressions:
+                    pending.append(column)
+                elif column not in sources:
+                    sources.append(column)
+        return sources
+
+
+    def evaluate(self, name, df):
+        # float64 Series of channel name on the rows (and index) of df, the channels it uses are computed along with it but not kept
+        computed = {}
+
+        def resolve(column):
+            if column in df.columns:
+                return df[column].to_numpy(dtype='float64', na_value=np.nan)
+            if column not in computed:
+                if column not in self.expressions:
+                    raise KeyError(column)
+                computed[column] = self.expressions[column].evaluate(resolve)
+            return computed[column]
+
+        values = resolve(name)
+        return pd.Series(np.broadcast_to(values, len(df)).astype('float64'), index=df.index, name=name)
+
+
+    def add_to(self, df, names=None):
+        # df with channels added as columns (every available one by default), df itself is left as it was
+        names = self.available(df.columns) if names is None else names
+        if not names:
+            return df
+        return df.assign(**{name: self.evaluate(name, df) for name in names})
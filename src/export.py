@@ -0,0 +1,157 @@
+import bz2
+import gzip
+import importlib.util
+import lzma
+import re
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from processing import FILTER_COLUMNS, _check_cancel
+from streaming import CHUNK_ROWS
+
+# bulk export of every Yeti/Load/Cycle group of a dataset. the groups come from the GroupIndex built at import (one groupby over the filter
+# columns), every group is written a chunk of rows at a time so no whole copy of it is made, and several groups are written at once.
+# threads instead of processes, they share full_df instead of each getting a pickled copy, and the csv/parquet writers release the gil
+
+EXPORT_FORMATS = ('csv', 'parquet')
+COMPRESSIONS = {
+    'csv': (None, 'gzip', 'bz2', 'xz'),
+    'parquet': (None, 'snappy', 'gzip', 'zstd'),
+}
+
+_CSV_OPENERS = {None: open, 'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+_CSV_SUFFIXES = {None: '', 'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+
+
+def _safe(value):
+    # mac addresses have ':' in them, which windows doesn't allow in a file name
+    return re.sub(r'[^\w.-]', '-', str(value))
+
+
+def _partition(value):
+    # hive directory names are percent encoded like pyarrow.parquet.write_to_dataset does, so the values read back are the original ones
+    return urllib.parse.quote(str(value), safe='')
+
+
+def partitions(full_df, group_index):
+    # (key, row positions) of every group, one partition of every row if the dataset has no filter columns
+    if group_index is None:
+        return [((), np.arange(len(full_df)))]
+    return list(group_index.groups.items())
+
+
+def _rows(full_df, positions, columns):
+    # only these rows and columns are copied, full_df can also be a streaming.ColumnStore
+    if isinstance(full_df, pd.DataFrame):
+        return full_df.iloc[positions, [full_df.columns.get_loc(c) for c in columns]].reset_index(drop=True)
+    return full_df.take(positions, columns).reset_index(drop=True)
+
+
+def _chunks(full_df, positions, columns, sort_by, chunk_rows, cancel, derived=None, names=()):
+    # derived channels are computed a chunk at a time from the columns they use, which are read along but only written if asked for
+    read = [c for c in columns if c not in names]
+    read += [c for c in derived.sources(names) if c not in read] if names else []
+    if sort_by is not None:     # only the sort column of the group is read to order it
+        values = full_df[sort_by].to_numpy()[positions] if isinstance(full_df, pd.DataFrame) else full_df.values(sort_by, positions)
+        positions = positions[np.argsort(values, kind='stable')]
+
+    for start in range(0, len(positions), chunk_rows):
+        _check_cancel(cancel)
+        chunk = _rows(full_df, positions[start:start + chunk_rows], read)
+        yield derived.add_to(chunk, names)[columns] if names else chunk
+
+
+def _write_csv(path, chunks, compression):
+    rows = 0
+    with _CSV_OPENERS[compression](path, 'wt', newline='') as file:
+        for chunk in chunks:
+            chunk.to_csv(file, header=rows == 0, index=False)
+            rows += len(chunk)
+    return rows
+
+
+def _write_parquet(path, chunks, compression):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression=compression or 'none')
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_groups(full_df, group_index, out_dir, format='csv', compression=None, columns=None, sort_by=None, prefix='', workers=4,
+                  progress=None, cancel=None, chunk_rows=CHUNK_ROWS, derived=None):
+    # writes every (mac, channel, cycle) group to its own file and returns [(path, rows)]. csv groups are '<prefix><mac>_<channel>_<cycle>.csv'
+    # (plus the compression's suffix), parquet is a hive partitioned dataset, out_dir/mac=../channel=../cycle=../part-0.parquet, that
+    # pyarrow/pandas read back as one table. the filter columns are in the names, not the files. columns limits the exported columns,
+    # sort_by orders the rows of every group (like a filtered view), progress(fraction, text) is called as groups finish and cancel is a
+    # threading.Event checked between chunks. derived (derived.DerivedChannels) adds its channels that full_df has the columns for, all of
+    # them or the ones in columns
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f'unknown export format {format}, expected one of {", ".join(EXPORT_FORMATS)}')
+    if compression not in COMPRESSIONS[format]:
+        raise ValueError(f'{format} can not be compressed with {compression}')
+    if format == 'parquet' and importlib.util.find_spec('pyarrow') is None:     # fail before anything is written
+        raise ImportError('parquet export needs pyarrow, install it or export to csv')
+
+    report = progress or (lambda fraction, text: None)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    names = derived.available(full_df.columns) if derived is not None else []
+    if columns is None:
+        columns = list(full_df.columns) + names
+    columns = [c for c in columns if (c in full_df.columns or c in names) and c not in FILTER_COLUMNS]
+    names = [c for c in names if c in columns]
+    if sort_by not in full_df.columns:
+        sort_by = None
+
+    groups = partitions(full_df, group_index)
+    keys = FILTER_COLUMNS if group_index is not None else []
+
+    def path_of(key):
+        if format == 'parquet':
+            folder = out_dir.joinpath(*[f'{k}={_partition(v)}' for k, v in zip(keys, key)])
+            folder.mkdir(parents=True, exist_ok=True)
+            return folder / 'part-0.parquet'
+        name = '_'.join(_safe(v) for v in key) or 'all'
+        return out_dir / f'{prefix}{name}.csv{_CSV_SUFFIXES[compression]}'
+
+    def write(key, positions):
+        path = path_of(key)
+        chunks = _chunks(full_df, positions, columns, sort_by, chunk_rows, cancel, derived, names)
+        try:
+            if format == 'parquet':
+                return path, _write_parquet(path, chunks, compression)
+            return path, _write_csv(path, chunks, compression)
+        except BaseException:
+            path.unlink(missing_ok=True)    # no half written groups
+            raise
+
+    written = []
+    report(0, f'Exporting {len(groups)} groups')
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(write, key, positions) for key, positions in groups]
+        try:
+            for future in futures:
+                written.append(future.result())
+                report(len(written) / len(groups), f'Exported {len(written)}/{len(groups)} groups')
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return written
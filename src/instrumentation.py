@@ -0,0 +1,188 @@
+import cProfile
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# wall time, rows in/out and allocated bytes of every stage of the app's slow operations (import, filter, redraw, crosshair).
+# kept free of any tk/ctk code, the app shows the records in its report frame and can append them to a json lines log
+
+
+class Operation:
+    # one run of an operation, split into stages. stages are either timed blocks (stage()) or boundaries (mark(), for code that already
+    # reports its progress between stages, like processing.load_dataset)
+
+    def __init__(self, instruments, name, rows_in=None):
+        self.instruments = instruments
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.stages = []
+        self.open_stage = None
+        self.profile = None
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.start_bytes = instruments.traced_bytes()
+
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        # yields the stage record, set its 'rows_out' inside the block
+        self.close_stage()
+        record = self.open(name, rows_in)
+        try:
+            yield record
+        finally:
+            self.close(record)
+
+
+    def mark(self, name):
+        # ends the running stage (if any) and starts the next one
+        self.close_stage()
+        self.open_stage = self.open(name)
+
+
+    def open(self, name, rows_in=None):
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None, 'bytes': None}
+        record['_start'] = time.perf_counter()
+        record['_bytes'] = self.instruments.traced_bytes(reset_peak=True)
+        return record
+
+
+    def close(self, record):
+        record['seconds'] = time.perf_counter() - record.pop('_start')
+        start_bytes = record.pop('_bytes')
+        if start_bytes is not None:
+            record['bytes'] = tracemalloc.get_traced_memory()[1] - start_bytes     # peak above where the stage started
+        self.stages.append(record)
+
+
+    def close_stage(self):
+        if self.open_stage is not None:
+            self.close(self.open_stage)
+            self.open_stage = None
+
+
+    def finish(self, rows_out=None, status='done'):
+        self.close_stage()
+        if rows_out is not None:
+            self.rows_out = rows_out
+
+        record = {'operation': self.name, 'started': self.started, 'seconds': time.perf_counter() - self.start, 'status': status,
+                  'rows_in': self.rows_in, 'rows_out': self.rows_out, 'bytes': None, 'stages': self.stages, 'profile': None}
+        if self.start_bytes is not None:
+            record['bytes'] = tracemalloc.get_traced_memory()[0] - self.start_bytes     # still allocated when it finished
+        if self.profile is not None:
+            self.profile.disable()
+            record['profile'] = self.instruments.save_profile(self.profile, self.name)
+
+        self.instruments.add(record)
+        return record
+
+
+class Instrumentation:
+    # keeps the records of the last few operations. memory is only traced while track_memory is on (tracemalloc slows every allocation down),
+    # and profile_next() makes the next operation that starts run under cProfile, its stats are saved next to the log.
+    # a stage's bytes are its peak allocation above where it started, an operation's bytes what it left allocated when it finished.
+    # byte counts are approximate while operations on different threads overlap (an import and a redraw), they share tracemalloc's peak
+
+    def __init__(self, log_dir, keep=50):
+        self.log_dir = Path(log_dir)
+        self.records = deque(maxlen=keep)
+        self.log_to_file = False
+        self.track_memory = False
+        self.profile_armed = False
+        self.lock = threading.Lock()
+
+
+    def set_track_memory(self, enabled):
+        self.track_memory = enabled
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+    def traced_bytes(self, reset_peak=False):
+        if not self.track_memory or not tracemalloc.is_tracing():
+            return None
+        if reset_peak:
+            tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+    def profile_next(self):
+        self.profile_armed = True
+
+
+    def start(self, name, rows_in=None):
+        operation = Operation(self, name, rows_in)
+        with self.lock:
+            profile, self.profile_armed = self.profile_armed, False
+        if profile:     # profiles the thread that started the operation, finish it on the same thread
+            operation.profile = cProfile.Profile()
+            operation.profile.enable()
+        return operation
+
+
+    @contextmanager
+    def operation(self, name, rows_in=None):
+        # yields the Operation, set its rows_out inside the block
+        operation = self.start(name, rows_in)
+        status = 'done'
+        try:
+            yield operation
+        except BaseException as err:    # recorded as the exception's name, e.g. ImportCancelled
+            status = type(err).__name__
+            raise
+        finally:
+            operation.finish(status=status)
+
+
+    def add(self, record):
+        self.records.append(record)
+        if self.log_to_file:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.log_dir / 'timings.jsonl', 'a') as file:
+                file.write(json.dumps(record) + '\n')
+
+
+    def save_profile(self, profile, name):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        path = self.log_dir / f'{name}-{time.strftime("%Y%m%d-%H%M%S")}.prof'
+        profile.dump_stats(path)
+        with open(path.with_suffix('.txt'), 'w') as file:     # readable top of the profile, the .prof opens in snakeviz etc.
+            pstats.Stats(profile, stream=file).sort_stats('cumulative').print_stats(40)
+        return str(path)
+
+
+def format_bytes(count):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(count) < 1024:
+            return f'{count:.0f} {unit}'
+        count /= 1024
+    return f'{count:.1f} GiB'
+
+
+def format_record(record):
+    # a few lines per operation for the report frame
+    def line(name, entry, indent):
+        text = f'{indent}{name:<{22 - len(indent)}} {entry["seconds"] * 1000:8.1f} ms'
+        if entry.get('rows_in') is not None:
+            text += f'  in {entry["rows_in"]}'
+        if entry.get('rows_out') is not None:
+            text += f'  out {entry["rows_out"]}'
+        if entry.get('bytes') is not None:
+            text += f'  {format_bytes(entry["bytes"])}'
+        return text
+
+    status = '' if record['status'] == 'done' else f' ({record["status"]})'
+    lines = [line(record['operation'] + status, record, '')]
+    lines += [line(stage['stage'], stage, '  ') for stage in record['stages']]
+    if record['profile']:
+        lines.append(f'  profile: {record["profile"]}')
+    return '\n'.join(lines)
@@ -1,89 +1,320 @@
-import pandas as pd
-import numpy as np
+import time
+STARTED = time.perf_counter()     # time to first window is measured from here, see APP.startup_report
+
+import argparse
+import json
+import multiprocessing
+import os
 import tkinter as tk
-import csv
+import tkinter.filedialog
+from tkinter import ttk
 import customtkinter as ctk
-import matplotlib.pyplot as plt
-import matplotlib.widgets as wdg
-import matplotlib.style as mplstyle
-import ast
-from pathlib import Path
-import time
 import sys
-from functools import reduce
+import threading
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from matplotlib.backends.backend_tkagg import (
-    FigureCanvasTkAgg, NavigationToolbar2Tk)
+from dataset_cache import DatasetCache, default_cache_dir
+from instrumentation import Instrumentation, format_record
 
 # V1.4.0
 
 ctk.set_appearance_mode('Dark')
-mplstyle.use('fast')
+
+TAIL_INTERVAL = 1000    # ms between follow mode reads
+STATS_COLUMNS = ('cycle', 'min', 'max', 'mean', 'rms', 'duration')     # statistics table, see processing.CycleStatistics
+SESSION_WORKERS = 4     # processes importing the runs of a session, streamed runs are spilled a chunk at a time
+EXPORT_WORKERS = 4      # groups the bulk export writes at once, see export.export_groups
+
+
+def load_libraries():
+    # pandas, numpy and matplotlib take seconds to import on a cold start, so the window is built without them and they are imported here,
+    # on the import worker, once it is up. binds the same module globals the imports at the top of the file used to, nothing that touches
+    # them runs before poll_libraries saw this finish (an import submitted meanwhile queues up behind it on the same worker)
+    global pd, np, plt, mplstyle, Figure, LineCollection, Line2D, Rectangle, FigureCanvasTkAgg, NavigationToolbar2Tk
+    global ALIGN_METHODS, IMPORT_ERRORS, NORMALIZE_MODES, SMOOTH_MODES, CycleSplit, CycleStatistics, ImportCancelled, Normalizer, Smoother, build_group_index, export_csv, filter_data, filter_values, load_dataset
+    global LevelOfDetail, Readout, STREAM_MODES, LiveTail, stream_dataset, Session, SessionView, load_session, COMPRESSIONS, EXPORT_FORMATS, export_groups, DerivedChannels
+    start = time.perf_counter()
+
+    import pandas as pd
+    import numpy as np
+    import matplotlib.pyplot as plt
+    import matplotlib.style as mplstyle
+
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Rectangle
+    from matplotlib.backends.backend_tkagg import (
+        FigureCanvasTkAgg, NavigationToolbar2Tk)
+
+    from processing import ALIGN_METHODS, IMPORT_ERRORS, NORMALIZE_MODES, SMOOTH_MODES, CycleSplit, CycleStatistics, ImportCancelled, Normalizer, Smoother, build_group_index, export_csv, filter_data, filter_values, load_dataset
+    from decimation import LevelOfDetail
+    from readout import Readout
+    from streaming import STREAM_MODES, LiveTail, stream_dataset
+    from session import Session, SessionView, load_session
+    from export import COMPRESSIONS, EXPORT_FORMATS, export_groups
+    from derived import DerivedChannels
+
+    mplstyle.use('fast')
+    return time.perf_counter() - start
+
 
 def _quit(app):
+    if app.import_cancel is not None:
+        app.import_cancel.set()
+    if app.session is not None:     # deletes its spilled runs
+        app.session.close()
+    app.import_executor.shutdown(wait=False, cancel_futures=True)
     app.destroy()
     time.sleep(.1)
     sys.exit()
 
-class BlittedCursor:
-    # A cross-hair cursor using blitting for faster redraw.
-    
+class BlittedOverlay:
+    # Artists drawn on top of a cached copy of the axes, so changing them is a restore + blit instead of re-rasterizing every line.
+    # the overlay artists are never added to the axes, a full draw leaves them out, and they are painted back on after it (on_draw)
+
     def __init__(self, ax):
         self.ax = ax
         self.background = None
-        self.horizontal_line = ax.axhline(color='.5', lw=0.8, ls='-')
-        self.vertical_line = ax.axvline(color='.5', lw=0.8, ls='-')
-        self._creating_background = False
+        self.artists = []
         ax.figure.canvas.mpl_connect('draw_event', self.on_draw)
 
 
+    def add(self, artist):
+        artist.set_figure(self.ax.figure)
+        artist.set_clip_box(self.ax.bbox)
+        self.artists.append(artist)
+        return artist
+
+
     def on_draw(self, event):
-        self.create_new_background()
+        # a full draw (data or limits changed) just happened, it becomes the new background
+        self.background = self.ax.figure.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_artists()
+
+
+    def draw_artists(self):
+        for artist in self.artists:
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+
+    def blit(self):
+        if self.background is None:
+            self.ax.figure.canvas.draw()    # draws the overlays through on_draw
+            return
+
+        self.ax.figure.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.ax.figure.canvas.blit(self.ax.bbox)
+
+
+class BlittedCursor(BlittedOverlay):
+    # A cross-hair cursor using blitting for faster redraw, the click markers, hover snap points and legend highlighting share its background.
+
+    def __init__(self, ax):
+        super().__init__(ax)
+        self.emphasis = []
+        self.highlight_texts = []
+
+        # dims everything in the background while lines are highlighted, the highlighted lines and the legend are drawn over it
+        self.dim = self.add(Rectangle((0, 0), 1, 1, transform=ax.transAxes, facecolor='black', alpha=.7, visible=False))
+        self.click_line = self.add(Line2D([0, 0], [0, 1], transform=ax.get_xaxis_transform(), ls='--', color='yellow', visible=False))
+        self.click_points = self.add(Line2D([], [], transform=ax.transData, ls='', marker='x', ms=8, color='yellow'))
+        self.horizontal_line = self.add(Line2D([0, 1], [0, 0], transform=ax.get_yaxis_transform(), color='.5', lw=0.8, ls='-'))
+        self.vertical_line = self.add(Line2D([0, 0], [0, 1], transform=ax.get_xaxis_transform(), color='.5', lw=0.8, ls='-'))
+        self.snap_points = self.add(Line2D([], [], transform=ax.transData, ls='', marker='o', ms=5, color='yellow'))     # nearest datapoints for the hover readout
+
+
+    def draw_artists(self):
+        for artist in self.artists:
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+            if artist is self.dim and self.dim.get_visible():
+                self.draw_highlight()
+
+
+    def draw_highlight(self):
+        for line, overlay in self.emphasis:
+            if isinstance(overlay, Line2D):
+                overlay.set_data(*line.get_data())      # follows the line's current (decimated) data
+            self.ax.draw_artist(overlay)
+
+        # the legend in the background always keeps white texts, only this copy on top of the dim layer shows the highlighted ones
+        legend = self.ax.get_legend()
+        if legend:
+            for text in self.highlight_texts:
+                text.set_color('yellow')
+            self.ax.draw_artist(legend)
+            for text in self.highlight_texts:
+                text.set_color('white')
+
+
+    def set_highlight(self, lines, texts):
+        # an empty list returns all lines to normal
+        self.emphasis = [(line, self.emphasized(line)) for line in lines]
+        self.highlight_texts = texts
+        self.dim.set_visible(bool(lines))
+        self.blit()
+
+
+    def emphasized(self, line):
+        if isinstance(line, LineCollection):    # all cycles of a parameter, see APP.add_parameter
+            return LineCollection(line.get_segments(), colors=line.get_colors(), linewidths=1.5, transform=self.ax.transData, clip_box=self.ax.bbox, figure=self.ax.figure)
+        return Line2D([], [], transform=self.ax.transData, color=line.get_color(), lw=1.5, clip_box=self.ax.bbox, figure=self.ax.figure)
+
+
+    def clear_highlight(self):
+        self.emphasis = []
+        self.highlight_texts = []
+        self.dim.set_visible(False)
+
+
+    def set_click(self, x, scat_x_vals, scat_y_vals):
+        self.click_line.set_xdata([x, x])
+        self.click_line.set_visible(True)
+        self.click_points.set_data(scat_x_vals, scat_y_vals)
+        self.blit()
+
+
+    def clear_click(self):
+        self.click_line.set_visible(False)
+        self.click_points.set_data([], [])
 
 
     def set_cross_hair_visible(self, visible):
         need_redraw = self.horizontal_line.get_visible() != visible
         self.horizontal_line.set_visible(visible)
         self.vertical_line.set_visible(visible)
+        self.snap_points.set_visible(visible)
         return need_redraw
 
 
-    def create_new_background(self):
-        if self._creating_background:
-            # discard calls triggered from within this function
-            return
-        self._creating_background = True
-        self.set_cross_hair_visible(False)
-        self.ax.figure.canvas.draw()
-        self.background = self.ax.figure.canvas.copy_from_bbox(self.ax.bbox)
-        self.set_cross_hair_visible(True)
-        self._creating_background = False
+    def set_snap_points(self, x, y):
+        self.snap_points.set_data(x, y)
 
 
     def on_mouse_move(self, event):
-        if self.background is None:
-            self.create_new_background()
         if not event.inaxes:
             need_redraw = self.set_cross_hair_visible(False)
             if need_redraw:
-                self.ax.figure.canvas.restore_region(self.background)
-                self.ax.figure.canvas.blit(self.ax.bbox)
+                self.blit()
         else:
             self.set_cross_hair_visible(True)
             # update the line positions
             x, y = event.xdata, event.ydata
-            self.horizontal_line.set_ydata([y])
-            self.vertical_line.set_xdata([x])
+            self.horizontal_line.set_ydata([y, y])
+            self.vertical_line.set_xdata([x, x])
+            self.blit()
+
+
+class ParameterList(ctk.CTkFrame):
+    # the parameter switches as a virtualized list: only the rows that fit in the frame are widgets, scrolling or filtering re-binds them to
+    # other columns. a log with hundreds of columns costs as many switches as are visible, and nothing is rebuilt on a new import
+
+    ROW_HEIGHT = 34     # switch + padding
+
+    def __init__(self, master, command, font1, font2, **kwargs):
+        super().__init__(master, **kwargs)
+        self.command = command
+        self.font2 = font2
+        self.selections = {}    # column -> BooleanVar, owned by the app
+        self.names = []         # the columns that match the filter text
+        self.first = 0          # index in names of the top row
+        self.visible = 1
+        self.disabled = None    # the x axis column, can't be plotted against itself
+        self.switches = []
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(2, weight=1)
+
+        self.header = ctk.CTkLabel(self, corner_radius=0, fg_color='yellow2', text_color='grey18', text='PARAMETERS', font=font1)
+        self.header.grid(row=0, column=0, columnspan=2, padx=0, pady=0, sticky='nsew')
+        self.filter_entry = ctk.CTkEntry(self, placeholder_text='Filter', font=font2, fg_color='black', text_color='yellow2', border_color='black')
+        self.filter_entry.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky='ew')
+        self.filter_entry.bind('<KeyRelease>', self.apply_filter)
+
+        self.rows_frame = ctk.CTkFrame(self, corner_radius=0, fg_color='grey18')
+        self.rows_frame.grid(row=2, column=0, padx=0, pady=0, sticky='nsew')
+        self.rows_frame.grid_propagate(False)   # its size comes from the window, not from the switches in it
+        self.rows_frame.columnconfigure(0, weight=1)
+        self.rows_frame.bind('<Configure>', lambda event: self.render(event.height))
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview, button_color='grey50', button_hover_color='yellow2')
+        self.scrollbar.grid(row=2, column=1, padx=0, pady=0, sticky='ns')
+
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):   # windows/mac, linux
+            self.bind_all(sequence, self.on_wheel, add='+')
+
+
+    def set_parameters(self, selections):
+        self.selections = selections
+        self.disabled = None
+        self.apply_filter()
+
+
+    def set_disabled(self, name):
+        self.disabled = name
+        self.render()
+
+
+    def apply_filter(self, event=None):
+        text = self.filter_entry.get().lower()
+        self.names = [name for name in self.selections if text in name.lower()]
+        self.first = 0
+        self.render()
 
 
-            self.ax.figure.canvas.restore_region(self.background)
-            self.ax.draw_artist(self.horizontal_line)
-            self.ax.draw_artist(self.vertical_line)
-            self.ax.figure.canvas.blit(self.ax.bbox)
+    def yview(self, *args):
+        # scrollbar commands, ('moveto', fraction) or ('scroll', count, 'units'/'pages')
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.names))
+        else:
+            self.first += int(args[1]) * (self.visible if args[2] == 'pages' else 1)
+        self.render()
+
+
+    def on_wheel(self, event):
+        # bound on every widget (like CTkScrollableFrame does), only scrolls while the pointer is over the rows
+        root = str(self.rows_frame)
+        widget = str(event.widget)
+        if widget != root and not widget.startswith(root + '.'):
+            return
+
+        if event.num == 4 or event.delta > 0:
+            self.yview('scroll', -1, 'units')
+        elif event.num == 5 or event.delta < 0:
+            self.yview('scroll', 1, 'units')
+
+
+    def render(self, height=None):
+        if height is not None:
+            self.visible = max(1, height // self.ROW_HEIGHT)
+        self.first = max(0, min(self.first, len(self.names) - self.visible))
+
+        while len(self.switches) < min(self.visible, len(self.names)):     # the pool only grows with the frame
+            switch = ctk.CTkSwitch(self.rows_frame, text='', command=self.command, font=self.font2, progress_color='yellow2', fg_color='black', button_color='grey50', text_color='grey50', switch_width=40)
+            self.switches.append(switch)
+
+        for i, switch in enumerate(self.switches):
+            index = self.first + i
+            if i < self.visible and index < len(self.names):
+                name = self.names[index]
+                switch.configure(text=name, variable=self.selections[name], state='disabled' if name == self.disabled else 'normal')
+                switch.grid(row=i, column=0, padx=15, pady=5, sticky='ew')
+            else:
+                switch.grid_remove()
+
+        if self.names:
+            self.scrollbar.set(self.first / len(self.names), min(1, (self.first + self.visible) / len(self.names)))
+        else:
+            self.scrollbar.set(0, 1)
 
 
 class APP(ctk.CTk):
-    def __init__(self):
+    def __init__(self, quit_after_startup=False):
         super().__init__()
 
         # configure application window
@@ -107,11 +338,11 @@ class APP(ctk.CTk):
         self.font2 = ctk.CTkFont(family='Arial Baltic', size=14, weight='bold')
 
         self.full_df =  None
+        self.group_index =  None
         self.filtered_df =  None
         self.df_columns =  []
         self.x_axis =  ctk.StringVar()
         
-        self.disabled_button =  None
         self.yeti_selection =  ctk.StringVar()
         self.output_selection =  ctk.StringVar()
         self.cycle_selection =  ctk.StringVar()
@@ -120,17 +351,132 @@ class APP(ctk.CTk):
         self.cycle_list =  []
         self.parameter_selections =  {}
         self.crosshair_state = ctk.IntVar(value=0)
+        self.hover_state = ctk.IntVar(value=0)
+        self.collection_state = ctk.IntVar(value=0)
         self.normalize_state = ctk.IntVar(value=0)
+        self.normalize_mode = ctk.StringVar(value='min-max')
+        self.normalizers = OrderedDict()     # (yeti, load, cycle, x axis) -> Normalizer of that filter selection
+        self.smoothing = None       # (mode, window) the lines on screen are smoothed with, see smoothing_options
+        self.statistics = OrderedDict()      # same keys -> CycleStatistics
+        self.smoothers = OrderedDict()       # same keys -> Smoother
+        self.smooth_state = ctk.IntVar(value=0)
+        self.smooth_mode = ctk.StringVar(value='rolling mean')
+        self.smooth_window = ctk.StringVar(value='25')     # points, or x units (seconds on Epoch_Time) for resample
+        self.stats_parameter = ctk.StringVar()
+        self.stats_table = None
+        self.stats_sort = (None, False)
+        self.trend_window = None
+        self.derived = None         # DerivedChannels, loaded from derived_path in libraries_ready
+        self.derived_path = default_cache_dir().parent / 'derived_channels.json'
+        self.derived_names = []     # the channels the imported dataset has every column for, they get a parameter switch
+        self.derived_window = None
         self.fridgeplexor_import_state = ctk.IntVar(value=0)
         self.mixed_import_state = ctk.IntVar(value=0)
+        self.stream_import_state = ctk.IntVar(value=0)
+        self.follow_state = ctk.IntVar(value=0)
+        self.session_import_state = ctk.IntVar(value=0)
+        self.session = None     # the Session while one is imported, it is also full_df then
         self.text_filepath1 =  ctk.StringVar(value='File(s): ')
         self.text_filepath2 =  ctk.StringVar()
+        self.progress_text =  ctk.StringVar()
+        self.align_method =  ctk.StringVar(value='outer')
+        self.align_tolerance =  ctk.StringVar()
+        self.align_resample =  ctk.StringVar()
+        self.export_format = ctk.StringVar(value='csv')
+        self.export_compression = ctk.StringVar(value='none')
+        self.export_selected_state = ctk.IntVar(value=0)
+
+        # imports run on a single worker thread so the mainloop keeps running while files are parsed and merged
+        self.import_executor = ThreadPoolExecutor(max_workers=1)
+        self.import_future = None
+        self.import_cancel = None
+        self.import_progress = None
+        self.export_future = None       # the bulk export, it runs on the import worker too and shares import_cancel/import_progress
+        self.dataset_cache = DatasetCache()
+
+        # stage timings of imports, filtering, redraws and crosshair clicks, shown in the report frame
+        self.instruments = Instrumentation(default_cache_dir().parent / 'logs')
+        self.track_memory_state = ctk.IntVar(value=0)
+        self.log_timings_state = ctk.IntVar(value=0)
+
+        # follow mode, the LiveTail of the files being followed and the rows it read that aren't folded into full_df yet
+        self.tail = None
+        self.tail_future = None
+        self.tail_rows = []
+
+        # the window goes up without pandas/matplotlib, load_libraries runs once it is shown (see window_shown)
+        self.libraries = None
+        self.libraries_loaded = False
+        self.startup = {}
+        self.quit_after_startup = quit_after_startup
 
         self.protocol("WM_DELETE_WINDOW", lambda:_quit(self))
         self.init_frames()
+        self.after(0, self.window_shown)
+
+
+    def window_shown(self):
+        # first callback of the mainloop, the window is drawn once the pending idle tasks ran
+        self.update_idletasks()
+        self.startup['window'] = time.perf_counter() - STARTED
+        self.libraries = self.import_executor.submit(load_libraries)
+        self.after(50, self.poll_libraries)
+
+
+    def poll_libraries(self):
+        if self.libraries_loaded:   # import_file waited for them and got here first
+            return
+        if not self.libraries.done():
+            self.after(50, self.poll_libraries)
+            return
+        self.libraries_ready()
+
+
+    def libraries_ready(self):
+        # swaps the loading label for the graph, waits for load_libraries if it isn't done yet
+        try:
+            self.startup['libraries'] = self.libraries.result()
+        except ImportError as err:
+            self.loading_label.configure(text=f'Could not load {err.name}')
+            print(err)
+            return
+
+        start = time.perf_counter()
+        self.libraries_loaded = True
+        self.loading_label.destroy()
+        self.init_graph()
+        self.align_menu.configure(values=list(ALIGN_METHODS))
+        self.normalize_menu.configure(values=list(NORMALIZE_MODES))
+        self.smooth_menu.configure(values=list(SMOOTH_MODES))
+        self.export_format_menu.configure(values=list(EXPORT_FORMATS))
+        self.export_format_select(self.export_format.get())
+        self.derived = DerivedChannels()
+        if self.derived_path.exists():
+            try:
+                self.derived.load(self.derived_path)
+            except (OSError, ValueError) as err:    # a hand edited file that doesn't parse, start without channels
+                print(err)
+        self.update_idletasks()
+        self.startup['graph'] = time.perf_counter() - start
+        self.startup_report()
+
+
+    def startup_report(self):
+        # time to first window and to a usable graph, measured from the start of this module (the interpreter itself and, in the packaged
+        # app, the bootloader come before that). --startup-time prints it and quits, to compare builds on the lab PCs
+        now = time.perf_counter()
+        stages = [{'stage': name, 'rows_in': None, 'rows_out': None, 'bytes': None, 'seconds': seconds} for name, seconds in self.startup.items()]
+        record = {'operation': 'startup', 'started': time.time() - (now - STARTED), 'seconds': now - STARTED, 'status': 'done',
+                  'rows_in': None, 'rows_out': None, 'bytes': None, 'stages': stages, 'profile': None}
+        self.instruments.add(record)
+        self.show_report()
+
+        if self.quit_after_startup:
+            print(json.dumps(record))
+            _quit(self)
 
     def init_frames(self):
-        # Initializes window, its a function of the application so on a new import all the frames are reinitialized, updating all values
+        # Initializes window, every frame is built once and a new import only refreshes the values shown in them (see refresh_frames)
 
         # Import Frame
         self.import_frame = ctk.CTkFrame(self, width=250, corner_radius=0, bg_color='black', fg_color='grey18')
@@ -154,17 +500,59 @@ class APP(ctk.CTk):
 
         self.export_button = ctk.CTkButton(self.import_frame, corner_radius=5, text='Export Data', fg_color='grey50', text_color='grey18', state='disabled', font=self.font1, command=self.export_file, hover_color='grey50')
         self.export_button.grid(row=5, column=0, padx=10, pady=10, sticky='nsew')
+
+        # how a mixed import lines its files up, see processing.align_datasets. the menu gets the other methods in libraries_ready
+        self.align_frame = ctk.CTkFrame(self.import_frame, corner_radius=0, fg_color='grey18')
+        self.align_frame.grid(row=9, column=0, padx=5, pady=5, sticky='ew')
+        self.align_frame.columnconfigure((0,1,2), weight=1)
+        for i, text in enumerate(['Align', 'Tol. s', 'Grid s']):
+            align_text = ctk.CTkLabel(self.align_frame, text=text, font=self.font2, text_color='grey50', bg_color='grey18')
+            align_text.grid(row=0, column=i, padx=2, pady=0, sticky='w')
+        self.align_menu = ctk.CTkOptionMenu(self.align_frame, values=[self.align_method.get()], variable=self.align_method, width=90, button_color='black', dropdown_hover_color='grey50', button_hover_color='grey50', dropdown_font=self.font2, text_color='yellow2', dropdown_text_color='yellow2', dropdown_fg_color='black', font=self.font2, fg_color='black')
+        self.align_menu.grid(row=1, column=0, padx=2, pady=0, sticky='ew')
+        self.tolerance_entry = ctk.CTkEntry(self.align_frame, textvariable=self.align_tolerance, width=60, font=self.font2, fg_color='black', text_color='yellow2', border_color='black')
+        self.tolerance_entry.grid(row=1, column=1, padx=2, pady=0, sticky='ew')
+        self.resample_entry = ctk.CTkEntry(self.align_frame, textvariable=self.align_resample, width=60, font=self.font2, fg_color='black', text_color='yellow2', border_color='black')
+        self.resample_entry.grid(row=1, column=2, padx=2, pady=0, sticky='ew')
+
+        # chunked import spilled to disk, for logs that don't fit in memory, see streaming.stream_dataset
+        self.stream_import_checkbox = ctk.CTkCheckBox(self.import_frame, text='Stream (larger than RAM)', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.stream_import_state)
+        self.stream_import_checkbox.grid(row=10, column=0, padx=5, pady=5, sticky='new')
+
+        # keeps reading rows a logger appends to the imported files, see poll_tail
+        self.follow_checkbox = ctk.CTkCheckBox(self.import_frame, text='Follow File', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.follow_state)
+        self.follow_checkbox.grid(row=11, column=0, padx=5, pady=5, sticky='new')
+
+        # imports several runs side by side and overlays their parameters, see session.Session
+        self.session_checkbox = ctk.CTkCheckBox(self.import_frame, text='Session (compare runs)', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.session_import_state)
+        self.session_checkbox.grid(row=12, column=0, padx=5, pady=5, sticky='new')
+
+        self.progress_bar = ctk.CTkProgressBar(self.import_frame, corner_radius=5, progress_color='yellow2', fg_color='black')
+        self.progress_bar.grid(row=6, column=0, padx=10, pady=[5,0], sticky='ew')
+        self.progress_bar.set(0)
+        self.progress_label = ctk.CTkLabel(self.import_frame, corner_radius=5, textvariable=self.progress_text, text_color='grey50', font=self.font2, anchor='w')
+        self.progress_label.grid(row=7, column=0, padx=10, pady=0, sticky='ew')
+
+        self.cancel_button = ctk.CTkButton(self.import_frame, corner_radius=5, text='Cancel Import', fg_color='grey50', text_color='grey18', state='disabled', font=self.font2, command=self.cancel_import, hover_color='grey50')
+        self.cancel_button.grid(row=8, column=0, padx=10, pady=[0,10], sticky='ew')
+
+        # writes every Yeti/Load/Cycle group to its own file, see export.export_groups. the menus get their values in libraries_ready
+        self.export_frame = ctk.CTkFrame(self.import_frame, corner_radius=0, fg_color='grey18')
+        self.export_frame.grid(row=13, column=0, padx=5, pady=5, sticky='ew')
+        self.export_frame.columnconfigure((0,1), weight=1)
+        self.export_format_menu = ctk.CTkOptionMenu(self.export_frame, values=[self.export_format.get()], variable=self.export_format, command=self.export_format_select, width=90, button_color='black', dropdown_hover_color='grey50', button_hover_color='grey50', dropdown_font=self.font2, text_color='yellow2', dropdown_text_color='yellow2', dropdown_fg_color='black', font=self.font2, fg_color='black')
+        self.export_format_menu.grid(row=0, column=0, padx=2, pady=0, sticky='ew')
+        self.export_compression_menu = ctk.CTkOptionMenu(self.export_frame, values=[self.export_compression.get()], variable=self.export_compression, width=90, button_color='black', dropdown_hover_color='grey50', button_hover_color='grey50', dropdown_font=self.font2, text_color='yellow2', dropdown_text_color='yellow2', dropdown_fg_color='black', font=self.font2, fg_color='black')
+        self.export_compression_menu.grid(row=0, column=1, padx=2, pady=0, sticky='ew')
+        self.export_selected_checkbox = ctk.CTkCheckBox(self.export_frame, text='Selected Parameters Only', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.export_selected_state)
+        self.export_selected_checkbox.grid(row=1, column=0, columnspan=2, padx=2, pady=5, sticky='w')
+        self.export_groups_button = ctk.CTkButton(self.export_frame, corner_radius=5, text='Export All Groups', fg_color='grey50', text_color='grey18', state='disabled', font=self.font2, command=self.export_all_groups, hover_color='grey50')
+        self.export_groups_button.grid(row=2, column=0, columnspan=2, padx=5, pady=0, sticky='ew')
         
 
         # Parameter Frame
-        self.parameter_frame = ctk.CTkScrollableFrame(self, corner_radius=0, label_text='PARAMETERS', label_font=self.font1, label_fg_color='yellow2', label_text_color='grey18', bg_color='black', fg_color='grey18')
-        self.parameter_frame.grid(row=2, column=0, padx=5, pady=5, sticky='nsew')
-
-        self.parameter_switches = {}
-        for i, p in enumerate(self.parameter_selections):
-            switch = ctk.CTkSwitch(self.parameter_frame, text=p, variable=self.parameter_selections[p], command=self.update_graph, font=self.font2, progress_color='yellow2', fg_color='black', button_color='grey50', text_color='grey50', switch_width=40)
-            switch.grid(row=i, column=0, padx=15, pady=5, sticky='ew')
-            self.parameter_switches[p] = switch
+        self.parameter_list = ParameterList(self, self.update_graph, self.font1, self.font2, corner_radius=0, bg_color='black', fg_color='grey18')
+        self.parameter_list.grid(row=2, column=0, padx=5, pady=5, sticky='nsew')
 
 
         # Options Frame
@@ -173,15 +561,39 @@ class APP(ctk.CTk):
         self.options_frame.columnconfigure(0, weight=1)
 
         self.options_header = ctk.CTkLabel(self.options_frame, corner_radius=0, fg_color='yellow2', text_color='grey18', text='OPTIONS', font=self.font1)
-        self.options_header.grid(row=0, column=0, padx=0, pady=0, sticky='nsew')
+        self.options_header.grid(row=0, column=0, columnspan=2, padx=0, pady=0, sticky='nsew')
 
-        self.normalize_checkbox = ctk.CTkCheckBox(self.options_frame, text='Normalize', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50',command=self.normalize_data, variable=self.normalize_state)
+        self.normalize_checkbox = ctk.CTkCheckBox(self.options_frame, text='Normalize', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50',command=self.update_graph, variable=self.normalize_state)
         self.normalize_checkbox.grid(row=1, column=0, padx=5, pady=5, sticky='nsew' )
+        self.normalize_menu = ctk.CTkOptionMenu(self.options_frame, values=[self.normalize_mode.get()], variable=self.normalize_mode, command=lambda mode: self.update_graph(), width=90, button_color='black', dropdown_hover_color='grey50', button_hover_color='grey50', dropdown_font=self.font2, text_color='yellow2', dropdown_text_color='yellow2', dropdown_fg_color='black', font=self.font2, fg_color='black')
+        self.normalize_menu.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
 
 
         self.crosshair_checkbox = ctk.CTkCheckBox(self.options_frame, text='Crosshair', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.crosshair_state)
         self.crosshair_checkbox.grid(row=2, column=0, padx=5, pady=5, sticky='nsew' )
 
+        self.hover_checkbox = ctk.CTkCheckBox(self.options_frame, text='Hover Readout', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.hover_state, command=self.hover_select)
+        self.hover_checkbox.grid(row=3, column=0, padx=5, pady=5, sticky='nsew' )
+
+        # with 'All' cycles, draws every cycle of a parameter as one LineCollection instead of a line (and legend entry) per cycle
+        self.collection_checkbox = ctk.CTkCheckBox(self.options_frame, text='Cycles as One Line', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.collection_state, command=self.update_graph)
+        self.collection_checkbox.grid(row=4, column=0, padx=5, pady=5, sticky='nsew' )
+
+        # plotted lines smoothed for display, the summary shows the raw value and the smoothed one in brackets. the menu gets its values in libraries_ready
+        self.smooth_checkbox = ctk.CTkCheckBox(self.options_frame, text='Smooth', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', command=self.update_graph, variable=self.smooth_state)
+        self.smooth_checkbox.grid(row=5, column=0, padx=5, pady=5, sticky='nsew' )
+        self.smooth_menu = ctk.CTkOptionMenu(self.options_frame, values=[self.smooth_mode.get()], variable=self.smooth_mode, command=lambda mode: self.update_graph(), width=90, button_color='black', dropdown_hover_color='grey50', button_hover_color='grey50', dropdown_font=self.font2, text_color='yellow2', dropdown_text_color='yellow2', dropdown_fg_color='black', font=self.font2, fg_color='black')
+        self.smooth_menu.grid(row=5, column=1, padx=5, pady=5, sticky='ew')
+        self.smooth_window_text = ctk.CTkLabel(self.options_frame, text='Window (pts / s)', font=self.font2, text_color='grey50', bg_color='grey18')
+        self.smooth_window_text.grid(row=6, column=0, padx=5, pady=5, sticky='w')
+        self.smooth_window_entry = ctk.CTkEntry(self.options_frame, textvariable=self.smooth_window, width=60, font=self.font2, fg_color='black', text_color='yellow2', border_color='black')
+        self.smooth_window_entry.grid(row=6, column=1, padx=5, pady=5, sticky='ew')
+        self.smooth_window_entry.bind('<Return>', lambda event: self.update_graph())
+
+        # named expressions over the columns, like Power = Voltage * Current, see derived.DerivedChannels
+        self.derived_button = ctk.CTkButton(self.options_frame, corner_radius=5, text='Derived Channels', fg_color='yellow2', text_color='grey18', font=self.font2, command=self.show_derived, hover_color='grey50')
+        self.derived_button.grid(row=2, column=1, padx=5, pady=5, sticky='ew')
+
 
         # Graph Frame
         self.graph_frame = ctk.CTkFrame(self, corner_radius=0, bg_color='black', fg_color='grey18')
@@ -189,36 +601,11 @@ class APP(ctk.CTk):
         self.graph_frame.rowconfigure(0, weight=1)
         self.graph_frame.columnconfigure(0, weight=1)
 
-        plt.style.use('dark_background')
-
-        fig1, ax1 = plt.subplots()
-        plt.grid(color='.5')
-        plt.subplots_adjust(left=.05, right=.95, top=.95, bottom=.05)
-        self.fig1 = fig1
-        self.ax1 = ax1
-        self.ax1.spines[['top', 'bottom', 'left', 'right']].set_color('0.18')
-        self.ax1.spines[['top', 'bottom', 'left', 'right']].set_linewidth(4)
-        self.ax1.xaxis.label.set_color('.5')
-        self.ax1.yaxis.label.set_color('.5')
-
-        self.ax1.tick_params(axis='both', width=3, colors='.5', which='both', size=10)
-
-        self.canvas1 = FigureCanvasTkAgg(self.fig1, self.graph_frame)
-        self.canvas1.get_tk_widget().grid(row=0, column=0, padx=0, pady=0, sticky='nsew')
-        self.canvas1.draw()
-
-        plt.connect('motion_notify_event', lambda event: self.on_move(event, b_c=self.blitted_cursor1))
-        plt.connect('key_press_event', self.key_event)
-        plt.connect('button_press_event', self.mouse_event)
-
-        self.toolbar = NavigationToolbar2Tk(self.canvas1, self.graph_frame, pack_toolbar=False)
-        self.toolbar.grid(row=1, column=0, padx=0, pady=0, sticky='nsew')
-        self.toolbar.config(background='grey18', )
-        self.toolbar_children = self.toolbar.winfo_children()
-        for child in self.toolbar_children:
-            child.config(background='grey18')
-
-        self.blitted_cursor1 = BlittedCursor(self.ax1)
+        # stands in for the graph until load_libraries is done, see libraries_ready
+        self.loading_label = ctk.CTkLabel(self.graph_frame, text='Loading plotting libraries...', font=self.font1, text_color='grey50', bg_color='grey18')
+        self.loading_label.grid(row=0, column=0, padx=0, pady=0, sticky='nsew')
+        self.lod = None
+        self.readout = None
  
 
         # Filter Frame
@@ -256,241 +643,972 @@ class APP(ctk.CTk):
         self.summary_frame.grid(row=0, column=2, rowspan=3, padx=5, pady=5, sticky='nsew')
         self.summary_frame.grid_columnconfigure(1, weight=1)
 
+        # per cycle statistics of one parameter, the crosshair readout rows go below it
+        self.stats_frame = ctk.CTkFrame(self.summary_frame, corner_radius=0, fg_color='grey18')
+        self.stats_frame.grid(row=0, column=0, columnspan=2, padx=0, pady=[0,5], sticky='ew')
+        self.stats_frame.columnconfigure(0, weight=1)
+
+        self.stats_menu = ctk.CTkOptionMenu(self.stats_frame, values=[''], variable=self.stats_parameter, command=lambda c: self.show_statistics(), button_color='black', dropdown_hover_color='grey50', button_hover_color='grey50', dropdown_font=self.font2, text_color='yellow2', dropdown_text_color='yellow2', dropdown_fg_color='black', font=self.font2, fg_color='black')
+        self.stats_menu.grid(row=0, column=0, padx=5, pady=5, sticky='ew')
+        self.trend_button = ctk.CTkButton(self.stats_frame, corner_radius=5, text='Trend', fg_color='yellow2', text_color='grey18', font=self.font2, command=self.show_trend, hover_color='grey50', width=60)
+        self.trend_button.grid(row=0, column=1, columnspan=2, padx=5, pady=5, sticky='e')
+
+        style = ttk.Style(self)
+        style.theme_use('clam')     # the native themes ignore heading colors
+        style.configure('Stats.Treeview', background='black', fieldbackground='black', foreground='grey70', borderwidth=0, rowheight=20)
+        style.configure('Stats.Treeview.Heading', background='grey18', foreground='yellow2', borderwidth=0)
+        style.map('Stats.Treeview', background=[('selected', 'grey30')])
+
+        self.stats_tree = ttk.Treeview(self.stats_frame, columns=STATS_COLUMNS, show='headings', height=8, style='Stats.Treeview')
+        for c in STATS_COLUMNS:     # clicking a heading sorts on it
+            self.stats_tree.heading(c, text=c, command=lambda c=c: self.sort_statistics(c))
+            self.stats_tree.column(c, width=60 if c in ('cycle', 'duration') else 52, anchor='e', stretch=False)
+        self.stats_tree.grid(row=1, column=0, columnspan=2, padx=[5,0], pady=[0,5], sticky='ew')
+        self.stats_scrollbar = ctk.CTkScrollbar(self.stats_frame, command=self.stats_tree.yview, button_color='grey50', button_hover_color='yellow2')
+        self.stats_scrollbar.grid(row=1, column=2, padx=0, pady=[0,5], sticky='ns')
+        self.stats_tree.configure(yscrollcommand=self.stats_scrollbar.set)
+
+        # retained plot state, series name -> (parameter, cycle, line), see update_graph
+        self.series = {}
+        self.parameter_series = {}
+        self.lines = []
+        self.current_y_values = {}
+        self.summary_rows = {}
+        self.free_rows = []
+        self.summary_row_count = 0
+        self.plot_dataset = None
+        self.plot_key = None
+        self.cycle_split = None
+
         
-        # Report Frame
+        # Report Frame, timings of the last few operations (see instrumentation.Instrumentation)
         self.report_frame = ctk.CTkFrame(self, corner_radius=0, bg_color='black', fg_color='grey18')
         self.report_frame.grid(row=3, column=2, padx=5, pady=5, sticky='nsew')
+        self.report_frame.columnconfigure((0,1,2), weight=1)
+        self.report_frame.rowconfigure(1, weight=1)
+
+        self.report_header = ctk.CTkLabel(self.report_frame, corner_radius=0, fg_color='yellow2', text_color='grey18', text='REPORT', font=self.font1)
+        self.report_header.grid(row=0, column=0, columnspan=3, padx=0, pady=0, sticky='nsew')
+
+        self.report_text = ctk.CTkTextbox(self.report_frame, height=120, corner_radius=0, fg_color='black', text_color='grey50', font=('Consolas', 11), wrap='none', state='disabled')
+        self.report_text.grid(row=1, column=0, columnspan=3, padx=5, pady=5, sticky='nsew')
+
+        self.memory_checkbox = ctk.CTkCheckBox(self.report_frame, text='Memory', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.track_memory_state, command=lambda: self.instruments.set_track_memory(bool(self.track_memory_state.get())))
+        self.memory_checkbox.grid(row=2, column=0, padx=5, pady=5, sticky='w')
+        self.log_checkbox = ctk.CTkCheckBox(self.report_frame, text='Log File', corner_radius=5, hover_color='yellow2', fg_color='black',bg_color='grey18', border_color='black', font=self.font2, text_color='grey50', variable=self.log_timings_state, command=lambda: setattr(self.instruments, 'log_to_file', bool(self.log_timings_state.get())))
+        self.log_checkbox.grid(row=2, column=1, padx=5, pady=5, sticky='w')
+        self.profile_button = ctk.CTkButton(self.report_frame, corner_radius=5, text='Profile Next', fg_color='yellow2', text_color='grey18', font=self.font2, command=self.profile_next, hover_color='grey50', width=80)
+        self.profile_button.grid(row=2, column=2, padx=5, pady=5, sticky='e')
+        self.show_report()
+
+
+    def init_graph(self):
+        # the matplotlib half of init_frames, built once load_libraries is done. the figure isn't made through pyplot, so it is the only one
+        # and lives as long as the window, imports just clear its axes (see reset_plots)
+        plt.style.use('dark_background')
+
+        self.fig1 = Figure()
+        self.ax1 = self.fig1.add_subplot()
+        self.ax1.grid(color='.5')
+        self.fig1.subplots_adjust(left=.05, right=.95, top=.95, bottom=.05)
+        self.ax1.spines[['top', 'bottom', 'left', 'right']].set_color('0.18')
+        self.ax1.spines[['top', 'bottom', 'left', 'right']].set_linewidth(4)
+        self.ax1.xaxis.label.set_color('.5')
+        self.ax1.yaxis.label.set_color('.5')
+
+        self.ax1.tick_params(axis='both', width=3, colors='.5', which='both', size=10)
+
+        self.canvas1 = FigureCanvasTkAgg(self.fig1, self.graph_frame)
+        self.canvas1.get_tk_widget().grid(row=0, column=0, padx=0, pady=0, sticky='nsew')
+        self.canvas1.draw()
+
+        # connected once, the ids are kept so nothing can stack a second handler on the same event
+        self.connections = {
+            'motion_notify_event': self.canvas1.mpl_connect('motion_notify_event', lambda event: self.on_move(event, b_c=self.blitted_cursor1)),
+            'key_press_event': self.canvas1.mpl_connect('key_press_event', self.key_event),
+            'button_press_event': self.canvas1.mpl_connect('button_press_event', self.mouse_event),
+        }
+
+        self.toolbar = NavigationToolbar2Tk(self.canvas1, self.graph_frame, pack_toolbar=False)
+        self.toolbar.grid(row=1, column=0, padx=0, pady=0, sticky='nsew')
+        self.toolbar.config(background='grey18', )
+        self.toolbar_children = self.toolbar.winfo_children()
+        for child in self.toolbar_children:
+            child.config(background='grey18')
+
+        self.blitted_cursor1 = BlittedCursor(self.ax1)
+        self.lod = LevelOfDetail(self.ax1)     # every data line goes through this, so only a decimated copy of the visible range is rasterized
+        self.readout = Readout()
+
+
+    def show_report(self, count=4):
+        # the newest operations first
+        self.report_text.configure(state='normal')
+        self.report_text.delete('1.0', 'end')
+        self.report_text.insert('1.0', '\n'.join(format_record(record) for record in reversed(list(self.instruments.records)[-count:])))
+        self.report_text.configure(state='disabled')
+
+
+    def profile_next(self):
+        # the next import, filter, redraw or crosshair click runs under cProfile, its stats are saved in the log directory
+        self.instruments.profile_next()
+        self.report_text.configure(state='normal')
+        self.report_text.insert('1.0', f'profiling the next operation, saved to {self.instruments.log_dir}\n')
+        self.report_text.configure(state='disabled')
 
 
     def on_move(self,event, b_c = None):
         # no idea why but for somereason I cannot connect mouse movement directly to b_c.on_mouse_move, so this function just passes the event to it
         if self.crosshair_state.get():
+            if self.hover_state.get() and event.inaxes:     # live readout, the snap points are drawn by the cursor's blit
+                b_c.set_snap_points(*self.update_readout(event.xdata))
             b_c.on_mouse_move(event)
 
 
-    def import_file(self):
-        try:
-            ### need to add function to buttons so you cannot select both mixed import and fridgeplexor_imnport
+    def hover_select(self):
+        if not self.hover_state.get():
+            self.blitted_cursor1.set_snap_points([], [])
 
-            if self.fridgeplexor_import_state.get(): # if you want to import both Mdata and Ydata and then merge them into full_df
-                filename1 = tk.filedialog.askopenfilename(title = "Select Mdata",
-                                                        filetypes = [('CSV files', '*.csv')])
-                self.text_filepath1.set(f'File_1: {filename1[-30:]}')
 
-                filename2 = tk.filedialog.askopenfilename(title = "Select Ydata",
+    def import_file(self):
+        ### need to add function to buttons so you cannot select both mixed import and fridgeplexor_imnport
+        if self.import_future is not None or self.export_future is not None: # an import or export is already running
+            return
+
+        if self.session_import_state.get():   # filenames are the (mode, filenames) of every run
+            mode = 'session'
+            filenames = self.pick_session()
+            if not filenames:
+                return
+
+        elif self.fridgeplexor_import_state.get(): # if you want to import both Mdata and Ydata and then merge them into full_df
+            # any number of each, a fixture with several Yetis can log to several files. they are told apart by their headers, see processing.split_fridgeplexor
+            mode = 'fridgeplexor'
+            mdata = list(tk.filedialog.askopenfilenames(title = "Select Mdata (one or more)",
+                                                    filetypes = [('CSV files', '*.csv')]))
+            if not mdata:
+                return
+            self.text_filepath1.set(f'Mdata: {mdata[0][-30:]}' + (f' +{len(mdata) - 1}' if len(mdata) > 1 else ''))
+
+            ydata = list(tk.filedialog.askopenfilenames(title = "Select Ydata (one or more)",
+                                                filetypes = [('CSV files', '*.csv')]))
+            if not ydata:
+                return
+            self.text_filepath2.set(f'Ydata: {ydata[0][-30:]}' + (f' +{len(ydata) - 1}' if len(ydata) > 1 else ''))
+            filenames = mdata + ydata
+
+        elif self.mixed_import_state.get():
+            # merge dataframes from diffrent scripts, two mappls scripts, mappl + serial, serial + serial, etc. May have mixed frequencies, so they are aligned on E_Time
+            # the base dataset is picked on its own, the nearest/backward alignments keep its timestamps and the _File_<n> suffixes count from it.
+            # the others are added a dialog at a time (any number per dialog) until one is cancelled, so they can come from different folders
+            mode = 'mixed'
+            base = tk.filedialog.askopenfilename(title = "Select the base dataset (its timestamps are kept)",
+                                                    filetypes = [('CSV files', '*.csv')])
+            if not base:
+                return
+            self.text_filepath1.set(f'Base: {base[-30:]}')
+            filenames = [base]
+            while True:
+                added = tk.filedialog.askopenfilenames(title = f"Add datasets to merge onto {os.path.basename(base)} (cancel when done)",
                                                     filetypes = [('CSV files', '*.csv')])
-                self.text_filepath2.set(f'File_1: {filename2[-30:]}')
+                if not added:
+                    break
+                filenames += [f for f in added if f not in filenames]
+                self.text_filepath2.set(f'File_2: {filenames[1][-30:]}' + (f' +{len(filenames) - 2}' if len(filenames) > 2 else ''))
+            if len(filenames) < 2:
+                return
+
+        else: # if you dont want to merge, and you already have a good df, either from serial logger, previous merge, etc.
+            mode = 'single'
+            filename1 = tk.filedialog.askopenfilename(initialdir = "/",
+                                                title = "Select a File",
+                                                filetypes = [('CSV files', '*.csv')])
+
+            self.text_filepath1.set(f' File: {filename1[-25:]}')
+            filenames = [filename1]
+
+        if not all(filenames): # a file dialog was closed without picking a file
+            return
 
-                with open(filename2, 'r+') as file:
-                    reader = csv.reader(file)
-                    association_str = next(reader)[0]           # a string which contains the information about the connections of the system, which meters were connected to which yeti's
-                    associations = ast.literal_eval(association_str)        
-                    associations = {key: associations[key][1] for key in associations}
+        if not self.libraries_loaded:   # picked the files before load_libraries was done
+            self.progress_text.set('Loading libraries...')
+            self.update_idletasks()
+            self.libraries_ready()
+            if not self.libraries_loaded:
+                return
 
+        if self.stream_import_state.get() and mode not in STREAM_MODES:
+            self.progress_text.set(f'{mode} import can not be streamed')
+            return
+        if self.follow_state.get() and mode not in STREAM_MODES:
+            self.progress_text.set(f'{mode} import can not be followed')
+            return
+        if (self.stream_import_state.get() or self.follow_state.get()) and mode == 'fridgeplexor' and len(filenames) != 2:
+            self.progress_text.set('streaming joins one Mdata and one Ydata file')
+            return
 
-                Mdata_df = pd.read_csv(filename1, index_col=False)
-                Ydata_df = pd.read_csv(filename2, index_col=False, skiprows=1)
-                Ydata_df['M_ID'] = Ydata_df['mac'].map(associations)    # add M_ID to the yeti dataframe based on associations, so that it can be merged on later. 
-                self.full_df = Mdata_df.merge(Ydata_df, on=['M_ID', 'packet_num'], how='inner', copy=False)
+        # parsing and merging happens on the worker thread, poll_import picks the result up on the tk thread
+        self.import_cancel = threading.Event()
+        self.import_progress = queue.Queue()
+        try:
+            alignment = {'align': self.align_method.get(), 'tolerance': float(self.align_tolerance.get()) if self.align_tolerance.get() else None, 'resample': float(self.align_resample.get()) if self.align_resample.get() else None}
+        except ValueError as err:
+            print(err)
+            return
 
-                drop_columns = [c for c in self.full_df.columns if (self.full_df.dtypes[c] == 'object') and (c not in ['mac', 'channel', 'cycle'])] + ['Unnamed: 0_x', 'Unnamed: 0_y', 'packet_num']
+        self.tail = None    # stop following the previous files
+        self.import_future = self.import_executor.submit(self.load_in_background, mode, filenames, alignment, bool(self.stream_import_state.get()), bool(self.follow_state.get()))
 
-            
-            elif self.mixed_import_state.get():
+        self.import_button.configure(state='disabled', fg_color='grey50')
+        self.cancel_button.configure(state='normal', fg_color='yellow2')
+        self.after(100, self.poll_import)
 
 
-                # merge two dataframes from diffrent scripts, two mappls scripts, mappl + serial, serial + serial, etc. May have mixed frequencies, so merge on E_Time
-                filename1 = tk.filedialog.askopenfilename(title = "Dataset_1",
-                                                        filetypes = [('CSV files', '*.csv')])
-                self.text_filepath1.set(f'File_1: {filename1[-30:]}')
+    def pick_session(self):
+        # the runs of a session: any number of logs, or for fridgeplexor runs every Mdata and then every Ydata file, paired in name order
+        # like the cli does. a mixed import can't be split into runs
+        if self.mixed_import_state.get():
+            self.progress_text.set('mixed import can not be a session')
+            return []
 
-                filename2 = tk.filedialog.askopenfilename(title = "Dataset_2",
-                                                    filetypes = [('CSV files', '*.csv')])
-                self.text_filepath2.set(f'File_2: {filename2[-30:]}')
+        if self.fridgeplexor_import_state.get():
+            mdata = sorted(tk.filedialog.askopenfilenames(title='Select Mdata of every run', filetypes=[('CSV files', '*.csv')]))
+            if not mdata:
+                return []
+            ydata = sorted(tk.filedialog.askopenfilenames(title='Select Ydata of every run', filetypes=[('CSV files', '*.csv')]))
+            if len(mdata) != len(ydata):
+                self.progress_text.set(f'{len(mdata)} Mdata but {len(ydata)} Ydata files')
+                return []
+            jobs = [('fridgeplexor', [m, y]) for m, y in zip(mdata, ydata)]
+        else:
+            jobs = [('single', [filename]) for filename in sorted(tk.filedialog.askopenfilenames(title='Select the runs', filetypes=[('CSV files', '*.csv')]))]
+
+        if jobs:
+            self.text_filepath1.set(f'Session: {len(jobs)} runs')
+            self.text_filepath2.set('')
+        return jobs
+
+
+    def load_in_background(self, mode, filenames, alignment, stream=False, follow=False):
+        # runs on the import worker thread, so nothing in here may touch a widget. every progress step is also a stage of the import's timings
+        operation = f'import {mode}' if mode != 'mixed' else f'import mixed, base {os.path.basename(filenames[0])}'     # shown in the report frame
+        with self.instruments.operation(operation) as timings:
+            def progress(fraction, text):
+                self.import_progress.put((fraction, text))
+                if not text.startswith(('Streaming', 'Imported ')):    # reported per chunk/run, the whole stream or session is one stage
+                    timings.mark(text)
+
+            tail = None
+            if mode == 'session':     # spilled next to the import cache, deleted when the session is replaced or the app closes
+                full_df = load_session(filenames, self.dataset_cache.cache_dir.parent / 'sessions', progress=progress, cancel=self.import_cancel, workers=SESSION_WORKERS, cache=self.dataset_cache, **alignment)
+                filters = full_df.filter_values()
+            elif follow:      # the first poll reads everything already written, then poll_tail picks up the rest
+                tail = LiveTail(mode, filenames)
+                progress(.5, 'Reading file(s)')
+                full_df = tail.poll()
+                while not len(full_df):
+                    progress(.5, 'Waiting for data')
+                    if self.import_cancel.wait(1):
+                        raise ImportCancelled()
+                    full_df = tail.poll()
+                if tail.unmatched is not None:
+                    full_df.attrs['unmatched'] = dict(tail.unmatched)
+                filters = filter_values(full_df)
+            elif stream:      # spilled next to the import cache, keyed the same way so re-opening the same files reuses the store
+                store_path = self.dataset_cache.stream_path(mode, filenames)
+                timings.mark('Streaming')
+                full_df, filters = stream_dataset(mode, filenames, store_path, progress=progress, cancel=self.import_cancel)
+                self.dataset_cache.stream_used(store_path)      # older stores are evicted under the cache's size cap
+            else:
+                full_df, filters = load_dataset(mode, filenames, progress=progress, cancel=self.import_cancel, cache=self.dataset_cache, **alignment)
+            progress(1, 'Indexing Yeti/Load/Cycle groups')
+            group_index = build_group_index(full_df) if filters is not None and mode != 'session' else None     # every run has its own
+            timings.rows_out = len(full_df)
 
-                filenames = [filename1, filename2]
-                dataframes = []
+        return full_df, filters, group_index, tail
 
-                for filename in filenames:
-                    new_df = pd.read_csv(filename)
 
-                    if 'M_ID' in new_df.columns:
-                        filtered_dfs = []
-                        unique_meters = new_df['M_ID'].unique()
-                        for meter in unique_meters:
-                            filtered_frame = new_df[new_df['M_ID'] == meter].drop(columns=['M_ID', 'Unnamed: 0'])
-                            filtered_frame.columns = [f'{col} {str(meter)}' for col in filtered_frame.columns if col not in ('Time', 'Epoch_Time')] + ['Time', 'Epoch_Time']
-                            filtered_dfs += [filtered_frame]
+    def poll_import(self):
+        # runs on the tk thread, moves the worker's progress onto the progress bar and finishes the import once the worker is done
+        while True:
+            try:
+                fraction, text = self.import_progress.get_nowait()
+            except queue.Empty:
+                break
+            self.progress_bar.set(fraction)
+            self.progress_text.set(text)
+
+        if not self.import_future.done():
+            self.after(100, self.poll_import)
+            return
 
-                        new_df = reduce(lambda left, right: pd.merge(left, right, on=['Time', 'Epoch_Time']), filtered_dfs)
+        future = self.import_future
+        self.import_future = None
+        self.import_button.configure(state='normal', fg_color='yellow2')
+        self.cancel_button.configure(state='disabled', fg_color='grey50')
 
-                    dataframes.append(new_df)
+        try:
+            full_df, filters, group_index, tail = future.result()
+        except ImportCancelled:
+            self.progress_bar.set(0)
+            self.progress_text.set('Import cancelled')
+            self.show_report()
+            return
+        except FileNotFoundError as err:
+            self.progress_bar.set(0)
+            self.progress_text.set('')
+            self.show_report()
+            print(err)
+            return
+        except IMPORT_ERRORS as err:    # a malformed file etc, the worker is done either way so the app has to be usable again
+            self.progress_bar.set(0)
+            self.progress_text.set(f'Import failed: {err}')
+            self.show_report()
+            return
+        except BaseException:       # a bug, tk prints its traceback once the progress is reset
+            self.progress_bar.set(0)
+            self.progress_text.set('Import failed')
+            self.show_report()
+            raise
+
+        self.finish_import(full_df, filters, group_index)
+        self.tail = tail
+        self.tail_future = None
+        self.tail_rows = []
+        if tail is not None:
+            self.after(TAIL_INTERVAL, self.poll_tail, tail)
+
+
+    def cancel_import(self):
+        if self.import_future is not None or self.export_future is not None:
+            self.import_cancel.set()
+            self.progress_text.set('Cancelling...')
+
+
+    def finish_import(self, full_df, filters, group_index):
+        # swaps in the newly imported dataset and refreshes the frames from it
+        if filters is not None:
+            self.yeti_list, self.output_list, self.cycle_list = filters
+        else:
+            self.yeti_list = []
+            self.output_list = []
+            self.cycle_list = []
+        self.yeti_selection.set('')
+        self.cycle_selection.set('')
+        self.output_selection.set('')
+
+        if self.session is not None:    # its spilled runs aren't needed anymore, nothing plotted reads from them
+            self.session.close()
+        self.session = full_df if isinstance(full_df, Session) else None
+
+        if getattr(self.full_df, 'path', None) not in (None, getattr(full_df, 'path', None)):    # a streamed dataset, its store may be evicted once replaced
+            self.dataset_cache.store_closed(self.full_df.path)
+        self.full_df = full_df
+        self.filtered_df = None
+        self.group_index = group_index
+        self.normalizers.clear()
+        self.statistics.clear()
+        self.smoothers.clear()
+        self.cycle_split = None
+        self.df_columns = self.full_df.columns
+
+
+        self.parameter_selections = {}
+        for c in (self.session.parameters if self.session is not None else self.full_df.columns):
+            if c not in ['mac', 'channel', 'cycle']:
+                self.parameter_selections[c] = ctk.BooleanVar()
+        self.derived_names = self.derived.available(self.full_df.columns) if self.session is None else []
+        for c in self.derived_names:
+            self.parameter_selections[c] = ctk.BooleanVar()
+
+        self.progress_text.set(f'Imported {len(self.full_df)} rows')
+        unmatched = getattr(self.full_df, 'attrs', {}).get('unmatched')    # fridgeplexor rows without a packet on the other side
+        if unmatched and any(unmatched.values()):
+            self.progress_text.set(f'Imported {len(self.full_df)} rows, unmatched {unmatched["Mdata"]} Mdata / {unmatched["Ydata"]} Ydata')
+        if self.session is not None:
+            self.progress_text.set(f'Imported {len(self.session.runs)} runs' + (f', {len(self.session.errors)} failed' if self.session.errors else ''))
+            for label, err in self.session.errors:
+                print(f'{label}: {err!r}')
+        with self.instruments.operation('refresh_frames', rows_in=len(self.df_columns)):
+            self.refresh_frames()
+        self.show_report()
+
+        self.export_groups_button.configure(state='disabled' if self.session is not None else 'normal', fg_color='grey50' if self.session is not None else 'yellow2')
+        if self.mixed_import_state.get():
+            self.export_button.configure(state='normal', fg_color='yellow2')        #allow export of dataset
+        else:
+            self.x_axis.set('')
+
+
+    def refresh_frames(self):
+        # puts the new dataset's columns and filter values in the existing widgets and clears the graph
+        self.xaxis_menu.configure(values=list(self.df_columns))
+        self.filter1_menu.configure(values=self.yeti_list)
+        self.filter2_menu.configure(values=self.output_list)
+        self.filter3_menu.configure(values=self.cycle_list)
+        self.parameter_list.set_parameters(self.parameter_selections)
+        self.refresh_statistics()
+
+        self.reset_plots()
+        self.refresh_legend()
+        self.plot_dataset = None
+        self.plot_key = None
+        self.cycle_split = None
+        self.canvas1.draw_idle()
 
-                #combine the dataframes here after deleting redundant time columns, and some more weird columns before merging
-                for df in dataframes:
-                    c_set = set(df.columns)
-                    drop_set = set(['Time', 'Unnamed: 0'])
-                    df.drop(columns=list(c_set.intersection(drop_set)), inplace=True)
-                    
 
-                self.full_df = dataframes[0].merge(dataframes[1], on='Epoch_Time', how='outer', suffixes=('_File_1', '_File_2'))
-                #drop columns and conditional logic here
-                drop_columns = [c for c in self.full_df.columns if (self.full_df.dtypes[c] == 'object')]
+    def poll_tail(self, tail):
+        # runs on the tk thread while following, reading and parsing the new rows happens on the import worker
+        if tail is not self.tail:   # another import replaced it
+            return
 
-            else: # if you dont want to merge, and you already have a good df, either from serial logger, previous merge, etc.
-                filename1 = tk.filedialog.askopenfilename(initialdir = "/",
-                                                    title = "Select a File",
-                                                    filetypes = [('CSV files', '*.csv')])
+        if self.tail_future is not None and self.tail_future.done():
+            future = self.tail_future
+            self.tail_future = None
+            try:
+                rows = future.result()
+            except (OSError, ValueError) as err:    # the file was removed or rewritten
+                print(err)
+                self.tail = None
+                self.progress_text.set('Stopped following')
+                return
+
+            if len(rows):
+                self.append_rows(rows)
+
+        if self.tail_future is None and self.follow_state.get():    # unchecking Follow File pauses it
+            self.tail_future = self.import_executor.submit(tail.poll)
+        self.after(TAIL_INTERVAL, self.poll_tail, tail)
+
+
+    def append_rows(self, rows):
+        # adds rows read from a followed file to the lines on screen, the work is proportional to the new rows. they are only folded into
+        # full_df (see fold_tail) when the whole dataset is needed again: a new filter selection, a parameter toggle or an export
+        self.tail_rows.append(rows)
+        unmatched = self.tail.unmatched if self.tail is not None else None
+        self.progress_text.set(f'Following, {len(self.full_df) + sum(len(r) for r in self.tail_rows)} rows'
+                               + (f', unmatched {unmatched["Mdata"]} Mdata / {unmatched["Ydata"]} Ydata' if unmatched and any(unmatched.values()) else ''))
+
+        if self.plot_dataset is None:   # nothing plotted yet
+            return
+        if self.normalize_state.get() or self.smooth_state.get() or (self.collection_state.get() and self.cycle_selection.get() == 'All'):
+            self.update_graph()     # normalized/smoothed values and cycle collections depend on every row, these are replotted
+            return
 
-                self.text_filepath1.set(f' File: {filename1[-25:]}')
-                self.full_df = pd.read_csv(filename1)
-                if 'M_ID' in self.full_df.columns:
-                    filtered_dfs = []
-                    unique_meters = self.full_df['M_ID'].unique()
-                    for meter in unique_meters:
-                        filtered_frame = self.full_df[self.full_df['M_ID'] == meter].drop(columns=['M_ID', 'Unnamed: 0'])
-                        filtered_frame.columns = [f'{col} {str(meter)}' for col in filtered_frame.columns if col not in ('Time', 'Epoch_Time')] + ['Time', 'Epoch_Time']
-                        filtered_dfs += [filtered_frame]
+        selected_x_axis = self.x_axis.get()
+        yeti, output, cycle = self.yeti_selection.get(), self.output_selection.get(), self.cycle_selection.get()
+        if yeti and output and cycle and self.group_index is not None:     # the rows filter_data would have selected
+            keep = (rows['mac'].astype(str) == yeti) & (rows['channel'].astype(str) == output)
+            if cycle != 'All':
+                keep &= rows['cycle'].astype(str) == cycle
+            rows = rows[keep]
+        if not len(rows):
+            return
+        rows = rows.sort_values(selected_x_axis, kind='stable')
+        derived = [c for c in self.parameter_series if c in self.derived_names]
+        if derived:     # the followed files don't have the derived columns, they are computed for just the new rows
+            rows = self.derived.add_to(rows, derived)
+
+        x_min, x_max = self.ax1.get_xlim()     # before new lines can autoscale it
+        x_readout = self.readout.series.get(selected_x_axis)
+        old_end = x_readout[0][-1] if x_readout is not None and len(x_readout[0]) else None
+        if x_readout is not None:
+            self.readout.extend(selected_x_axis, rows[selected_x_axis], rows[selected_x_axis])
+
+        new_lines = False
+        for c in self.parameter_series:
+            if cycle != 'All':
+                part = rows[[selected_x_axis, c]].dropna(subset=[c])
+                self.lod.extend(self.series[c][2], part[selected_x_axis], part[c])
+                self.readout.extend(c, part[selected_x_axis], part[c])
+                continue
+
+            part = rows[[selected_x_axis, c, 'cycle']].dropna(subset=[c])
+            for part_cycle, group in part.groupby('cycle', sort=False):
+                name = c + '-' + str(part_cycle)
+                if name in self.series:
+                    self.lod.extend(self.series[name][2], group[selected_x_axis], group[c])
+                    self.readout.extend(name, group[selected_x_axis], group[c])
+                else:   # a cycle that started since the last read
+                    self.parameter_series[c].append(self.plot_series(c, part_cycle, group[selected_x_axis], group[c], group[c]))
+                    new_lines = True
+
+        # if the newest data was in view, scroll along with it
+        new_end = rows[selected_x_axis].max()
+        if old_end is not None and x_max >= old_end and new_end > old_end:
+            self.ax1.set_xlim(x_min + new_end - old_end, x_max + new_end - old_end)
+        self.ax1.relim()
+        self.ax1.autoscale_view(scalex=False)
+
+        if new_lines:
+            self.refresh_legend()
+        self.canvas1.draw_idle()
 
-                    self.full_df = reduce(lambda left, right: pd.merge(left, right, on=['Time', 'Epoch_Time']), filtered_dfs)
 
-                drop_columns = [c for c in self.full_df.columns if (self.full_df.dtypes[c] == 'object')] #if the colum has mixed datatypes, we drop it, gets ride of weird columns in serial logger data
-                if 'Unnamed: 0' in self.full_df.columns:
-                    drop_columns.append('Unnamed: 0')
+    def fold_tail(self):
+        # moves the rows read while following into full_df, and redoes the group index, the dropdown values and filtered_df from it
+        if not self.tail_rows:
+            return
 
-            self.disabled_button = None
+        # the derived columns computed so far don't have the new rows, they are computed again on the next plot
+        self.full_df = pd.concat([self.full_df.drop(columns=[c for c in self.derived_names if c in self.full_df.columns])] + self.tail_rows, ignore_index=True)
+        self.tail_rows = []
+        for c in ('mac', 'channel'):    # pieces with different categories concat to plain strings
+            if c in self.full_df.columns:
+                self.full_df[c] = self.full_df[c].astype('category')
 
-            try:
-                self.yeti_list = [str(y) for y in self.full_df['mac'].unique()]
-                self.yeti_selection = ctk.StringVar()
-                self.output_list = [str(o) for o in self.full_df['channel'].unique()]
-                self.output_selection = ctk.StringVar()
-                self.cycle_list = [str(c) for c in self.full_df['cycle'].unique()] + ['All']
-                self.cycle_selection = ctk.StringVar()
-
-            except (KeyError, ValueError):
-                self.yeti_list = []
-                self.output_list = []
-                self.cycle_list = []
-                self.yeti_selection.set('')
-                self.cycle_selection.set('')
-                self.output_selection.set('')
-
-            self.full_df = self.full_df.drop(columns=drop_columns, axis=1)
-            self.df_columns = self.full_df.columns
-
-
-            self.parameter_selections = {}
-            for c in self.full_df.columns:
-                if c not in ['mac', 'channel', 'cycle']:
-                    self.parameter_selections[c] = ctk.BooleanVar()
-            
-            self.init_frames()
-
-            if self.mixed_import_state.get():
-                self.export_button.configure(state='normal', fg_color='yellow2')        #allow export of dataset
-            else:
-                self.x_axis.set('')
+        if self.group_index is not None:
+            self.group_index = build_group_index(self.full_df)
+            self.yeti_list, self.output_list, self.cycle_list = filter_values(self.full_df)
+            self.filter1_menu.configure(values=self.yeti_list)
+            self.filter2_menu.configure(values=self.output_list)
+            self.filter3_menu.configure(values=self.cycle_list)
 
-        except FileNotFoundError as err:
-            print(err)
+        if self.filtered_df is not None:
+            self.filtered_df = filter_data(self.full_df, self.group_index, self.yeti_selection.get(), self.output_selection.get(), self.cycle_selection.get(), self.x_axis.get())
+            self.refresh_statistics()
 
 
     def drop_filter_data(self):
         # filters master dataframe based on the slections of the filter dropdowns
-        if self.disabled_button is not None:
-            self.parameter_switches[self.disabled_button].configure(state='normal')
+        with self.instruments.operation('filter') as timings:
+            with timings.stage('fold_tail', rows_in=sum(len(r) for r in self.tail_rows)):
+                self.fold_tail()
+            with timings.stage('filter_data', rows_in=len(self.full_df)) as stage:
+                self.filter_selection()
+                stage['rows_out'] = timings.rows_out = len(self.filtered_df)
+            with timings.stage('statistics', rows_in=len(self.filtered_df)) as stage:
+                self.refresh_statistics()
+                stage['rows_out'] = len(self.stats_table) if self.stats_table is not None else None    # groups
+        self.update_graph()
+
+
+    def filter_selection(self):
+        if self.session is not None:    # the parameters are 'run: column', so the x axis has no switch to disable
+            self.filtered_df = self.session.select(self.yeti_selection.get(), self.output_selection.get(), self.cycle_selection.get(), self.x_axis.get())
+            return
 
         self.parameter_selections[self.x_axis.get()].set(False)
-        self.parameter_switches[self.x_axis.get()].configure(state='disabled')
-        self.disabled_button = self.x_axis.get() # save the most recently disabled buttons name as a variable
+        self.parameter_list.set_disabled(self.x_axis.get())
 
-        try:
-            if self.yeti_selection.get() and self.output_selection.get() and self.cycle_selection.get(): # if filters selections are made, filter. Note 'All' must be selected if you do not want to be filter by that column
-                
-                if self.cycle_selection.get() == 'All':
-                    filtered_df = self.full_df.query(f'mac == "{self.yeti_selection.get()}" and channel == "{self.output_selection.get()}"')
-                    filtered_df = filtered_df.drop(labels=['mac', 'channel'], axis=1)
-                else:
-                    filtered_df = self.full_df.query(f'mac == "{self.yeti_selection.get()}" and channel == "{self.output_selection.get()}" and cycle == {self.cycle_selection.get()}')
-                    filtered_df = filtered_df.drop(labels=['mac', 'channel', 'cycle'], axis=1)
-
-                self.filtered_df = filtered_df.sort_values(self.x_axis.get())
-                self.update_graph()
-            else:
-                self.filtered_df = self.full_df
-                self.update_graph()
-            
-        except SyntaxError as err:
-            print(err)
+        self.filtered_df = filter_data(self.full_df, self.group_index, self.yeti_selection.get(), self.output_selection.get(), self.cycle_selection.get(), self.x_axis.get())
 
 
     def update_graph(self):
-        # updates graph plots from data(remakes plots and draws)
-        if self.normalize_state.get():
-            dataset = self.normalized_df
-        else:
+        # brings the graph in line with the parameter switches. lines and summary rows are kept between calls, so a toggle only adds or removes
+        # the lines of that parameter, everything is only replotted when the dataset itself changed (new filter, x axis or normalization)
+        with self.instruments.operation('update_graph') as timings:
+            with timings.stage('fold_tail', rows_in=sum(len(r) for r in self.tail_rows)):
+                self.fold_tail()
             dataset = self.filtered_df
 
-        self.filtered_frames = {}
+            try:
+                timings.rows_in = len(dataset)
+                selected_x_axis = self.x_axis.get()
+                self.smoothing = self.smoothing_options()
+                plot_key = (selected_x_axis, self.cycle_selection.get() == 'All', self.normalize_mode.get() if self.normalize_state.get() else None, self.collection_state.get(), self.smoothing)
+                if dataset is not self.plot_dataset or plot_key != self.plot_key:
+                    with timings.stage('reset_plots'):
+                        self.reset_plots()
+                        self.plot_dataset = dataset
+                        self.plot_key = plot_key
+                        self.add_summary_row(selected_x_axis)       # manually make an additional summary label for the x axis value
+                        if selected_x_axis in dataset:
+                            self.readout.add(selected_x_axis, dataset[selected_x_axis], dataset[selected_x_axis])
+                        elif isinstance(dataset, SessionView):      # its parameters are 'run: column', the x axis of every run is read instead
+                            x = dataset.x_values()
+                            self.readout.add(selected_x_axis, x, x)
+
+                derived = [c for c in self.derived_names if self.parameter_selections[c].get() and c not in dataset]
+                with timings.stage('derived', rows_in=len(derived)):
+                    self.add_derived(dataset, derived)
+
+                selected = [c for c in dataset if c in self.parameter_selections and self.parameter_selections[c].get()]     # filter columns have no switch
+
+                removed = [c for c in self.parameter_series if c not in selected]
+                with timings.stage('remove_lines', rows_in=len(removed)):
+                    for c in removed:
+                        self.remove_parameter(c)
+
+                added = [c for c in selected if c not in self.parameter_series]
+                with timings.stage('add_lines', rows_in=len(added)) as stage:
+                    for c in added:
+                        self.add_parameter(c, dataset, selected_x_axis)
+                    stage['rows_out'] = sum(len(self.parameter_series[c]) for c in added)    # lines made
+
+                if removed and self.series:     # let the limits shrink back to the remaining lines
+                    self.ax1.relim()
+                    self.ax1.autoscale_view()
+
+                with timings.stage('legend'):
+                    self.refresh_legend()
+                with timings.stage('draw'):
+                    self.canvas1.draw()
+                timings.rows_out = len(self.series)
+
+            except (AttributeError, TypeError) as err:
+                print(err)
+
+        self.show_report()
+
+
+    def add_derived(self, dataset, names):
+        # derived channels are only computed once switched on, and then added to the filter selection's frame as a column. that frame is
+        # kept by the GroupIndex (or is full_df), so the values last as long as the selection does and are dropped with it on re-import.
+        # normalization, the cycle split and the export treat them like any other column from there on
+        if not names or not isinstance(dataset, pd.DataFrame):      # not for an unfiltered stream, it isn't in memory
+            return
+        for c in names:
+            dataset[c] = self.derived.evaluate(c, dataset)
+        self.statistics.pop((self.yeti_selection.get(), self.output_selection.get(), self.cycle_selection.get(), self.x_axis.get()), None)
+        self.refresh_statistics()
 
+
+    def show_derived(self):
+        # the definitions as 'name = expression' lines in a window of their own
+        if self.derived is None:
+            return
+        if self.derived_window is None or not self.derived_window.winfo_exists():
+            self.derived_window = ctk.CTkToplevel(self)
+            self.derived_window.title('Derived Channels')
+            self.derived_window.geometry('600x400')
+            self.derived_window.configure(fg_color='grey18')
+            self.derived_window.columnconfigure((0,1,2), weight=1)
+            self.derived_window.rowconfigure(0, weight=1)
+            self.derived_text = ctk.CTkTextbox(self.derived_window, font=self.font2, fg_color='black', text_color='yellow2')
+            self.derived_text.grid(row=0, column=0, columnspan=3, padx=5, pady=5, sticky='nsew')
+            self.derived_status = ctk.CTkLabel(self.derived_window, text='one channel per line, e.g. Power = Voltage * Current', font=self.font2, text_color='grey50', anchor='w')
+            self.derived_status.grid(row=1, column=0, columnspan=3, padx=5, pady=0, sticky='ew')
+            for i, (text, command) in enumerate([('Apply', self.apply_derived), ('Load...', self.load_derived), ('Save As...', self.save_derived)]):
+                button = ctk.CTkButton(self.derived_window, corner_radius=5, text=text, fg_color='yellow2', text_color='grey18', font=self.font2, command=command, hover_color='grey50')
+                button.grid(row=2, column=i, padx=5, pady=5, sticky='ew')
+
+        self.derived_text.delete('1.0', 'end')
+        self.derived_text.insert('1.0', self.derived.text())
+        self.derived_window.lift()
+
+
+    def apply_derived(self):
+        # nothing changes if a line doesn't parse, otherwise the definitions are saved for the next start and the switches rebuilt
         try:
-            count = 1
-
-            # clear values from previous plots, reset summary labels
-            self.ax1.clear()
-            self.current_y_values = {}
-            for widget in self.summary_frame.winfo_children():
-                widget.destroy()
-
-            # manually make an additional summary label for the x axis value
-            selected_x_axis = self.x_axis.get()
-            self.current_y_values[selected_x_axis] = ctk.StringVar(value=selected_x_axis)
-            data_label = ctk.CTkLabel(self.summary_frame, corner_radius=0, textvariable=self.current_y_values[selected_x_axis], font=self.font2, text_color='grey50')
-            data_label.grid(row=0, column=1, padx=5, pady=2, sticky='w')
-            text_label= ctk.CTkLabel(self.summary_frame, corner_radius=0, text=f'{selected_x_axis}: ', font=self.font2, text_color='yellow2')
-            text_label.grid(row=0, column=0, padx=5, pady=2 , sticky='w')
-
-            # Replot new selected plots, and remake summary labels
-            for c in dataset:
-                if c != 'cycle':
-                    if self.parameter_selections[c].get():
-
-                        # if 'All' cycles is selected, it is a full system import, and we need to break the data into multiple lines for each cycle, and then display them all at once, for each selected parameter
-                        if self.cycle_selection.get() == 'All':
-                            filtered_frame = dataset.dropna(subset=[f'{c}'])[[selected_x_axis, f'{c}', 'cycle']]
-                            cycles = filtered_frame['cycle'].unique()
-                            for cycle in cycles:
-                                cycle_name = c + '-' + str(cycle)
-                                subset = filtered_frame[filtered_frame['cycle'] == cycle]
-                                self.filtered_frames[cycle_name] = subset
-                                self.ax1.plot(subset[selected_x_axis], subset[c], label=cycle_name, linewidth=1) #plot the line
-                                self.current_y_values[cycle_name] = ctk.StringVar(value=cycle_name)
-                                data_label = ctk.CTkLabel(self.summary_frame, corner_radius=0, textvariable=self.current_y_values[cycle_name], font=self.font2, text_color='grey50')
-                                data_label.grid(row=count, column=1, padx=5, pady=2, sticky='w')
-                                text_label= ctk.CTkLabel(self.summary_frame, corner_radius=0, text=f'{cycle_name}: ', font=self.font2, text_color='yellow2', justify='left', wraplength=150)
-                                text_label.grid(row=count, column=0, padx=5, pady=2 , sticky='w')
-                                count += 1
-                        else:
-                            # 'All' is not selected and we plot normally
-                            filtered_frame = dataset.dropna(subset=[f'{c}'])[[selected_x_axis, f'{c}']]
-                            self.filtered_frames[c] = filtered_frame
-                            self.ax1.plot(filtered_frame[selected_x_axis], filtered_frame[c], label=c, linewidth=1) #plot the line
-                            self.current_y_values[c] = ctk.StringVar(value=c)
-                            data_label = ctk.CTkLabel(self.summary_frame, corner_radius=0, textvariable=self.current_y_values[c], font=self.font2, text_color='grey50')
-                            data_label.grid(row=count, column=1, padx=5, pady=2, sticky='w')
-                            text_label= ctk.CTkLabel(self.summary_frame, corner_radius=0, text=f'{c}: ', font=self.font2, text_color='yellow2', justify='left', wraplength=150)
-                            text_label.grid(row=count, column=0, padx=5, pady=2 , sticky='w')
-                            count += 1
-
-            if count > 1: # only draw legend if there are actualy plots, if no plots selected count = 0
-                self.ax1.legend()
-
-            self.lines = self.ax1.get_lines()
-            self.canvas1.draw()
-
-        except (AttributeError, TypeError) as err:
-            print(err)
+            self.derived.parse(self.derived_text.get('1.0', 'end'))
+            self.derived.save(self.derived_path)
+        except (OSError, ValueError) as err:
+            self.derived_status.configure(text=str(err), text_color='red')
+            return
+        self.derived_status.configure(text=f'{len(self.derived)} channels', text_color='grey50')
+        self.refresh_derived()
+
+
+    def load_derived(self):
+        filename = tk.filedialog.askopenfilename(title='Load derived channels', filetypes=[('JSON files', '*.json')])
+        if not filename:
+            return
+        try:
+            self.derived.load(filename)
+            self.derived.save(self.derived_path)
+        except (OSError, ValueError) as err:
+            self.derived_status.configure(text=str(err), text_color='red')
+            return
+        self.show_derived()
+        self.refresh_derived()
+
+
+    def save_derived(self):
+        filename = tk.filedialog.asksaveasfilename(defaultextension='.json', title='Save derived channels as: ', filetypes=[('JSON files', '*.json')])
+        if filename:
+            self.derived.save(filename)
+
+
+    def refresh_derived(self):
+        # the definitions changed, drops every computed channel and gives the imported dataset the switches of the new ones
+        if self.full_df is None or self.session is not None:
+            return
+        frames = [self.full_df] + (list(self.group_index.views.values()) if self.group_index is not None else [])
+        for frame in frames:
+            if isinstance(frame, pd.DataFrame):
+                frame.drop(columns=[c for c in self.derived_names if c in frame.columns], inplace=True)
+        switches = {c: self.parameter_selections.pop(c) for c in self.derived_names}
+
+        self.derived_names = self.derived.available(self.full_df.columns)
+        for c in self.derived_names:    # a redefined channel stays switched on
+            self.parameter_selections[c] = switches[c] if c in switches else ctk.BooleanVar()
+        self.normalizers.clear()
+        self.statistics.clear()
+        self.smoothers.clear()
+        self.cycle_split = None
+        self.plot_dataset = None    # replots everything on the next update
+        self.parameter_list.set_parameters(self.parameter_selections)
+        if self.filtered_df is not None:
+            self.refresh_statistics()
+            self.update_graph()
+
+
+    def reset_plots(self):
+        # clear values from previous plots, and hand every summary row back to the pool
+        self.ax1.clear()
+        self.lod.reset()
+        self.blitted_cursor1.clear_click()
+        for name in list(self.summary_rows):
+            self.release_summary_row(name)
+
+        self.series = {}
+        self.parameter_series = {}
+        self.readout.clear()
+        self.summary_row_count = 0
+
+
+    def add_parameter(self, c, dataset, selected_x_axis):
+        names = []
+
+        if isinstance(dataset, SessionView):    # one line per run and parameter, with 'All' cycles too. plotted as imported, not normalized
+            x, y = dataset.series(c)
+            names.append(self.plot_series(c, None, x, y, y))
+            self.parameter_series[c] = names
+            return
+
+        # if 'All' cycles is selected, it is a full system import, and we need to break the data into multiple lines for each cycle, and then display them all at once, for each selected parameter
+        if self.cycle_selection.get() == 'All':
+            # every cycle is a slice of the same cycle sorted arrays, see processing.CycleSplit
+            if self.cycle_split is None or self.cycle_split.df is not dataset or self.cycle_split.x_axis != selected_x_axis:
+                self.cycle_split = CycleSplit(dataset, selected_x_axis)
+            plotted = self.normalizer().column(c, self.normalize_mode.get()).to_numpy() if self.normalize_state.get() else None
+            x, y, raw_y, bounds = self.cycle_split.column(c, plotted)
+            cycles = [(cycle, start, end) for cycle, start, end in zip(self.cycle_split.cycles, bounds[:-1], bounds[1:]) if end > start]
+
+            if self.collection_state.get():
+                colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+                segments = [self.smoothed(f'{c}-{cycle}', x[start:end], y[start:end], raw_y[start:end]) for cycle, start, end in cycles]
+                collection = LineCollection([np.column_stack((sx, sy)) for sx, sy, _ in segments], colors=colors[len(self.series) % len(colors)], linewidths=1, label=c)
+                self.ax1.add_collection(collection)
+                self.series[c] = (c, 'All', collection)
+                self.readout.add(c, x, y, raw_y)        # snaps to the nearest point of any cycle
+                if self.smoothing is not None and segments:
+                    self.readout.add_smoothed(c, *(np.concatenate(parts) for parts in zip(*segments)))
+                self.add_summary_row(c)
+                names.append(c)
+            else:
+                for cycle, start, end in cycles:
+                    names.append(self.plot_series(c, cycle, x[start:end], y[start:end], raw_y[start:end]))
+        else:
+            # 'All' is not selected and we plot normally
+            filtered_frame = dataset[[selected_x_axis, f'{c}']].dropna(subset=[f'{c}'])
+            y_values = self.plot_values(filtered_frame, c)
+            names.append(self.plot_series(c, None, filtered_frame[selected_x_axis], y_values, filtered_frame[c]))
+
+        self.parameter_series[c] = names
+
+
+    def plot_series(self, c, cycle, x, y, raw_y):
+        # one line of parameter c (of one cycle, or None for every row) with its readout and summary row, returns the series name
+        name = c if cycle is None else c + '-' + str(cycle)
+        smooth_x, smooth_y, smooth_raw_y = self.smoothed(name, x, y, raw_y)
+        line = self.lod.plot(smooth_x, smooth_y, label=name, linewidth=1) #plot the line
+        self.series[name] = (c, cycle, line)
+        self.readout.add(name, x, y, raw_y)
+        if self.smoothing is not None:
+            self.readout.add_smoothed(name, smooth_x, smooth_y, smooth_raw_y)
+        self.add_summary_row(name)
+        return name
+
+
+    def remove_parameter(self, c):
+        for name in self.parameter_series.pop(c):
+            _, _, line = self.series.pop(name)
+            self.lod.remove(line)
+            self.readout.remove(name)
+            self.release_summary_row(name)
+
+
+    def smoothing_options(self):
+        # (mode, window) of the smoothing, None while it is off or the window isn't a positive number
+        if not self.smooth_state.get():
+            return None
+        try:
+            window = float(self.smooth_window.get())
+        except ValueError:
+            window = 0
+        if not window > 0:
+            self.progress_text.set('smoothing window must be a positive number')
+            return None
+        return self.smooth_mode.get(), window
+
+
+    def smoothed(self, name, x, y, raw_y):
+        # (x, y, raw y) of a series as drawn. with smoothing on, y and raw y smoothed the same way (one pass if they are the same values),
+        # from the filter selection's Smoother, so a redraw or toggle doesn't compute them again
+        if self.smoothing is None:
+            return x, y, raw_y
+        smoother = self.smoother()
+        if self.normalize_state.get():
+            smooth_x, smooth_y = smoother.series(name, self.normalize_mode.get(), x, y, *self.smoothing)
+            return smooth_x, smooth_y, smoother.series(name, 'raw', x, raw_y, *self.smoothing)[1]
+        smooth_x, smooth_y = smoother.series(name, 'raw', x, raw_y, *self.smoothing)
+        return smooth_x, smooth_y, smooth_y
+
+
+    def smoother(self):
+        # kept per filter selection like normalizer()
+        key = (self.yeti_selection.get(), self.output_selection.get(), self.cycle_selection.get(), self.x_axis.get())
+        smoother = self.smoothers.get(key)
+        if smoother is None or smoother.df is not self.filtered_df:
+            smoother = Smoother(self.filtered_df)
+            self.smoothers[key] = smoother
+            if len(self.smoothers) > 16:
+                self.smoothers.popitem(last=False)
+
+        self.smoothers.move_to_end(key)
+        return smoother
+
+
+    def plot_values(self, frame, c):
+        # y values of the rows in frame, normalized if normalization is on. the summary keeps showing the raw values of frame
+        if not self.normalize_state.get():
+            return frame[c].to_numpy()
+        return self.normalizer().column(c, self.normalize_mode.get()).reindex(frame.index).to_numpy()
+
+
+    def normalizer(self):
+        # normalized columns are made on first plot and kept per filter selection, so going back to a selection or toggling normalization
+        # off and on again reuses them. the entry is only rebuilt when the selection gave a new filtered_df
+        key = (self.yeti_selection.get(), self.output_selection.get(), self.cycle_selection.get(), self.x_axis.get())
+        normalizer = self.normalizers.get(key)
+        if normalizer is None or normalizer.df is not self.filtered_df:
+            normalizer = Normalizer(self.filtered_df)
+            self.normalizers[key] = normalizer
+            if len(self.normalizers) > 16:
+                self.normalizers.popitem(last=False)
+
+        self.normalizers.move_to_end(key)
+        return normalizer
+
+
+    def cycle_statistics(self):
+        # like normalizer(), the aggregates of the last few filter selections are kept and only rebuilt for a new filtered_df
+        key = (self.yeti_selection.get(), self.output_selection.get(), self.cycle_selection.get(), self.x_axis.get())
+        statistics = self.statistics.get(key)
+        if statistics is None or statistics.df is not self.filtered_df:
+            statistics = CycleStatistics(self.filtered_df, self.x_axis.get())
+            self.statistics[key] = statistics
+            if len(self.statistics) > 16:
+                self.statistics.popitem(last=False)
+
+        self.statistics.move_to_end(key)
+        return statistics
+
+
+    def refresh_statistics(self):
+        # filtered_df changed, offers its columns in the statistics menu. sessions and unfiltered streamed imports (not in memory) have none
+        columns = [c for c in self.cycle_statistics().columns if c != self.x_axis.get()] if isinstance(self.filtered_df, pd.DataFrame) else []
+        self.stats_menu.configure(values=columns or [''])
+        if self.stats_parameter.get() not in columns:
+            self.stats_parameter.set(columns[0] if columns else '')
+        self.show_statistics()
+
+
+    def show_statistics(self):
+        self.stats_table = None
+        if self.stats_parameter.get():
+            self.stats_table = self.cycle_statistics().table(self.stats_parameter.get())
+        self.stats_sort = (None, False)
+        self.fill_statistics(self.stats_table)
+
+        if self.trend_window is not None and self.trend_window.winfo_exists():
+            self.draw_trend()
+
+
+    def sort_statistics(self, column):
+        # biggest first on the first click of a heading, cycles in order, a second click reverses it
+        if self.stats_table is None:
+            return
+
+        last, descending = self.stats_sort
+        descending = not descending if column == last else column != 'cycle'
+        if column == 'cycle':
+            table = self.stats_table.iloc[::-1] if descending else self.stats_table
+        else:
+            table = self.stats_table.sort_values(column, ascending=not descending, kind='stable')
+        self.stats_sort = (column, descending)
+        self.fill_statistics(table)
+
+
+    def fill_statistics(self, table):
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        if table is None:
+            return
+
+        for group, row in zip(table.index, table[list(STATS_COLUMNS[1:])].to_numpy()):
+            self.stats_tree.insert('', 'end', values=[group] + [f'{v:.4g}' for v in row])
+
+
+    def show_trend(self):
+        # cycle over cycle min/max/mean/rms of the statistics parameter in a window of its own, kept and redrawn while it is open
+        if self.stats_table is None:
+            return
+
+        if self.trend_window is None or not self.trend_window.winfo_exists():
+            self.trend_window = ctk.CTkToplevel(self)
+            self.trend_window.geometry('800x400')
+            self.trend_figure = Figure()
+            self.trend_ax = self.trend_figure.add_subplot()
+            self.trend_canvas = FigureCanvasTkAgg(self.trend_figure, self.trend_window)
+            self.trend_canvas.get_tk_widget().pack(fill='both', expand=True)
+
+        self.draw_trend()
+        self.trend_window.lift()
+
+
+    def draw_trend(self):
+        # drawn from the aggregates, a point per group however many rows are behind it
+        self.trend_ax.clear()
+        if self.stats_table is not None:
+            x = self.cycle_statistics().x
+            for stat in ('min', 'max', 'mean', 'rms'):
+                self.trend_ax.plot(x, self.stats_table[stat].to_numpy(), label=stat, linewidth=1)
+            self.trend_ax.legend()
+            self.trend_window.title(f'{self.stats_parameter.get()} per cycle')
+        self.trend_ax.grid(color='.5')
+        self.trend_canvas.draw_idle()
+
+
+    def add_summary_row(self, name):
+        # re-uses the labels of a removed series if there are any, only makes new widgets when the pool is empty
+        if self.free_rows:
+            text_label, data_label, value = self.free_rows.pop()
+        else:
+            value = ctk.StringVar()
+            data_label = ctk.CTkLabel(self.summary_frame, corner_radius=0, textvariable=value, font=self.font2, text_color='grey50')
+            text_label = ctk.CTkLabel(self.summary_frame, corner_radius=0, font=self.font2, text_color='yellow2', justify='left', wraplength=150)
+
+        value.set(name)
+        text_label.configure(text=f'{name}: ')
+        text_label.grid(row=self.summary_row_count + 1, column=0, padx=5, pady=2 , sticky='w')     # row 0 is the statistics table
+        data_label.grid(row=self.summary_row_count + 1, column=1, padx=5, pady=2, sticky='w')
+        self.summary_row_count += 1
+
+        self.summary_rows[name] = (text_label, data_label, value)
+        self.current_y_values[name] = value
+
+
+    def release_summary_row(self, name):
+        text_label, data_label, value = self.summary_rows.pop(name)
+        text_label.grid_remove()
+        data_label.grid_remove()
+        self.current_y_values.pop(name, None)
+        self.free_rows.append((text_label, data_label, value))
+
+
+    def refresh_legend(self):
+        # only the legend is rebuilt on a toggle, in the same order as the series so highlight() can match legend texts to lines
+        self.lines = [line for _, _, line in self.series.values()]
+
+        legend = self.ax1.get_legend()
+        if legend:
+            legend.remove()
+        self.blitted_cursor1.clear_highlight()
+
+        if self.series: # only draw legend if there are actualy plots
+            self.ax1.legend(self.lines, list(self.series))
 
 
 
@@ -514,84 +1632,47 @@ class APP(ctk.CTk):
                             highlights[i] = True
 
                     if highlights:  # there is a line that needs to be highlighted, highlight it, and dim the rest
-                        for i, text in enumerate(texts):
-                            if i in highlights:
-                                self.lines[i].set_alpha(1)
-                                self.lines[i].set_linewidth(1.5)
-                                text.set_color('yellow')
-                            else:
-                                self.lines[i].set_alpha(.3)
-                                self.lines[i].set_linewidth(1)
-                                text.set_color('white')
+                        self.blitted_cursor1.set_highlight([self.lines[i] for i in highlights], [texts[i] for i in highlights])
                     else:   # if there are no valid highlights(aka you clicked in the legend, but not on a line text, then return all lines to normal)
-                        for i, text in enumerate(texts):       
-                            self.lines[i].set_alpha(1)
-                            self.lines[i].set_linewidth(1)
-                            text.set_color('white')
-
-                    self.canvas1.draw_idle()
+                        self.blitted_cursor1.set_highlight([], [])
 
     def crosshair_click(self, event):
         # on click, if crosshair enabled - update summary values to the value of each visible graphs at the nearest x cordinate(snaps to nearest real datapoint)
         raw_x_value = event.xdata
+        if raw_x_value is None: # clicked outside of the axes
+            return
 
-        try:
-            self.clicked_hline.remove()
-
-        except (AttributeError, ValueError):
-            pass
-
-        try:
-            self.scat_plt1.remove()
-
-        except (AttributeError, ValueError):
-            pass
+        with self.instruments.operation('crosshair', rows_in=len(self.readout.series)) as timings:
+            with timings.stage('readout'):
+                scat_x_vals, scat_y_vals = self.update_readout(raw_x_value)
+            with timings.stage('blit'):
+                self.blitted_cursor1.set_click(raw_x_value, scat_x_vals, scat_y_vals)
+            timings.rows_out = len(scat_x_vals)
+        self.show_report()
 
-        lines = self.lines
-        selected_xaxis = self.x_axis.get()
 
-        n = 0
+    def update_readout(self, x_value):
+        # sets every summary value to its series' datapoint nearest to x_value (snaps to nearest real datapoint), returns the plotted points for the markers
         scat_x_vals = []
         scat_y_vals = []
 
-        for c in self.filtered_df:
-            if c != selected_xaxis:
-                if c != 'cycle':
-                    if self.parameter_selections[c].get():
-
-                        if self.cycle_selection.get() == 'All':
-                            for name in self.current_y_values:
-                                split_name = name.split('-')
-                                if c == split_name[0]:
-                                    line = lines[n]
-                                    x_data, y_data = line.get_data()
-                                    n += 1
-                                    minvalue_index = np.abs(x_data - raw_x_value).argmin()             #gets the closest x_data point for the clicked x position for each line indiviually
-
-                                    set_values = self.filtered_df.loc[self.filtered_df['cycle'] == int(split_name[1]), [f'{c}', selected_xaxis]]
-                                    single_value = set_values.loc[set_values[selected_xaxis] == x_data[minvalue_index], c]
-                                    self.current_y_values[name].set(round(single_value.iloc[0], 3))
-                                    scat_x_vals.append(x_data[minvalue_index])
-                                    scat_y_vals.append(y_data[minvalue_index])
-
-                        else: # is selected, but "All" cyles isn't
-                            line = lines[n]
-                            x_data, y_data = line.get_data()
-                            n += 1
-                            minvalue_index = np.abs(x_data - raw_x_value).argmin()             #gets the closest x_data point for the clicked x position for each line indiviually
-                            self.current_y_values[c].set(round(self.filtered_df.loc[self.filtered_df[selected_xaxis] == x_data[minvalue_index], f'{c}'].values[0], 3))        # we still get summary frame data directly from the dataframe, so normalization has no effect
-
-                            scat_x_vals.append(x_data[minvalue_index])
-                            scat_y_vals.append(y_data[minvalue_index])
-
-            else: # it is x axis
-                minvalue_index = np.abs(self.filtered_df[selected_xaxis] - raw_x_value).argmin()
-                self.current_y_values[selected_xaxis].set(round(self.filtered_df[selected_xaxis].iloc[minvalue_index], 3))
-
-        self.clicked_hline = self.ax1.axvline(x = raw_x_value, ls='--', color='yellow')
-        self.scat_plt1 = self.ax1.scatter(scat_x_vals, scat_y_vals, c='yellow', marker='x', s=60)
+        for name in self.readout.series:
+            point = self.readout.nearest(name, x_value)
+            if point is None:
+                continue
 
-        self.canvas1.draw_idle()
+            x, y, raw_y = point
+            smoothed = self.readout.nearest_smoothed(name, x)     # raw and smoothed value at the same x
+            if smoothed is None:
+                self.current_y_values[name].set(round(raw_y, 3))
+            else:
+                self.current_y_values[name].set(f'{round(raw_y, 3)} ({round(smoothed[2], 3)})')
+                x, y = smoothed[0], smoothed[1]     # the marker goes on the line as drawn
+            if name in self.series:     # the x axis is in the readout, but isn't a line
+                scat_x_vals.append(x)
+                scat_y_vals.append(y)
+
+        return scat_x_vals, scat_y_vals
 
 
     def key_event(self, event):
@@ -606,38 +1687,18 @@ class APP(ctk.CTk):
                 need_redraw = self.blitted_cursor1.set_cross_hair_visible(False)
 
                 if need_redraw:
-                    self.blitted_cursor1.ax.figure.canvas.restore_region(self.blitted_cursor1.background)
-                    self.blitted_cursor1.ax.figure.canvas.blit(self.blitted_cursor1.ax.bbox)
+                    self.blitted_cursor1.blit()
 
             else:
                 self.crosshair_state.set(1)
 
         #### --------------------------------------------------------------------------
         if event.key == 'n':
-            if self.normalize_state.get():
-                self.normalize_state.set(0)
-            else:
-                self.normalize_state.set(1)
-                self.normalize_data()
-
+            self.normalize_state.set(0 if self.normalize_state.get() else 1)
             self.update_graph()
 
         #### -------------------------------------------------------------------------
 
-    def normalize_data(self):
-        if self.normalize_state.get():
-    
-            offset_df = self.filtered_df.subtract(self.filtered_df.min())
-
-            self.normalized_df = offset_df.apply(lambda x: x.div(x.max()) if x.max() != 0 else x, axis=0)
-
-            for c in self.normalized_df.columns:
-                if c in ['cycle', 'mac', 'channel', self.x_axis.get()]: #resets any values we don't want normalized, which are filtering columns and the selected x axis
-                    self.normalized_df[c] = self.filtered_df[c]
-
-        self.update_graph()
-
-
     def fridgeplexor_import_select(self):
         if self.fridgeplexor_import_state.get():
             self.mixed_import_state.set(0)
@@ -647,14 +1708,104 @@ class APP(ctk.CTk):
             self.fridgeplexor_import_state.set(0)
 
     def export_file(self):
-        export_filename = Path(tk.filedialog.asksaveasfilename(defaultextension='.csv', title='Save output data as: ', filetypes = [('CSV files', '*csv')]))
-        if export_filename.exists():
-            export_filename.unlink()
+        if self.session is not None:
+            self.progress_text.set('a session can not be exported')
+            return
+        export_filename = tk.filedialog.asksaveasfilename(defaultextension='.csv', title='Save output data as: ', filetypes = [('CSV files', '*csv')])
+        self.fold_tail()
+        if export_filename and self.filtered_df is not None:
+            export_csv(self.filtered_df, export_filename)
 
-        if self.filtered_df is not None:
-            self.filtered_df.to_csv(export_filename, header=True)
+
+    def export_format_select(self, value):
+        # csv and parquet don't have the same compressions
+        values = ['none' if c is None else c for c in COMPRESSIONS[value]]
+        self.export_compression_menu.configure(values=values)
+        if self.export_compression.get() not in values:
+            self.export_compression.set('none')
+
+
+    def export_all_groups(self):
+        # every Yeti/Load/Cycle group to its own file in a folder, written on the import worker while poll_export shows the progress
+        if self.import_future is not None or self.export_future is not None or self.full_df is None:
+            return
+        if self.session is not None:
+            self.progress_text.set('a session can not be exported')
+            return
+        out_dir = tk.filedialog.askdirectory(title='Export every group to: ')
+        if not out_dir:
+            return
+
+        self.fold_tail()
+        columns = None
+        if self.export_selected_state.get():
+            columns = [self.x_axis.get()] + [c for c, selected in self.parameter_selections.items() if selected.get()]
+        compression = self.export_compression.get()
+        options = {'format': self.export_format.get(), 'compression': None if compression == 'none' else compression, 'columns': columns,
+                   'sort_by': self.x_axis.get() or None, 'workers': EXPORT_WORKERS, 'derived': self.derived}     # computed per group as it is written
+
+        self.import_cancel = threading.Event()
+        self.import_progress = queue.Queue()
+        self.export_future = self.import_executor.submit(self.export_in_background, self.full_df, self.group_index, out_dir, options)
+        self.import_button.configure(state='disabled', fg_color='grey50')
+        self.export_groups_button.configure(state='disabled', fg_color='grey50')
+        self.cancel_button.configure(state='normal', fg_color='yellow2')
+        self.after(100, self.poll_export)
+
+
+    def export_in_background(self, full_df, group_index, out_dir, options):
+        # runs on the import worker thread, full_df is the one from when the export started, rows folded in meanwhile aren't exported
+        with self.instruments.operation(f'export {options["format"]}', rows_in=len(full_df)) as timings:
+            def progress(fraction, text):
+                self.import_progress.put((fraction, text))
+
+            written = export_groups(full_df, group_index, out_dir, progress=progress, cancel=self.import_cancel, **options)
+            timings.rows_out = sum(rows for path, rows in written)
+        return written
+
+
+    def poll_export(self):
+        while True:
+            try:
+                fraction, text = self.import_progress.get_nowait()
+            except queue.Empty:
+                break
+            self.progress_bar.set(fraction)
+            self.progress_text.set(text)
+
+        if not self.export_future.done():
+            self.after(100, self.poll_export)
+            return
+
+        future = self.export_future
+        self.export_future = None
+        self.import_button.configure(state='normal', fg_color='yellow2')
+        self.export_groups_button.configure(state='normal', fg_color='yellow2')
+        self.cancel_button.configure(state='disabled', fg_color='grey50')
+
+        try:
+            written = future.result()
+        except ImportCancelled:
+            self.progress_bar.set(0)
+            self.progress_text.set('Export cancelled')
+            self.show_report()
+            return
+        except (OSError, ImportError, ValueError) as err:   # unwritable folder, no pyarrow for parquet
+            self.progress_bar.set(0)
+            self.progress_text.set('Export failed')
+            self.show_report()
+            print(err)
+            return
+
+        self.progress_text.set(f'Exported {len(written)} groups')
+        self.show_report()
 
 
 if __name__ == '__main__':
-    app = APP()
+    multiprocessing.freeze_support()    # the session import's worker processes start this exe again in the packaged app
+    parser = argparse.ArgumentParser(description='Plot, filter and export test logs.')
+    parser.add_argument('--startup-time', action='store_true', help='print the startup timings as json and quit once the graph is up')
+    args = parser.parse_args()
+
+    app = APP(quit_after_startup=args.startup_time)
     app.mainloop()
\ No newline at end of file
@@ -1,5 +1,8 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# onedir build: dist/postprocessing_app/ holds the exe next to its libraries, so a launch just loads them instead of unpacking the whole
+# onefile archive to a temp directory first (seconds on every start). ship the folder, start postprocessing_app.exe inside it.
+# upx is off, compressed dlls have to be decompressed again on every load
 
 block_cipher = None
 
@@ -24,17 +27,13 @@ pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='postprocessing_app',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -43,3 +42,13 @@ exe = EXE(
     entitlements_file=None,
     icon=['PostProcessing_icon.ico'],
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='postprocessing_app',
+)
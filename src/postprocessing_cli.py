@@ -0,0 +1,176 @@
+import argparse
+import glob
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from derived import DerivedChannels
+from export import COMPRESSIONS, EXPORT_FORMATS, _safe, export_groups
+from processing import ALIGN_METHODS, IMPORT_ERRORS, NORMALIZE_MODES, build_group_index, export_csv, filter_data, load_dataset, normalize
+from streaming import STREAM_MODES, stream_dataset
+
+# headless batch processing, same import modes, filters, normalization and export as the app, no display needed.
+#
+#   python postprocessing_cli.py "logs/*.csv" -o out
+#   python postprocessing_cli.py --mode fridgeplexor "run*/Mdata*.csv" --pair "run*/Ydata*.csv" --yeti AA --load usb --cycle All --x-axis Epoch_Time -o out
+#   python postprocessing_cli.py --mode mixed "serial/*.csv" --pair "mappl/*.csv" --normalize z-score --x-axis Epoch_Time -o out
+#   python postprocessing_cli.py --mode mixed "serial/*.csv" --pair "mappl/*.csv" --pair "dmm/*.csv" --align nearest --tolerance .5 -o out
+#   python postprocessing_cli.py --stream --mode fridgeplexor huge/Mdata.csv --pair huge/Ydata.csv --yeti AA --load usb --cycle All --x-axis Epoch_Time -o out
+#   python postprocessing_cli.py --mode fridgeplexor "fixture/Mdata*.csv" "fixture/Ydata*.csv" --combine --x-axis Epoch_Time -o out
+#   python postprocessing_cli.py --mode fridgeplexor "run*/Mdata*.csv" --pair "run*/Ydata*.csv" --derived derived_channels.json --x-axis Epoch_Time -o out
+#   python postprocessing_cli.py --mode fridgeplexor "run*/Mdata*.csv" --pair "run*/Ydata*.csv" --all-groups --format parquet --compression zstd --x-axis Epoch_Time -o out
+
+
+def expand(patterns):
+    filenames = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            print(f'no files match {pattern}', file=sys.stderr)
+        filenames += matches
+    return filenames
+
+
+def build_jobs(args):
+    # one job per output file, paired modes match the n-th input with the n-th file of every --pair (all sorted).
+    # --combine makes every input and pair file one job, the files of a fixture logged by several Yetis
+    inputs = expand(args.inputs)
+    if args.combine:
+        return [inputs + [filename for patterns in args.pair or [] for filename in expand(patterns)]]
+    if args.mode == 'single':
+        return [[filename] for filename in inputs]
+
+    if not args.pair:
+        raise SystemExit(f'{args.mode} import needs --pair')
+
+    groups = [expand(patterns) for patterns in args.pair]
+    for pairs in groups:
+        if len(inputs) != len(pairs):
+            raise SystemExit(f'{args.mode} import needs one --pair file per input, got {len(inputs)} inputs and {len(pairs)} pairs')
+
+    return [list(files) for files in zip(inputs, *groups)]
+
+
+def output_name(filenames, args):
+    name = Path(filenames[0]).stem
+    if args.yeti and args.load and args.cycle:
+        name += f'_{_safe(args.yeti)}_{_safe(args.load)}_{_safe(args.cycle)}'     # the mac address has ':' in it
+    return Path(args.output_dir) / f'{name}.csv'
+
+
+def process_job(filenames, args):
+    # runs in a worker process, import -> filter -> normalize -> export for one set of input files
+    if args.stream:     # the spilled store only lives as long as the job
+        with tempfile.TemporaryDirectory(dir=args.spill_dir) as spill_dir:
+            full_df, filters = stream_dataset(args.mode, filenames, Path(spill_dir) / 'store', downcast=not args.float64)
+            try:
+                return export_job(full_df, filters, filenames, args)
+            finally:
+                full_df.close()
+
+    full_df, filters = load_dataset(args.mode, filenames, downcast=not args.float64, align=args.align, tolerance=args.tolerance, resample=args.resample)
+    return export_job(full_df, filters, filenames, args)
+
+
+def export_job(full_df, filters, filenames, args):
+    # returns [(path, rows)] of the files written
+    unmatched = getattr(full_df, 'attrs', {}).get('unmatched')
+    if unmatched and any(unmatched.values()):
+        print(f'{filenames[0]}: {unmatched["Mdata"]} Mdata and {unmatched["Ydata"]} Ydata rows had no matching packet', file=sys.stderr)
+    derived = DerivedChannels()
+    if args.derived:    # the definitions the app saved, every channel the run has the columns for is exported with it
+        derived.load(args.derived)
+    if derived and isinstance(full_df, pd.DataFrame):
+        full_df = derived.add_to(full_df)
+    group_index = build_group_index(full_df) if filters is not None else None
+    if args.all_groups:     # a csv per group named after the input, or a parquet dataset per input
+        stem = Path(filenames[0]).stem
+        if args.format == 'parquet':
+            out_dir, prefix = Path(args.output_dir) / stem, ''
+        else:
+            out_dir, prefix = Path(args.output_dir), f'{stem}_'
+        return export_groups(full_df, group_index, out_dir, format=args.format, compression=args.compression, sort_by=args.x_axis, prefix=prefix,
+                             derived=derived)     # a streamed full_df gets its channels per group here
+
+    x_axis = args.x_axis
+    if x_axis is None and args.yeti and args.load and args.cycle:
+        raise ValueError('--x-axis is required to filter, the filtered data is sorted on it')
+
+    df = filter_data(full_df, group_index, args.yeti, args.load, args.cycle, x_axis)
+    if derived and not isinstance(full_df, pd.DataFrame):     # streamed, only the filtered rows are in memory
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError('--derived needs a --yeti/--load/--cycle selection when streaming')
+        df = derived.add_to(df)
+    if args.normalize:
+        df = normalize(df, x_axis, args.normalize)
+
+    # no index column, a streamed and an in memory import of the same log number their rows differently. same as the --all-groups files
+    export_filename = output_name(filenames, args)
+    export_csv(df, export_filename, index=False)
+    return [(export_filename, len(df))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import, merge, filter and export test logs without the GUI.')
+    parser.add_argument('inputs', nargs='+', help='csv files or glob patterns (Mdata files for fridgeplexor, Dataset_1 files for mixed)')
+    parser.add_argument('--mode', choices=['single', 'fridgeplexor', 'mixed'], default='single', help='import mode, same as the checkboxes in the app')
+    parser.add_argument('--pair', nargs='+', action='append', help='second file of each paired import, Ydata for fridgeplexor, Dataset_2 for mixed. repeat it for more mixed datasets')
+    parser.add_argument('--align', choices=ALIGN_METHODS, default='outer', help='how mixed datasets are lined up on Epoch_Time')
+    parser.add_argument('--tolerance', type=float, help='max distance in seconds for nearest/backward alignment')
+    parser.add_argument('--resample', type=float, help='align every mixed dataset onto a regular Epoch_Time grid of this step in seconds')
+    parser.add_argument('--yeti', help='mac to filter on')
+    parser.add_argument('--load', help='channel to filter on')
+    parser.add_argument('--cycle', help="cycle to filter on, or 'All'")
+    parser.add_argument('--x-axis', help='column the filtered data is sorted on, and left out of normalization')
+    parser.add_argument('--normalize', nargs='?', const='min-max', choices=NORMALIZE_MODES, help='normalize the exported columns, min-max unless another mode is given')
+    parser.add_argument('--float64', action='store_true', help='keep every measurement in float64. by default a column is downcast to float32 only if all of its values keep their precision')
+    parser.add_argument('--stream', action='store_true', help='import in chunks spilled to disk, for logs larger than memory (single and fridgeplexor only)')
+    parser.add_argument('--spill-dir', help='directory the --stream column files are written to, defaults to the system temp directory')
+    parser.add_argument('--combine', action='store_true', help='import every input and --pair file as one dataset instead of one per input (fridgeplexor fixtures logged by several yetis)')
+    parser.add_argument('--derived', help="json file of derived channels ({name: expression}, as saved by the app's Derived Channels window)")
+    parser.add_argument('--all-groups', action='store_true', help='export every yeti/load/cycle group to its own file instead of one filter selection')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help='--all-groups output, a csv per group or a partitioned parquet dataset (needs pyarrow)')
+    parser.add_argument('--compression', help='--all-groups compression, gzip/bz2/xz for csv, snappy/gzip/zstd for parquet')
+    parser.add_argument('-o', '--output-dir', default='.', help='directory the csv files are written to')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes, defaults to the cpu count')
+    args = parser.parse_args(argv)
+    if args.stream and args.mode not in STREAM_MODES:
+        parser.error(f'{args.mode} import can not be streamed')
+    if args.combine and args.mode == 'single':
+        parser.error('--combine needs the fridgeplexor or mixed mode')
+    if args.all_groups and (args.yeti or args.load or args.cycle or args.normalize):
+        parser.error('--all-groups exports every group as imported, it can not be filtered or normalized')
+    if args.compression not in COMPRESSIONS[args.format]:
+        parser.error(f'{args.format} can not be compressed with {args.compression}')
+    if args.derived:    # checked once here instead of failing every job
+        try:
+            DerivedChannels().load(args.derived)
+        except (OSError, ValueError) as err:
+            parser.error(f'--derived: {err}')
+
+    jobs = build_jobs(args)
+    if not jobs:
+        print('nothing to do', file=sys.stderr)
+        return 1
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(process_job, filenames, args): filenames for filenames in jobs}
+        for future in as_completed(futures):
+            try:
+                for export_filename, rows in future.result():
+                    print(f'{export_filename}: {rows} rows')
+            except IMPORT_ERRORS as err:    # one bad log shouldn't stop the rest of the batch, anything else is a bug and stops it
+                failed += 1
+                print(f'{", ".join(futures[future])}: {err!r}', file=sys.stderr)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
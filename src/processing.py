@@ -0,0 +1,663 @@
+import ast
+import csv
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# data processing shared by every import path, kept free of any tk/ctk code
+
+TIME_KEYS = ('Time', 'Epoch_Time')
+FILTER_COLUMNS = ['mac', 'channel', 'cycle']
+
+SNIFF_ROWS = 1000
+CATEGORY_COLUMNS = ('mac', 'channel')
+FULL_PRECISION_COLUMNS = TIME_KEYS + ('M_ID', 'packet_num', 'cycle')     # time and merge/filter keys are never downcast
+PACKET_KEYS = ['M_ID', 'packet_num']    # the Fridgeplexor join keys
+READ_WORKERS = 4        # files of a multi file import parsed at once
+
+
+def pivot_meters(df, meters=None):
+    # reshapes a long M_ID log (one row per meter per sample) into one wide row per sample, with every column renamed to '<col> <meter>'.
+    # a single unstack over M_ID replaces the old boolean mask + merge per meter, so the wide frame is built once instead of being copied for every meter.
+    # meters fixes the meter set and order (used by the streaming import so every chunk comes out with the same columns)
+    keys = [k for k in TIME_KEYS if k in df.columns]
+    value_columns = [c for c in df.columns if c not in keys and c not in ('M_ID', 'Unnamed: 0')]
+
+    # rows without a meter id can't be placed, and a meter logging the same timestamp twice can't be unstacked (keep its first sample)
+    keep = df['M_ID'].notna() & ~df.duplicated(subset=keys + ['M_ID'], keep='first')
+    if meters is not None:
+        keep &= df['M_ID'].isin(meters)
+    long_df = df.loc[keep, keys + ['M_ID'] + value_columns].set_index(keys + ['M_ID'])
+
+    if meters is None:
+        meters = long_df.index.get_level_values('M_ID').unique()    # order of first appearance, same as the old per-meter loop
+    wide = long_df.unstack('M_ID')
+
+    # only keep samples every meter reported (the old merge chain was an inner join on the time columns), in the order they were logged
+    samples = long_df.index.droplevel('M_ID').unique()
+    present = pd.Series(True, index=long_df.index).unstack('M_ID', fill_value=False).reindex(columns=meters, fill_value=False).all(axis=1).reindex(samples)
+    wide = wide.reindex(samples[present.to_numpy()])
+
+    wide = wide.swaplevel(axis=1).reindex(columns=pd.MultiIndex.from_product([meters, value_columns]))
+    wide.columns = [f'{col} {str(meter)}' for meter, col in wide.columns]
+
+    # same column order the merge chain produced: first meter, time columns, then the remaining meters
+    wide = wide.reset_index()
+    columns = list(wide.columns[len(keys):])
+    return wide[columns[:len(value_columns)] + keys + columns[len(value_columns):]]
+
+
+ALIGN_METHODS = ('outer', 'nearest', 'backward')
+NORMALIZE_MODES = ('min-max', 'z-score', 'per-cycle')
+SMOOTH_MODES = ('rolling mean', 'rolling median', 'ema', 'resample')
+
+
+def align_datasets(dataframes, key='Epoch_Time', method='outer', tolerance=None, resample=None):
+    # lines up any number of datasets on a shared time column.
+    #   'outer'    exact key matches, a row for every timestamp of every file (the original mixed import, mostly NaN for mixed rates)
+    #   'nearest'  / 'backward'  asof joins onto the first dataset's timestamps, taking the nearest (or last earlier) sample of every other
+    #              dataset within tolerance seconds, so the row count stays that of the first file
+    # resample (seconds) joins every dataset onto a regular grid of that step instead of onto the first dataset.
+    # columns that exist in more than one file get a _File_<n> suffix, same as the old two file merge
+    seen = {}
+    for df in dataframes:
+        for c in df.columns:
+            seen[c] = seen.get(c, 0) + 1
+    dataframes = [df.rename(columns={c: f'{c}_File_{i + 1}' for c in df.columns if c != key and seen[c] > 1}) for i, df in enumerate(dataframes)]
+
+    if method == 'outer' and resample is None:
+        return _outer_merge(dataframes, key)
+
+    if method == 'outer':       # a grid can't be joined exactly, snap to it
+        method = 'nearest'
+    if tolerance is not None:
+        tolerance = float(tolerance)
+
+    # merge_asof needs both sides sorted on a key of the same dtype, without missing keys
+    dataframes = [_sorted_on(df.dropna(subset=[key]).astype({key: 'float64'}), key) for df in dataframes]
+
+    if resample is not None:
+        start = min(df[key].iloc[0] for df in dataframes if len(df))
+        stop = max(df[key].iloc[-1] for df in dataframes if len(df))
+        aligned = pd.DataFrame({key: np.arange(start, stop + resample / 2, resample)})
+        if tolerance is None:
+            tolerance = resample / 2 if method == 'nearest' else float(resample)
+        others = dataframes
+    else:
+        aligned = dataframes[0]
+        others = dataframes[1:]
+
+    for df in others:
+        aligned = pd.merge_asof(aligned, df, on=key, direction=method, tolerance=tolerance)
+
+    return aligned
+
+
+def _outer_merge(dataframes, key):
+    full_df = dataframes[0]
+    for df in dataframes[1:]:
+        full_df = full_df.merge(df, on=key, how='outer')
+    return full_df
+
+
+def _sorted_on(df, key):
+    if df[key].is_monotonic_increasing:
+        return df
+    return df.sort_values(key, kind='stable')
+
+
+def float32_safe(values):
+    # True if float32 still resolves the smallest step between the sampled values with a 10x margin.
+    # a relative check isn't enough, Epoch_Time in float32 would be off by minutes while its relative error looks tiny
+    values = np.unique(values[np.isfinite(values)])
+    if len(values) < 2:
+        return True
+
+    resolution = np.diff(values).min()
+    return np.spacing(np.float32(np.abs(values).max())) * 10 <= resolution
+
+
+def infer_schema(filename, skiprows=0, downcast=True):
+    # sniffs the header and first rows, returns usecols and dtypes for read_csv so columns that would be dropped after import are never parsed,
+    # mac/channel come in as categoricals. measurements marked float32 are only candidates, the sample can't tell whether the rest of the
+    # log keeps its precision: read_compact and streaming._coerce check every value before they downcast
+    head = pd.read_csv(filename, nrows=SNIFF_ROWS, skiprows=skiprows, index_col=False)
+    usecols = []
+    dtype = {}
+
+    for c in head.columns:
+        if c == 'Unnamed: 0':   # saved dataframe index, dropped in every import mode
+            continue
+        if c in CATEGORY_COLUMNS:
+            dtype[c] = 'category'
+        elif head[c].dtype == 'object':
+            if not (c == 'Time' and 'M_ID' in head.columns):    # text columns are dropped after import, except Time which the meter reshape needs
+                continue
+        elif downcast and head[c].dtype.kind == 'f' and c not in FULL_PRECISION_COLUMNS and float32_safe(head[c].to_numpy()):
+            dtype[c] = 'float32'
+        usecols.append(c)
+
+    return usecols, dtype
+
+
+def downcast_floats(df, columns):
+    # float32 for the columns whose values all keep their precision in it (see float32_safe), the others stay float64
+    for c in columns:
+        if c in df.columns and df[c].dtype.kind == 'f' and float32_safe(df[c].to_numpy(dtype='float64')):
+            df[c] = df[c].astype('float32')
+    return df
+
+
+def read_compact(filename, skiprows=0, downcast=True):
+    usecols, dtype = infer_schema(filename, skiprows, downcast)
+    candidates = [c for c in dtype if dtype[c] == 'float32']
+    try:
+        df = pd.read_csv(filename, skiprows=skiprows, index_col=False, usecols=usecols, dtype={c: t for c, t in dtype.items() if t != 'float32'})
+    except (ValueError, TypeError):     # text further down in a column the sample called numeric, parse it the old way and let the drop handle it
+        return pd.read_csv(filename, skiprows=skiprows, index_col=False)
+
+    if downcast:
+        downcast_floats(df, candidates)
+        for c in df.select_dtypes('integer').columns:
+            if c not in FULL_PRECISION_COLUMNS:
+                df[c] = pd.to_numeric(df[c], downcast='integer')
+
+    return df
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+# what a bad log can raise on import: a missing or unreadable file, text where numbers were expected, a missing column. anything else is a
+# bug and is not caught
+IMPORT_ERRORS = (OSError, ValueError, KeyError, pd.errors.ParserError)
+
+
+def _check_cancel(cancel):
+    if cancel is not None and cancel.is_set():
+        raise ImportCancelled('import cancelled')
+
+
+def read_associations(filename):
+    # first row of a Ydata file is a string which contains the information about the connections of the system, which meters were connected to which yeti's.
+    # None if the file doesn't start with one (an Mdata file), only that first line is read
+    with open(filename, 'r', newline='') as file:
+        first_row = next(csv.reader([file.readline()]), [''])
+    try:
+        associations = ast.literal_eval(first_row[0]) if first_row else None
+    except (ValueError, SyntaxError):
+        return None
+    if not isinstance(associations, dict):
+        return None
+
+    return {key: associations[key][1] for key in associations}     # mac -> M_ID
+
+
+def split_fridgeplexor(filenames):
+    # the Mdata and Ydata files of a Fridgeplexor import, in any order and any number of each, told apart by the association header only
+    # Ydata files have. the headers are read in parallel, returns ([Mdata files], [(Ydata file, associations)])
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        headers = list(executor.map(read_associations, filenames))
+
+    mdata = [filename for filename, associations in zip(filenames, headers) if associations is None]
+    ydata = [(filename, associations) for filename, associations in zip(filenames, headers) if associations is not None]
+    if not mdata or not ydata:
+        raise ValueError(f'a fridgeplexor import needs Mdata and Ydata files, got {len(mdata)} Mdata and {len(ydata)} Ydata')
+    return mdata, ydata
+
+
+def meter_ids(macs, associations):
+    # M_ID of every Ydata row, looked up once per distinct mac (the categories) instead of once per row. -1 for a mac the header doesn't have
+    macs = macs.astype('category')
+    lookup = np.array([int(associations.get(mac, -1)) for mac in macs.cat.categories] + [-1], dtype='int64')
+    return lookup[macs.cat.codes.to_numpy()]    # code -1 (a missing mac) picks the -1 at the end
+
+
+def concat_frames(frames):
+    # concat that keeps mac/channel categorical, pd.concat turns categoricals with different categories into strings
+    if len(frames) == 1:
+        return frames[0]
+    for c in CATEGORY_COLUMNS:
+        if all(c in frame.columns for frame in frames):
+            categories = pd.api.types.union_categoricals([frame[c].astype('category') for frame in frames]).categories
+            frames = [frame.assign(**{c: frame[c].astype(pd.CategoricalDtype(categories))}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def packet_keys(df):
+    # (M_ID, packet_num) packed into one int64, packet major so rows logged in packet order are already sorted. -1 where either is missing
+    ids = pd.to_numeric(df['M_ID']).to_numpy(dtype='float64', na_value=np.nan)
+    packets = pd.to_numeric(df['packet_num']).to_numpy(dtype='float64', na_value=np.nan)
+    valid = (ids >= 0) & (ids < 2**16) & (packets >= 0) & (packets < 2**46)
+    keys = np.full(len(df), -1, dtype='int64')
+    keys[valid] = packets[valid].astype('int64') * 2**16 + ids[valid].astype('int64')
+    return keys
+
+
+def _sorted_keys(keys):
+    # positions of the valid keys in key order, skips the sort when the log already is in that order
+    positions = np.flatnonzero(keys >= 0)
+    valid = keys[positions]
+    if len(valid) > 1 and (valid[1:] < valid[:-1]).any():
+        order = np.argsort(valid, kind='stable')    # timsort, close to linear on the nearly sorted logs
+        positions, valid = positions[order], valid[order]
+    return positions, valid
+
+
+def join_packets(mdata, ydata):
+    # inner join of Mdata and Ydata on (M_ID, packet_num), like merge(on=PACKET_KEYS, how='inner') with its _x/_y suffixes, rows in packet order.
+    # both sides are put in key order (usually already are) and joined by a single merge pass over the two sorted keys, every other column
+    # is gathered once into the result. returns (joined, unmatched), unmatched counts the rows of each side that found no partner
+    keys = [packet_keys(mdata), packet_keys(ydata)]
+    (m_positions, m_keys), (y_positions, y_keys) = [_sorted_keys(k) for k in keys]
+
+    index = pd.Index(m_keys)    # monotonic on both sides, pandas joins them with a linear merge instead of a hash table
+    _, m_take, y_take = index.join(pd.Index(y_keys), how='inner', return_indexers=True)
+    m_take = np.arange(len(m_keys)) if m_take is None else m_take
+    y_take = np.arange(len(y_keys)) if y_take is None else y_take
+    m_rows, y_rows = m_positions[m_take], y_positions[y_take]
+
+    unmatched = {}
+    for name, rows, length in (('Mdata', m_rows, len(mdata)), ('Ydata', y_rows, len(ydata))):
+        matched = np.zeros(length, dtype=bool)
+        matched[rows] = True
+        unmatched[name] = int(length - matched.sum())
+
+    shared = set(mdata.columns) & set(ydata.columns)
+    left = mdata.take(m_rows).reset_index(drop=True)
+    left.columns = [f'{c}_x' if c in shared and c not in PACKET_KEYS else c for c in left.columns]
+    right = ydata.drop(columns=[c for c in PACKET_KEYS if c in ydata.columns]).take(y_rows).reset_index(drop=True)
+    right.columns = [f'{c}_y' if c in shared else c for c in right.columns]
+    return pd.concat([left, right], axis=1), unmatched
+
+
+def filter_values(df):
+    # values offered in the Yeti/Load/Cycle dropdowns, None if the dataset has no filter columns
+    try:
+        yeti_list = [str(y) for y in df['mac'].unique()]
+        output_list = [str(o) for o in df['channel'].unique()]
+        cycle_list = [str(c) for c in df['cycle'].unique()] + ['All']
+    except (KeyError, ValueError):
+        return None
+
+    return yeti_list, output_list, cycle_list
+
+
+def _read_ydata(filename, associations, downcast):
+    Ydata_df = read_compact(filename, skiprows=1, downcast=downcast)
+    Ydata_df['M_ID'] = meter_ids(Ydata_df['mac'], associations)    # add M_ID to the yeti dataframe based on associations, so that it can be merged on later.
+    return Ydata_df
+
+
+def _load_fridgeplexor(filenames, report, cancel, options):
+    # import every Mdata and Ydata file (a fixture with several Yetis can log to several files) and then join them into full_df
+    report(.05, 'Reading headers')
+    mdata_files, ydata_files = split_fridgeplexor(filenames)
+    _check_cancel(cancel)
+
+    report(.1, f'Reading {len(mdata_files)} Mdata, {len(ydata_files)} Ydata')
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        mdata = [executor.submit(read_compact, filename, downcast=options['downcast']) for filename in mdata_files]
+        ydata = [executor.submit(_read_ydata, filename, associations, options['downcast']) for filename, associations in ydata_files]
+        Mdata_df = concat_frames([future.result() for future in mdata])
+        Ydata_df = concat_frames([future.result() for future in ydata])
+    _check_cancel(cancel)
+
+    report(.65, 'Merging')
+    full_df, unmatched = join_packets(Mdata_df, Ydata_df)
+    full_df.attrs['unmatched'] = unmatched      # rows without a partner aren't in full_df, the app and cli report how many
+    if any(unmatched.values()):
+        report(.8, f'Unmatched: {unmatched["Mdata"]} Mdata, {unmatched["Ydata"]} Ydata rows')
+
+    drop_columns = [c for c in full_df.columns if (full_df.dtypes[c] == 'object') and (c not in ['mac', 'channel', 'cycle'])] + ['Unnamed: 0_x', 'Unnamed: 0_y', 'Unnamed: 0', 'packet_num']
+    return full_df, drop_columns
+
+
+def _load_mixed(filenames, report, cancel, options):
+    # merge dataframes from diffrent scripts, two mappls scripts, mappl + serial, serial + serial, etc. May have mixed frequencies, so they are aligned on E_Time
+    dataframes = []
+    step = .6 / len(filenames)
+    for i, filename in enumerate(filenames):
+        report(.05 + step * i, f'Reading Dataset_{i + 1}')
+        new_df = read_compact(filename, downcast=options['downcast'])
+        _check_cancel(cancel)
+
+        if 'M_ID' in new_df.columns:
+            report(.05 + step * (i + .5), f'Reshaping meters of Dataset_{i + 1}')
+            new_df = pivot_meters(new_df)
+            _check_cancel(cancel)
+
+        #combine the dataframes after deleting redundant time columns, and some more weird columns before merging
+        new_df = new_df.drop(columns=[c for c in ('Time', 'Unnamed: 0') if c in new_df.columns])
+        dataframes.append(new_df)
+
+    report(.65, 'Aligning')
+    full_df = align_datasets(dataframes, method=options['align'], tolerance=options['tolerance'], resample=options['resample'])
+
+    drop_columns = [c for c in full_df.columns if (full_df.dtypes[c] == 'object')]
+    return full_df, drop_columns
+
+
+def _load_single(filenames, report, cancel, options):
+    # no merge, you already have a good df, either from serial logger, previous merge, etc.
+    report(.05, 'Reading file')
+    full_df = read_compact(filenames[0], downcast=options['downcast'])
+    _check_cancel(cancel)
+
+    if 'M_ID' in full_df.columns:
+        report(.5, 'Reshaping meters')
+        full_df = pivot_meters(full_df)
+
+    drop_columns = [c for c in full_df.columns if (full_df.dtypes[c] == 'object')] #if the colum has mixed datatypes, we drop it, gets ride of weird columns in serial logger data
+    if 'Unnamed: 0' in full_df.columns:
+        drop_columns.append('Unnamed: 0')
+
+    return full_df, drop_columns
+
+
+IMPORT_MODES = {
+    'fridgeplexor': _load_fridgeplexor,
+    'mixed': _load_mixed,
+    'single': _load_single,
+}
+
+
+def load_dataset(mode, filenames, progress=None, cancel=None, cache=None, downcast=True, align='outer', tolerance=None, resample=None):
+    # runs the whole parse/merge pipeline of one import mode without touching any widgets, so it can run on a worker thread.
+    # progress(fraction, text) is called between stages, cancel is a threading.Event checked between stages (a running read_csv can't be interrupted).
+    # cache is an optional DatasetCache, a hit skips the pipeline and a miss stores the finished dataset for next time.
+    # downcast=False keeps every measurement in float64, align/tolerance/resample configure how a mixed import lines its files up (see align_datasets)
+    report = progress or (lambda fraction, text: None)
+    options = {'downcast': downcast, 'align': align, 'tolerance': tolerance, 'resample': resample}
+    cache_mode = f'{mode}|{json.dumps(options, sort_keys=True)}'
+
+    if cache is not None:
+        report(.05, 'Checking import cache')
+        cached = cache.load(cache_mode, filenames)
+        if cached is not None:
+            report(1, 'Loaded from cache')
+            return cached
+
+    full_df, drop_columns = IMPORT_MODES[mode](filenames, report, cancel, options)
+    _check_cancel(cancel)
+
+    report(.85, 'Dropping unused columns')
+    filters = filter_values(full_df)
+    full_df = full_df.drop(columns=[c for c in drop_columns if c in full_df.columns])
+    for c in ('mac', 'channel'):    # identifiers repeat on every row, categoricals store each string once
+        if c in full_df.columns:
+            full_df[c] = full_df[c].astype('category')
+
+    if cache is not None:
+        report(.9, 'Writing import cache')
+        cache.store(cache_mode, filenames, full_df, filters)
+
+    report(1, 'Done')
+    return full_df, filters
+
+
+class GroupIndex:
+    # row positions of every (mac, channel, cycle) group, built once per import so a filter selection is a slice of full_df instead of a query over all of it.
+    # selections are keyed the same way as the dropdowns (str of each value), and the sorted views of the last few selections are kept so going back to one is instant
+
+    def __init__(self, df, max_views=16):
+        self.df = df
+        self.max_views = max_views
+        self.views = OrderedDict()
+
+        keys = df[FILTER_COLUMNS]      # only the filter columns are read, df can also be a streaming.ColumnStore
+        groups = keys.groupby(FILTER_COLUMNS, sort=False, observed=True).indices
+        self.groups = {tuple(str(v) for v in key): positions for key, positions in groups.items()}
+
+        pairs = keys.groupby(FILTER_COLUMNS[:2], sort=False, observed=True).indices     # for 'All' cycles
+        self.pairs = {tuple(str(v) for v in key): positions for key, positions in pairs.items()}
+
+
+    def positions(self, mac, channel, cycle):
+        # unsorted row positions of a selection, empty if the dataset doesn't have it
+        if cycle == 'All':
+            return self.pairs.get((mac, channel), np.array([], dtype=np.intp))
+        return self.groups.get((mac, channel, cycle), np.array([], dtype=np.intp))
+
+
+    def select(self, mac, channel, cycle, sort_by):
+        key = (mac, channel, cycle, sort_by)
+        if key in self.views:
+            self.views.move_to_end(key)
+            return self.views[key]
+
+        drop = ['mac', 'channel'] if cycle == 'All' else FILTER_COLUMNS
+        view = self.df.take(self.positions(mac, channel, cycle)).drop(columns=drop).sort_values(sort_by, kind='stable')
+
+        self.views[key] = view
+        if len(self.views) > self.max_views:
+            self.views.popitem(last=False)
+
+        return view
+
+
+def build_group_index(df):
+    if all(c in df.columns for c in FILTER_COLUMNS):
+        return GroupIndex(df)
+    return None
+
+
+def filter_data(full_df, group_index, yeti, output, cycle, x_axis):
+    # filters master dataframe based on the yeti/load/cycle selections, sorted on the x axis. Note 'All' must be selected if you do not want to be filter by cycle
+    if yeti and output and cycle and group_index is not None:
+        return group_index.select(yeti, output, cycle, x_axis)      # slice of the group built at import
+    return full_df
+
+
+class CycleSplit:
+    # the rows of a filtered dataset ordered by cycle then x, with the row where every cycle starts. built once per filter selection, after that
+    # the per cycle series of any column are slices of one gathered array, instead of a boolean mask over the whole dataset for every cycle
+
+    def __init__(self, df, x_axis):
+        self.df = df
+        self.x_axis = x_axis
+
+        cycles = df['cycle'].to_numpy()
+        x = df[x_axis].to_numpy()
+        rows = np.flatnonzero(pd.notna(cycles))     # a row without a cycle can't be put on any cycle's line
+        self.order = rows[np.lexsort((x[rows], cycles[rows]))]
+
+        sorted_cycles = cycles[self.order]
+        starts = np.flatnonzero(np.r_[True, sorted_cycles[1:] != sorted_cycles[:-1]]) if len(sorted_cycles) else np.array([], dtype=np.intp)
+        self.cycles = sorted_cycles[starts]
+        self.bounds = np.append(starts, len(self.order))
+        self.x = x[self.order]
+        self.columns = {}   # column -> (rows kept, x, values, bounds)
+
+
+    def column(self, column, plotted=None):
+        # (x, y, raw y, bounds) of column with its NaN rows left out, cycle i is [bounds[i]:bounds[i + 1]] of each array.
+        # plotted are replacement y values in the row order of df (normalized ones), raw y is always the column itself
+        if column not in self.columns:
+            raw = self.df[column].to_numpy()[self.order]
+            valid = pd.notna(raw)
+            kept = np.concatenate([[0], np.cumsum(valid)])
+            self.columns[column] = (valid, self.x[valid], raw[valid], kept[self.bounds])
+
+        valid, x, raw, bounds = self.columns[column]
+        y = raw if plotted is None else np.asarray(plotted)[self.order][valid]
+        return x, y, raw, bounds
+
+
+class Normalizer:
+    # normalized copies of single columns of a dataset, only made for the columns that are actually plotted and kept until the dataset changes.
+    # the stats behind every mode (min/max/mean/var per cycle) come out of one groupby per column, so switching modes doesn't scan the data again
+
+    def __init__(self, df):
+        self.df = df
+        self.stats = {}     # column -> per cycle stats
+        self.values = {}    # (column, mode) -> normalized Series
+
+
+    def column_stats(self, column):
+        if column not in self.stats:
+            values = self.df[column].astype('float64')
+            cycles = self.df['cycle'] if 'cycle' in self.df else pd.Series(0, index=values.index)
+            self.stats[column] = values.groupby(cycles, sort=False, observed=True).agg(['min', 'max', 'count', 'mean', 'var'])
+        return self.stats[column]
+
+
+    def column(self, column, mode='min-max'):
+        key = (column, mode)
+        if key in self.values:
+            return self.values[key]
+
+        stats = self.column_stats(column)
+        values = self.df[column]
+        floats = values.to_numpy(dtype='float64')
+
+        if mode == 'z-score':
+            # per cycle mean/var combined into the mean/std of the whole column
+            count = stats['count'].sum()
+            mean = (stats['mean'] * stats['count']).sum() / count
+            m2 = (stats['var'].fillna(0) * (stats['count'] - 1) + stats['count'] * (stats['mean'] - mean) ** 2).sum()
+            offset, span = mean, np.sqrt(m2 / count)
+        elif mode == 'per-cycle':
+            # every cycle scaled to 0-1 on its own, so cycles with drifting levels can be overlaid
+            cycles = self.df['cycle'] if 'cycle' in self.df else pd.Series(0, index=values.index)
+            offset = stats['min'].reindex(cycles).to_numpy()
+            span = stats['max'].reindex(cycles).to_numpy() - offset
+        elif mode == 'min-max':
+            offset = stats['min'].min()
+            span = stats['max'].max() - offset
+        else:
+            raise ValueError(f'unknown normalization {mode}, expected one of {", ".join(NORMALIZE_MODES)}')
+
+        span = np.where(span != 0, span, 1)       # a flat column would divide by 0
+        dtype = values.dtype if values.dtype.kind == 'f' else 'float64'
+        normalized = pd.Series(((floats - offset) / span).astype(dtype), index=values.index, name=column)
+
+        self.values[key] = normalized
+        return normalized
+
+
+def smooth_series(x, y, mode, window):
+    # smoothed (x, y) of one x sorted series without NaNs, for display. rolling windows and the ema span are points, resample buckets are
+    # x units (seconds on Epoch_Time) and give one point per bucket at the mean x and y of its rows. every mode is a single vectorized pass
+    x = np.asarray(x)
+    y = np.asarray(y, dtype='float64')
+    if not len(x):
+        return x, y
+
+    if mode == 'resample':
+        buckets = np.floor((x - x[0]) / window).astype('int64')
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])   # x is sorted, so a bucket is one run of rows
+        counts = np.diff(np.append(starts, len(x)))
+        return np.add.reduceat(x.astype('float64'), starts) / counts, np.add.reduceat(y, starts) / counts
+
+    points = max(int(round(window)), 1)
+    if mode == 'rolling mean':
+        smoothed = pd.Series(y).rolling(points, min_periods=1, center=True).mean()
+    elif mode == 'rolling median':
+        smoothed = pd.Series(y).rolling(points, min_periods=1, center=True).median()
+    elif mode == 'ema':
+        smoothed = pd.Series(y).ewm(span=points, adjust=False).mean()
+    else:
+        raise ValueError(f'unknown smoothing {mode}, expected one of {", ".join(SMOOTH_MODES)}')
+    return x, smoothed.to_numpy()
+
+
+class Smoother:
+    # smoothed copies of plotted series, like Normalizer one per filter selection, only made for the series that are on screen and kept
+    # until the dataset changes, so a redraw, a toggle or going back to the selection reuses them. the series are keyed on their name
+    # (parameter and cycle), which values they are (raw or normalized) and the smoothing mode and window
+
+    def __init__(self, df):
+        self.df = df
+        self.values = {}    # (name, values, mode, window) -> (x, y)
+
+
+    def series(self, name, values, x, y, mode, window):
+        key = (name, values, mode, window)
+        if key not in self.values:
+            self.values[key] = smooth_series(x, y, mode, window)
+        return self.values[key]
+
+
+class CycleStatistics:
+    # count/min/max/mean/rms of the numeric columns and the duration of every (mac, channel, cycle) group of a dataset. like Normalizer the
+    # groups are found once per filter selection and a column is only aggregated when the statistics table or trend plot asks for it, so a
+    # filter change costs one column, not a float64 copy of all of them. a filtered dataset has mac/channel (and a single cycle) dropped,
+    # its groups are just the cycles
+
+    def __init__(self, df, x_axis):
+        self.df = df
+        self.keys = [c for c in FILTER_COLUMNS if c in df.columns]
+        self.columns = [c for c in df.columns if c not in FILTER_COLUMNS and pd.api.types.is_numeric_dtype(df[c])]
+        self.stats = {}     # column -> count/min/max/mean/rms per group
+
+        if self.keys:
+            grouped = df.groupby(self.keys, sort=True, observed=True)
+            codes = grouped.ngroup().to_numpy()
+            self.index = grouped.size().index
+        else:
+            codes = np.zeros(len(df))
+            self.index = pd.RangeIndex(1)
+        self.rows = None if not np.isnan(codes).any() else ~np.isnan(codes)     # rows with a missing key are in no group
+        self.codes = (codes if self.rows is None else codes[self.rows]).astype(np.intp)
+
+        self.time_key = 'Epoch_Time' if 'Epoch_Time' in self.columns else x_axis
+        self.x = self.index.to_numpy(dtype='float64') if self.keys == ['cycle'] else np.arange(len(self.index))     # trend plot x, cycle numbers where it can
+        self.groups = [' / '.join(str(v) for v in key) if isinstance(key, tuple) else str(key) for key in self.index] if self.keys else ['all']
+
+
+    def __len__(self):
+        return len(self.index)
+
+
+    def column_stats(self, column):
+        if column not in self.stats:
+            values = self.df[column].to_numpy(dtype='float64', na_value=np.nan, copy=True)    # float32 sums of squares lose digits
+            if self.rows is not None:
+                values = values[self.rows]
+            stats = pd.Series(values).groupby(self.codes, sort=True).agg(['count', 'min', 'max', 'mean'])
+            np.square(values, out=values)       # the copy is squared in place for the rms
+            stats['rms'] = pd.Series(values).groupby(self.codes, sort=True).mean() ** .5
+            self.stats[column] = stats.reindex(range(len(self.index)))
+        return self.stats[column]
+
+
+    def duration(self):
+        if self.time_key not in self.columns:
+            return np.full(len(self.index), np.nan)
+        times = self.column_stats(self.time_key)
+        return (times['max'] - times['min']).to_numpy()
+
+
+    def table(self, column):
+        # one row per group: count, min, max, mean, rms of column and the duration of the group
+        table = self.column_stats(column).copy()
+        table['duration'] = self.duration()
+        table.index = self.groups
+        return table
+
+
+def normalize(filtered_df, x_axis, mode='min-max'):
+    # normalizes every numeric column, except the filtering columns and the selected x axis
+    if not isinstance(filtered_df, pd.DataFrame):   # an unfiltered streaming.ColumnStore
+        filtered_df = filtered_df.to_frame()
+    normalized_df = filtered_df.copy()
+    columns = [c for c in filtered_df.select_dtypes('number').columns if c not in ['cycle', 'mac', 'channel', x_axis]]
+
+    normalizer = Normalizer(filtered_df)
+    for c in columns:
+        normalized_df[c] = normalizer.column(c, mode)
+    return normalized_df
+
+
+def export_csv(df, export_filename, index=True):
+    export_filename = Path(export_filename)
+    if export_filename.exists():
+        export_filename.unlink()
+
+    df.to_csv(export_filename, header=True, index=index)
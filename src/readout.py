@@ -0,0 +1,93 @@
+import numpy as np
+
+from buffers import GrowingArray
+
+
+class Readout:
+    # x sorted copies of every plotted series, cached when the series is plotted, so finding the datapoint nearest to a cursor x is a binary search
+    # instead of a scan over the line plus a lookup in the dataframe. raw_y is the unnormalized value shown in the summary frame
+
+    def __init__(self):
+        self.series = {}    # name -> (x, y, raw_y), sorted on x
+        self.buffers = {}   # name -> GrowingArray of x, y, raw_y, for series that have been extended
+        self.smoothed = {}  # name -> (x, y, raw_y) of the smoothed line, sorted on x, for series plotted smoothed
+
+
+    def add(self, name, x, y, raw_y=None):
+        x = np.asarray(x)
+        y = np.asarray(y)
+        raw_y = y if raw_y is None else np.asarray(raw_y)
+
+        if len(x) > 1 and not np.all(x[1:] >= x[:-1]):
+            order = np.argsort(x, kind='stable')
+            x, y, raw_y = x[order], y[order], raw_y[order]
+
+        self.series[name] = (x, y, raw_y)
+        self.buffers.pop(name, None)
+        self.smoothed.pop(name, None)
+
+
+    def add_smoothed(self, name, x, y, raw_y=None):
+        # the smoothed line of a series added with add(), its raw points stay what nearest() snaps to
+        x = np.asarray(x)
+        y = np.asarray(y)
+        raw_y = y if raw_y is None else np.asarray(raw_y)
+        if len(x) > 1 and not np.all(x[1:] >= x[:-1]):
+            order = np.argsort(x, kind='stable')
+            x, y, raw_y = x[order], y[order], raw_y[order]
+        self.smoothed[name] = (x, y, raw_y)
+
+
+    def extend(self, name, x, y, raw_y=None):
+        # appends points to a series, points past its current end are appended as is, anything else sorts the whole series again
+        x = np.asarray(x)
+        y = np.asarray(y)
+        raw_y = y if raw_y is None else np.asarray(raw_y)
+        if not len(x):
+            return
+
+        old = self.series[name]
+        if (len(old[0]) and x[0] < old[0][-1]) or not np.all(x[1:] >= x[:-1]):
+            self.add(name, *(np.concatenate([a, b]) for a, b in zip(old, (x, y, raw_y))))
+            return
+
+        if name not in self.buffers:
+            self.buffers[name] = [GrowingArray(a) for a in old]
+        self.series[name] = tuple(buffer.extend(values) for buffer, values in zip(self.buffers[name], (x, y, raw_y)))
+
+
+    def remove(self, name):
+        self.series.pop(name, None)
+        self.buffers.pop(name, None)
+        self.smoothed.pop(name, None)
+
+
+    def clear(self):
+        self.series = {}
+        self.buffers = {}
+        self.smoothed = {}
+
+
+    def nearest(self, name, x_value):
+        # (x, y, raw_y) of the point closest to x_value, on a tie the lower x wins (same as argmin did), None for an empty series
+        return _nearest(self.series[name], x_value)
+
+
+    def nearest_smoothed(self, name, x_value):
+        # (x, y, raw_y) of the smoothed line's point closest to x_value, the same x as the raw point unless it was resampled. None if the
+        # series isn't smoothed
+        if name not in self.smoothed:
+            return None
+        return _nearest(self.smoothed[name], x_value)
+
+
+def _nearest(series, x_value):
+    x, y, raw_y = series
+    if not len(x):
+        return None
+
+    i = int(np.searchsorted(x, x_value, side='left'))
+    if i == len(x) or (i > 0 and x_value - x[i - 1] <= x[i] - x_value):
+        i -= 1
+
+    return x[i], y[i], raw_y[i]
@@ -0,0 +1,198 @@
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+
+from processing import FILTER_COLUMNS, IMPORT_ERRORS, ImportCancelled, build_group_index, load_dataset
+from streaming import CHUNK_ROWS, STREAM_MODES, ColumnStore, ColumnStoreWriter, stream_dataset
+
+# several runs side by side, for regression comparisons. every run is imported on its own worker process and spilled to a ColumnStore,
+# the app then pages in only the columns it plots, so a dozen runs cost about as much memory as their plotted columns
+
+
+def load_run(mode, filenames, store_path, cache=None, **options):
+    # runs in a worker process, the dataset never travels back to the app, only its filter values. runs that can be streamed are spilled
+    # a chunk at a time, so a worker never holds a whole run. the others (mixed, several fridgeplexor files) are imported by load_dataset first
+    if mode in STREAM_MODES and (mode != 'fridgeplexor' or len(filenames) == 2):
+        store, filters = stream_dataset(mode, filenames, store_path, downcast=options.get('downcast', True))
+        store.close()
+        return filters
+
+    full_df, filters = load_dataset(mode, filenames, cache=cache, **options)
+    with ColumnStoreWriter(store_path) as writer:
+        for start in range(0, max(len(full_df), 1), CHUNK_ROWS):
+            writer.append(full_df.iloc[start:start + CHUNK_ROWS])
+        writer.close()
+    return filters
+
+
+class Run:
+    # one dataset of a session, label is what its parameters are prefixed with in the parameter list, legend and summary
+
+    def __init__(self, label, mode, filenames, store):
+        self.label = label
+        self.mode = mode
+        self.filenames = filenames
+        self.store = store
+        self.group_index = build_group_index(store)     # only reads the filter columns
+
+
+    def positions(self, yeti, load, cycle):
+        # rows of a filter selection, runs without the filter columns (or the selected group) give every row / nothing
+        if yeti and load and cycle and self.group_index is not None:
+            return self.group_index.positions(yeti, load, cycle)
+        return slice(None)
+
+
+    def series(self, column, x_axis, yeti, load, cycle):
+        # (x, y) of one column for a filter selection, sorted on x and without the rows column has no value in. only the selected rows
+        # of the two columns are read from disk
+        if x_axis not in self.store or column not in self.store:
+            return np.array([]), np.array([])
+
+        positions = self.positions(yeti, load, cycle)
+        x = self.store.values(x_axis, positions)
+        y = self.store.values(column, positions)
+        keep = ~np.isnan(y)
+        x, y = x[keep], y[keep]
+        order = np.argsort(x, kind='stable')
+        return x[order], y[order]
+
+
+class Session:
+    # the runs of a session, and their parameters as 'label: column'. it stands in for full_df in the app, columns are the columns of
+    # every run (for the x axis menu), len the rows of all of them
+
+    def __init__(self, path, runs, errors):
+        self.path = Path(path)
+        self.runs = runs
+        self.errors = errors        # (label, error) of the runs that failed to import
+        self.parameters = {f'{run.label}: {c}': (run, c) for run in runs for c in run.store.columns if c not in FILTER_COLUMNS}
+        self.columns = list(dict.fromkeys(c for run in runs for c in run.store.columns))
+
+
+    def __len__(self):
+        return sum(len(run.store) for run in self.runs)
+
+
+    def filter_values(self):
+        # every run's values in the Yeti/Load/Cycle dropdowns, None if no run has filter columns
+        values = [[], [], []]
+        for run in self.runs:
+            if run.group_index is not None:
+                for mac, channel, cycle in run.group_index.groups:
+                    for known, value in zip(values, (mac, channel, cycle)):
+                        if value not in known:
+                            known.append(value)
+
+        if not any(values):
+            return None
+        return values[0], values[1], values[2] + ['All']
+
+
+    def select(self, yeti, load, cycle, x_axis):
+        return SessionView(self, yeti, load, cycle, x_axis)
+
+
+    def close(self):
+        # drops the memory maps and deletes the spilled runs
+        for run in self.runs:
+            run.store.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class SessionView:
+    # one filter selection of a session, stands in for filtered_df. iterating it gives the parameters, series() the plotted data,
+    # which is kept for as long as the view is so toggling a parameter off and on doesn't read it again
+
+    def __init__(self, session, yeti, load, cycle, x_axis):
+        self.session = session
+        self.selection = (x_axis, yeti, load, cycle)
+        self.cache = {}
+
+
+    def __iter__(self):
+        return iter(self.session.parameters)
+
+
+    def __contains__(self, parameter):
+        return parameter in self.session.parameters
+
+
+    def __len__(self):
+        return len(self.session)
+
+
+    def x_values(self):
+        # the x axis of every run in the selection, sorted, for the x axis row of the summary
+        x_axis, yeti, load, cycle = self.selection
+        if x_axis not in self.cache:
+            values = [run.store.values(x_axis, run.positions(yeti, load, cycle)) for run in self.session.runs if x_axis in run.store]
+            x = np.concatenate(values) if values else np.array([])
+            self.cache[x_axis] = np.sort(x[~np.isnan(x)], kind='stable')
+        return self.cache[x_axis]
+
+
+    def series(self, parameter):
+        if parameter not in self.cache:
+            run, column = self.session.parameters[parameter]
+            self.cache[parameter] = run.series(column, *self.selection)
+        return self.cache[parameter]
+
+
+def run_labels(jobs):
+    # the first file's name of every run, numbered where two runs would get the same one
+    labels = []
+    seen = {}
+    for mode, filenames in jobs:
+        label = Path(filenames[0]).stem
+        seen[label] = seen.get(label, 0) + 1
+        labels.append(label if seen[label] == 1 else f'{label} ({seen[label]})')
+    return labels
+
+
+def load_session(jobs, spill_dir=None, progress=None, cancel=None, workers=None, cache=None, **options):
+    # jobs are (mode, filenames) of every run, imported in parallel on a process pool. progress(fraction, text) is called as runs finish,
+    # cancel is a threading.Event, runs that already started still finish but nothing new starts. options go to load_dataset.
+    # a run that fails is left out (see Session.errors) unless they all do
+    report = progress or (lambda fraction, text: None)
+    if spill_dir is not None:
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+    path = Path(tempfile.mkdtemp(prefix='session-', dir=spill_dir))
+    labels = run_labels(jobs)
+
+    runs = {}
+    errors = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(load_run, mode, filenames, path / str(i), cache, **options): i for i, (mode, filenames) in enumerate(jobs)}
+            pending = set(futures)
+            report(0, f'Importing {len(jobs)} runs')
+            while pending:
+                finished, pending = wait(pending, timeout=.25, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = futures[future]
+                    try:
+                        future.result()
+                        runs[i] = Run(labels[i], *jobs[i], ColumnStore(path / str(i)))
+                    except IMPORT_ERRORS as err:    # one bad log shouldn't stop the rest of the session
+                        errors.append((labels[i], err))
+
+                if finished:
+                    done = len(jobs) - len(pending)
+                    report(done / len(jobs), f'Imported {done}/{len(jobs)} runs')
+                if cancel is not None and cancel.is_set():
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise ImportCancelled()
+
+        if not runs and errors:
+            raise errors[0][1]
+    except BaseException:
+        for run in runs.values():
+            run.store.close()
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+
+    return Session(path, [runs[i] for i in sorted(runs)], errors)
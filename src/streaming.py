@@ -0,0 +1,502 @@
+import io
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from processing import TIME_KEYS, _check_cancel, downcast_floats, filter_values, infer_schema, packet_keys, pivot_meters, split_fridgeplexor
+
+# streaming import for logs larger than RAM. files are read in chunks, every chunk goes through the same column drop, M_ID reshape and
+# Fridgeplexor association/merge as a normal import, and the result is spilled to a ColumnStore on disk instead of being held in memory.
+# LiveTail uses the same incremental reshape/merge to follow files a logger is still writing
+
+CHUNK_ROWS = 500_000
+INTEGER_KEYS = ('cycle', 'M_ID', 'packet_num')      # kept integers like an in memory import, so cycle 0 is '0' in the dropdowns and not '0.0'
+MISSING_INT = np.iinfo('int64').min     # stands in for a gap in an integer key, read back as <NA>
+
+
+class ColumnStore:
+    # one raw binary file per column plus a schema.json, columns are read back lazily through np.memmap so only the columns and rows
+    # that are actually plotted, filtered or exported are paged in. mac/channel are stored as int32 category codes.
+    # it answers the parts of the DataFrame api the app uses on full_df: columns, len, in, [col], [[cols]], take(), to_csv()
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'schema.json', 'r') as file:
+            schema = json.load(file)
+
+        self.columns = schema['columns']
+        self.dtypes = schema['dtypes']
+        self.categories = schema['categories']
+        self.rows = schema['rows']
+        self.attrs = schema.get('attrs', {})     # like DataFrame.attrs, the unmatched counts of a fridgeplexor import
+        self._maps = {}
+
+
+    def __len__(self):
+        return self.rows
+
+
+    def __iter__(self):
+        return iter(self.columns)
+
+
+    def __contains__(self, column):
+        return column in self.columns
+
+
+    def _memmap(self, column):
+        if column not in self._maps:
+            dtype = 'int32' if self.dtypes[column] == 'category' else self.dtypes[column]
+            if self.rows:
+                self._maps[column] = np.memmap(self.path / f'{self.columns.index(column)}.bin', dtype=dtype, mode='r', shape=(self.rows,))
+            else:
+                self._maps[column] = np.empty(0, dtype=dtype)
+        return self._maps[column]
+
+
+    def _series(self, column, values, index):
+        if self.dtypes[column] == 'category':
+            values = pd.Categorical.from_codes(values, categories=self.categories[column])
+        elif self.dtypes[column] == 'int64':
+            missing = values == MISSING_INT
+            if missing.any():
+                values = pd.arrays.IntegerArray(np.where(missing, 0, values), missing)
+        return pd.Series(values, index=index, name=column)
+
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._series(key, self._memmap(key), pd.RangeIndex(self.rows))
+        return pd.DataFrame({c: self._series(c, self._memmap(c), pd.RangeIndex(self.rows)) for c in key})
+
+
+    def values(self, column, positions=slice(None)):
+        # the stored numbers of one column (codes for mac/channel), only the rows at positions are read. an integer key with gaps comes back
+        # as float64 with NaN in them
+        values = self._memmap(column)[positions]
+        if self.dtypes[column] == 'int64' and (values == MISSING_INT).any():
+            values = np.where(values == MISSING_INT, np.nan, values)
+        return values
+
+
+    def take(self, positions, columns=None):
+        # rows by position, like DataFrame.take, only those rows (of columns, or all) are read from disk
+        index = pd.Index(positions)
+        return pd.DataFrame({c: self._series(c, self._memmap(c)[positions], index) for c in (columns or self.columns)})
+
+
+    def close(self):
+        # drops the memory maps, the column files can't be deleted on windows while they are mapped
+        self._maps = {}
+
+
+    def to_frame(self):
+        return self[self.columns]
+
+
+    def to_csv(self, path, header=True, index=True, chunk_rows=CHUNK_ROWS):
+        # written a row range at a time, so exporting never needs the whole dataset in memory
+        for start in range(0, max(self.rows, 1), chunk_rows):
+            chunk = self.take(np.arange(start, min(start + chunk_rows, self.rows)))
+            chunk.to_csv(path, header=header and start == 0, index=index, mode='w' if start == 0 else 'a')
+
+
+class ColumnStoreWriter:
+    # appends chunks to a new ColumnStore, the first chunk fixes the columns and dtypes (numbers are stored as float32/float64, integer keys as
+    # int64, text is left out). used as a context manager, a block that raises closes the column files and deletes the unfinished store
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if self.path.exists():
+            shutil.rmtree(self.path)
+        self.path.mkdir(parents=True)
+
+        self.columns = None
+        self.dtypes = {}
+        self.categories = {}
+        self.files = {}
+        self.rows = 0
+        self.attrs = {}
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.discard()
+
+
+    def _start(self, chunk):
+        self.columns = []
+        for c in chunk.columns:
+            if isinstance(chunk[c].dtype, pd.CategoricalDtype):
+                self.dtypes[c] = 'category'
+                self.categories[c] = []
+            elif chunk[c].dtype == 'float32':
+                self.dtypes[c] = 'float32'
+            elif c in INTEGER_KEYS and pd.api.types.is_integer_dtype(chunk[c]):
+                self.dtypes[c] = 'int64'        # gaps in later chunks are stored as MISSING_INT
+            elif pd.api.types.is_numeric_dtype(chunk[c]):
+                self.dtypes[c] = 'float64'      # a later chunk may have gaps an integer column can't hold
+            else:
+                continue
+            self.columns.append(c)
+            self.files[c] = open(self.path / f'{len(self.columns) - 1}.bin', 'wb')     # open across appends, close()/discard() (or __exit__) closes it
+
+
+    def append(self, chunk):
+        if self.columns is None:
+            self._start(chunk)
+
+        for c in self.columns:
+            if c in chunk.columns:
+                values = chunk[c]
+            else:       # a column missing from this chunk (e.g. a meter that didn't report), keep the rows aligned
+                values = pd.Series(np.nan, index=chunk.index)
+
+            if self.dtypes[c] == 'category':
+                known = self.categories[c]
+                values = values.astype('category')
+                known += [v for v in values.cat.categories if v not in known]
+                data = values.cat.set_categories(known).cat.codes.to_numpy(dtype='int32')
+            elif self.dtypes[c] == 'int64':
+                data = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+                data = np.where(np.isnan(data), MISSING_INT, data).astype('int64')
+            else:
+                if self.dtypes[c] == 'float32' and values.dtype == 'float64':     # this chunk needs the precision, so does the column
+                    self._widen(c)
+                data = pd.to_numeric(values, errors='coerce').to_numpy(dtype=self.dtypes[c])
+
+            self.files[c].write(data.tobytes())
+
+        self.rows += len(chunk)
+
+
+    def _widen(self, column):
+        # rewrites the float32 rows written so far as float64
+        path = Path(self.files[column].name)
+        self.files[column].close()
+        np.fromfile(path, dtype='float32').astype('float64').tofile(path)
+        self.files[column] = open(path, 'ab')
+        self.dtypes[column] = 'float64'
+
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+
+        categories = {c: [v.item() if hasattr(v, 'item') else v for v in known] for c, known in self.categories.items()}
+        with open(self.path / 'schema.json', 'w') as file:
+            json.dump({'columns': self.columns or [], 'dtypes': self.dtypes, 'categories': categories, 'rows': self.rows, 'attrs': self.attrs}, file)
+
+        return ColumnStore(self.path)
+
+
+    def discard(self):
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _coerce(chunk, dtype):
+    # numbers are coerced per chunk instead of forced at parse time, so text further down a column becomes NaN instead of failing mid stream.
+    # a float32 candidate is only downcast if every value of the chunk keeps its precision, ColumnStoreWriter widens the column otherwise
+    for c in chunk.columns:
+        if dtype.get(c) == 'float32':
+            chunk[c] = pd.to_numeric(chunk[c], errors='coerce').astype('float64')
+    return downcast_floats(chunk, [c for c in chunk.columns if dtype.get(c) == 'float32'])
+
+
+def iter_chunks(filename, skiprows=0, chunk_rows=CHUNK_ROWS, downcast=True):
+    # yields (chunk, fraction of the file read), parsed with the same sniffed schema as a normal import
+    usecols, dtype = infer_schema(filename, skiprows, downcast)
+    categories = {c: 'category' for c in dtype if dtype[c] == 'category'}
+    size = max(os.path.getsize(filename), 1)
+
+    with open(filename, 'rb') as file:
+        for chunk in pd.read_csv(file, skiprows=skiprows, index_col=False, usecols=usecols, dtype=categories, chunksize=chunk_rows):
+            yield _coerce(chunk, dtype), file.tell() / size
+
+
+class MeterPivot:
+    # pivot_meters over a log that arrives in pieces. the last sample of a piece may have the rest of its meters in the next one,
+    # so it is carried over instead of reshaped now. the meters of the first complete samples fix the columns
+
+    def __init__(self):
+        self.carry = None
+        self.meters = None
+
+
+    def feed(self, chunk):
+        keys = [k for k in TIME_KEYS if k in chunk.columns]
+        if self.carry is not None:
+            chunk = pd.concat([self.carry, chunk], ignore_index=True)
+
+        last = chunk[keys].iloc[-1]
+        tail = (chunk[keys] == last).all(axis=1)
+        chunk, self.carry = chunk[~tail], chunk[tail]
+
+        if not len(chunk):
+            return None
+        if self.meters is None:
+            self.meters = list(chunk['M_ID'].dropna().unique())
+        return pivot_meters(chunk, meters=self.meters)
+
+
+    def flush(self):
+        carry, self.carry = self.carry, None
+        if carry is None or not len(carry):
+            return None
+        return pivot_meters(carry, meters=self.meters)     # meters is still None if the whole log was one sample
+
+
+class PacketJoin:
+    # the Fridgeplexor (M_ID, packet_num) inner join over Mdata and Ydata that arrive in pieces. each meter's packets are logged in order in both
+    # files, so once both have been read past a packet for a meter, every row before it is final: it is joined and handed out, the rest stays
+    # buffered. the last packet read is held back too, a packet logged twice can have its second row in the next piece. a meter only one file
+    # has is final once the other file has been read past its packets for any meter. unmatched counts the final rows that found no partner,
+    # like join_packets does for an in memory import
+
+    SIDES = ('Mdata', 'Ydata')
+
+    def __init__(self, associations):
+        self.associations = associations
+        self.known_meters = set(associations.values())
+        self.buffers = [None, None]     # Mdata, Ydata rows not final yet
+        self.seen = [None, None]        # highest packet read per M_ID
+        self.columns = None
+        self.unmatched = {name: 0 for name in self.SIDES}
+
+
+    def feed(self, side, chunk):
+        rows = len(chunk)
+        if side == 0:
+            chunk = chunk[chunk['M_ID'].isin(self.known_meters)]     # meters no yeti was connected to can never match
+        else:
+            chunk['M_ID'] = pd.to_numeric(chunk['mac'].map(self.associations))    # add M_ID to the yeti chunk based on associations, so that it can be merged on
+            chunk = chunk[chunk['M_ID'].notna()]
+        self.unmatched[self.SIDES[side]] += rows - len(chunk)
+
+        chunk = chunk.drop(columns=[c for c in ('Unnamed: 0',) if c in chunk.columns])
+        maxima = chunk.groupby('M_ID')['packet_num'].max()
+        if self.seen[side] is None:
+            self.seen[side] = maxima
+        elif len(maxima):
+            self.seen[side] = pd.concat([self.seen[side], maxima]).groupby(level=0).max()
+        buffer = self.buffers[side]
+        self.buffers[side] = chunk if buffer is None or not len(buffer) else pd.concat([buffer, chunk], ignore_index=True)
+
+
+    def joined(self, done=(False, False)):
+        # the rows that became final, None if there are none. a finished file (done) no longer holds anything back
+        if self.buffers[0] is None or self.buffers[1] is None:
+            return None
+
+        # per meter, the packet both files have been read up to. a file that hasn't had a meter yet has been read up to its highest packet
+        # of any meter for it, rows are logged in packet order
+        meters = self.seen[0].index.union(self.seen[1].index)
+        limits = [pd.Series(np.inf, index=meters) if done[side] else self.seen[side].reindex(meters).fillna(self.seen[side].max()) for side in (0, 1)]
+        watermark = pd.concat(limits, axis=1).min(axis=1, skipna=False)
+        if all(done):
+            watermark[:] = np.inf
+
+        final = [buffer[buffer['packet_num'] < buffer['M_ID'].map(watermark).fillna(-np.inf)] for buffer in self.buffers]
+        joined = final[0].merge(final[1], on=['M_ID', 'packet_num'], how='inner')
+        keys = [packet_keys(rows) for rows in final]
+        for side, other in ((0, 1), (1, 0)):
+            self.unmatched[self.SIDES[side]] += int((~np.isin(keys[side], keys[other])).sum())
+        self.buffers = [self.buffers[side].drop(index=final[side].index) for side in (0, 1)]
+
+        if not len(joined):
+            return None
+        joined = joined.drop(columns=['packet_num'])
+        if self.columns is None:    # every later piece comes out in the same column order
+            self.columns = list(joined.columns)
+        return joined[self.columns]
+
+
+def _stream_single(filenames, writer, report, cancel, options):
+    pivot = MeterPivot()
+
+    for chunk, fraction in iter_chunks(filenames[0], chunk_rows=options['chunk_rows'], downcast=options['downcast']):
+        _check_cancel(cancel)
+        report(.9 * fraction, f'Streaming {writer.rows} rows')
+
+        if 'M_ID' in chunk.columns:
+            chunk = pivot.feed(chunk)
+        if chunk is not None:
+            writer.append(chunk)
+
+    rest = pivot.flush()
+    if rest is not None:
+        writer.append(rest)
+
+
+def fridgeplexor_pair(filenames):
+    # the Mdata file, Ydata file and its associations of a streamed or followed import, which joins one pair of files as they are read
+    mdata_files, ydata_files = split_fridgeplexor(filenames)
+    if len(mdata_files) != 1 or len(ydata_files) != 1:
+        raise ValueError(f'a streamed fridgeplexor import takes one Mdata and one Ydata file, got {len(mdata_files)} and {len(ydata_files)}')
+    return mdata_files[0], ydata_files[0][0], ydata_files[0][1]
+
+
+def _stream_fridgeplexor(filenames, writer, report, cancel, options):
+    mdata_file, ydata_file, associations = fridgeplexor_pair(filenames)
+    join = PacketJoin(associations)
+
+    chunks = [iter_chunks(mdata_file, chunk_rows=options['chunk_rows'], downcast=options['downcast']),
+              iter_chunks(ydata_file, skiprows=1, chunk_rows=options['chunk_rows'], downcast=options['downcast'])]
+    done = [False, False]
+
+    while not all(done):
+        _check_cancel(cancel)
+
+        for side in (0, 1):
+            if done[side]:
+                continue
+            try:
+                chunk, fraction = next(chunks[side])
+            except StopIteration:
+                done[side] = True
+                continue
+
+            if side == 1:
+                report(.9 * fraction, f'Streaming {writer.rows} rows')
+            join.feed(side, chunk)
+
+        joined = join.joined(done)
+        if joined is not None:
+            writer.append(joined)
+    writer.attrs['unmatched'] = join.unmatched
+
+
+STREAM_MODES = {
+    'fridgeplexor': _stream_fridgeplexor,
+    'single': _stream_single,
+}
+
+
+def stream_dataset(mode, filenames, store_path, progress=None, cancel=None, downcast=True, chunk_rows=CHUNK_ROWS):
+    # chunked counterpart of processing.load_dataset, returns (ColumnStore, filters). the store is reused if a finished one already exists at store_path
+    report = progress or (lambda fraction, text: None)
+    if mode not in STREAM_MODES:
+        raise ValueError(f'{mode} import can not be streamed, only {", ".join(STREAM_MODES)}')
+
+    store_path = Path(store_path)
+    if (store_path / 'schema.json').exists():
+        report(.5, 'Opening spilled dataset')
+        store = ColumnStore(store_path)
+    else:
+        with ColumnStoreWriter(store_path) as writer:
+            STREAM_MODES[mode](filenames, writer, report, cancel, {'downcast': downcast, 'chunk_rows': chunk_rows})
+            store = writer.close()
+
+    report(.95, 'Reading filter values')
+    filters = filter_values(store) if all(c in store for c in ('mac', 'channel', 'cycle')) else None
+
+    report(1, 'Done')
+    return store, filters
+
+
+class CsvFollower:
+    # the complete rows appended to a csv since the last read. the byte offset of the last full line is kept, so a read only parses
+    # what the logger wrote since, and a line it is still in the middle of writing waits for the next read
+
+    def __init__(self, filename, skiprows=0, downcast=True):
+        self.filename = filename
+        self.skiprows = skiprows
+        self.downcast = downcast
+        self.offset = None
+        self.names = None
+
+
+    def start(self, file):
+        # the header and the sniffed schema, once there is at least one complete row to sniff
+        for _ in range(self.skiprows):
+            file.readline()
+        header = file.readline()
+        first_row = file.readline()
+        if not first_row.endswith(b'\n'):
+            return False
+
+        self.names = list(pd.read_csv(io.BytesIO(header), index_col=False).columns)
+        self.usecols, self.dtype = infer_schema(self.filename, self.skiprows, self.downcast)
+        self.offset = file.tell() - len(first_row)
+        return True
+
+
+    def read(self):
+        with open(self.filename, 'rb') as file:
+            if self.offset is None and not self.start(file):
+                return None
+
+            file.seek(self.offset)
+            data = file.read()
+
+        end = data.rfind(b'\n') + 1
+        if not end:
+            return None
+        self.offset += end
+
+        categories = {c: 'category' for c in self.dtype if self.dtype[c] == 'category'}
+        chunk = pd.read_csv(io.BytesIO(data[:end]), header=None, names=self.names, index_col=False, usecols=self.usecols, dtype=categories)
+        return _coerce(chunk, self.dtype)
+
+
+class LiveTail:
+    # follows the files of a single or Fridgeplexor import while they are still being written. every poll parses only the rows appended since the
+    # last one, and hands back the new finished rows of the dataset (meters reshaped, Ydata associated and merged) in the same columns as the first poll
+
+    def __init__(self, mode, filenames, downcast=True):
+        if mode not in STREAM_MODES:
+            raise ValueError(f'{mode} import can not be followed, only {", ".join(STREAM_MODES)}')
+
+        self.mode = mode
+        if mode == 'fridgeplexor':
+            mdata_file, ydata_file, associations = fridgeplexor_pair(filenames)
+            self.followers = [CsvFollower(mdata_file, downcast=downcast), CsvFollower(ydata_file, skiprows=1, downcast=downcast)]
+            self.join = PacketJoin(associations)
+        else:
+            self.followers = [CsvFollower(filenames[0], downcast=downcast)]
+            self.pivot = MeterPivot()
+        self.columns = None
+
+
+    @property
+    def unmatched(self):
+        # rows without a partner so far, None for a single import
+        return self.join.unmatched if self.mode == 'fridgeplexor' else None
+
+
+    def poll(self):
+        # new rows since the last poll, an empty frame if nothing finished (the first poll returns everything already in the files)
+        if self.mode == 'fridgeplexor':
+            for side, follower in enumerate(self.followers):
+                chunk = follower.read()
+                if chunk is not None and len(chunk):
+                    self.join.feed(side, chunk)
+            rows = self.join.joined()
+        else:
+            rows = self.followers[0].read()
+            if rows is not None and len(rows) and 'M_ID' in rows.columns:
+                rows = self.pivot.feed(rows)
+
+        if rows is None or not len(rows):
+            return pd.DataFrame(columns=self.columns or [])
+
+        if self.columns is None:    # numbers, and the filter columns, same as the column drop of a normal import
+            self.columns = [c for c in rows.columns if c != 'Unnamed: 0' and (isinstance(rows[c].dtype, pd.CategoricalDtype) or pd.api.types.is_numeric_dtype(rows[c]))]
+        rows = rows.reindex(columns=self.columns)
+        for c in ('mac', 'channel'):
+            if c in rows.columns:
+                rows[c] = rows[c].astype('category')
+
+        return rows.reset_index(drop=True)
@@ -0,0 +1,94 @@
+import importlib
+import sys
+import types
+from collections import OrderedDict
+from pathlib import Path
+
+import matplotlib
+import pytest
+
+# the modules in src import each other as top level modules, like the app does when it runs from there
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+matplotlib.use('Agg')
+
+
+class Var:
+    # stands in for the ctk variables, the app only calls get/set on them
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    # the app without a window: no display here, and the widgets aren't what is tested
+    ctk = types.ModuleType('customtkinter')
+    ctk.CTk = ctk.CTkFrame = type('CTk', (), {})
+    ctk.IntVar = ctk.StringVar = ctk.BooleanVar = Var
+    ctk.set_appearance_mode = lambda mode: None
+    monkeypatch.setitem(sys.modules, 'customtkinter', ctk)
+    monkeypatch.delitem(sys.modules, 'postprocessing_app', raising=False)
+    module = importlib.import_module('postprocessing_app')
+    module.load_libraries()
+    return module
+
+
+def build_app(module, full_df):
+    # an APP with just the state update_graph and append_rows use, widgets are stubbed
+    import matplotlib.pyplot as plt
+
+    from decimation import LevelOfDetail
+    from instrumentation import Instrumentation
+    from readout import Readout
+
+    app = module.APP.__new__(module.APP)
+    app.full_df = full_df
+    app.group_index = module.build_group_index(full_df)
+    app.filtered_df = None
+    app.session = None
+    app.tail_rows = []
+    app.tail = None
+    app.instruments = Instrumentation('unused')
+    app.show_report = lambda count=4: None
+    app.refresh_statistics = lambda: None
+    app.stats_table = None
+    app.refresh_legend = lambda: None
+    app.parameter_list = types.SimpleNamespace(set_disabled=lambda name: None)
+    for name in ('filter1_menu', 'filter2_menu', 'filter3_menu'):
+        setattr(app, name, types.SimpleNamespace(configure=lambda **options: None))
+    app.statistics = OrderedDict()
+    app.normalizers = OrderedDict()
+    app.smoothers = OrderedDict()
+    app.smoothing = None
+    app.cycle_split = None
+    app.figure, app.ax1 = plt.subplots()
+    app.canvas1 = app.figure.canvas
+    app.lod = LevelOfDetail(app.ax1)
+    app.readout = Readout()
+    app.blitted_cursor1 = types.SimpleNamespace(clear_click=lambda: None, clear_highlight=lambda: None)
+    app.series, app.parameter_series, app.summary_rows, app.current_y_values = {}, {}, {}, {}
+    app.add_summary_row = lambda name: app.summary_rows.__setitem__(name, None)
+    app.release_summary_row = lambda name: app.summary_rows.pop(name)
+    app.plot_dataset = app.plot_key = None
+    app.progress_text = Var('')
+    for name in ('normalize_state', 'smooth_state', 'collection_state'):
+        setattr(app, name, Var(0))
+    app.normalize_mode = Var('min-max')
+    app.yeti_selection, app.output_selection, app.cycle_selection, app.x_axis = Var('AA'), Var('usb'), Var('0'), Var('Epoch_Time')
+
+    app.derived = module.DerivedChannels({'Power': 'Voltage * Current'})
+    app.derived_names = app.derived.available(full_df.columns)
+    app.parameter_selections = {c: Var(False) for c in ('Epoch_Time', 'Voltage', 'Current', *app.derived_names)}
+    return app
+
+
+@pytest.fixture
+def windowless_app(app_module):
+    # builds an APP around a dataset, the app's update_graph/append_rows can run on it
+    return lambda full_df: build_app(app_module, full_df)
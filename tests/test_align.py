@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from processing import align_datasets
+
+
+def datasets():
+    # a 1 Hz and a slower, offset logger that both log a Voltage column
+    fast = pd.DataFrame({'Epoch_Time': np.arange(10.0), 'Voltage': np.arange(10.0)})
+    slow = pd.DataFrame({'Epoch_Time': [0.2, 3.4, 6.6], 'Voltage': [100.0, 103.0, 106.0], 'Temp': [20.0, 23.0, 26.0]})
+    return fast, slow
+
+
+def test_outer_keeps_every_timestamp_of_every_file():
+    aligned = align_datasets(datasets())
+    assert len(aligned) == 13 and list(aligned.columns) == ['Epoch_Time', 'Voltage_File_1', 'Voltage_File_2', 'Temp']
+
+
+def test_nearest_and_backward_keep_the_first_files_rows():
+    fast, slow = datasets()
+    nearest = align_datasets([fast, slow[::-1]], method='nearest', tolerance=.5)    # the second file out of order
+    np.testing.assert_array_equal(nearest['Epoch_Time'], fast['Epoch_Time'])
+    np.testing.assert_array_equal(nearest['Temp'], [20, np.nan, np.nan, 23, np.nan, np.nan, np.nan, 26, np.nan, np.nan])
+
+    backward = align_datasets([fast, slow], method='backward', tolerance=2)
+    np.testing.assert_array_equal(backward['Temp'], [np.nan, 20, 20, np.nan, 23, 23, np.nan, 26, 26, np.nan])
+
+
+def test_resample_joins_every_file_onto_a_grid():
+    aligned = align_datasets(datasets(), resample=2)
+    np.testing.assert_array_equal(aligned['Epoch_Time'], [0, 2, 4, 6, 8])
+    np.testing.assert_array_equal(aligned['Voltage_File_1'], [0, 2, 4, 6, 8])
+    np.testing.assert_array_equal(aligned['Temp'], [20, np.nan, 23, 26, np.nan])    # within half a step of a grid point
@@ -0,0 +1,29 @@
+import json
+
+from benchmark import compare, main, make_fridgeplexor, make_meter_log, make_mixed
+from processing import load_dataset
+
+
+def test_generated_logs_import_in_every_mode(tmp_path):
+    full_df, filters = load_dataset('fridgeplexor', make_fridgeplexor(tmp_path, 400, yetis=2, cycles=4))
+    assert len(full_df) == 400 and full_df.attrs['unmatched'] == {'Mdata': 0, 'Ydata': 0}
+    assert len(filters[0]) == 2 and filters[2] == ['0', '1', '2', '3', 'All']
+
+    full_df, _ = load_dataset('single', make_meter_log(tmp_path, 400, meters=4))
+    assert len(full_df) == 100 and 'Voltage 4' in full_df.columns
+
+    full_df, _ = load_dataset('mixed', make_mixed(tmp_path, 400), align='nearest', tolerance=.5)
+    assert len(full_df) == 400 and full_df['Temperature'].notna().sum() == 396      # the last 4 rows are more than .5 s past the last slow sample
+
+
+def test_a_run_writes_every_stage_and_compares_against_a_baseline(tmp_path, capsys):
+    output = tmp_path / 'results.json'
+    assert main(['--rows', '400', '--yetis', '2', '--cycles', '4', '--repeat', '1', '--no-memory', '-o', str(output)]) == 0
+    report = json.loads(output.read_text())
+    stages = {(r['scenario'], r['stage']) for r in report['results']}
+    assert ('fridgeplexor', 'import') in stages and ('fridgeplexor', 'crosshair') in stages and ('mixed', 'import_nearest') in stages
+    assert all(r['rows'] == 400 and r['peak_bytes'] is None for r in report['results'])
+
+    slower = [dict(r, min=r['min'] * 2) for r in report['results']]
+    assert compare(slower, report, threshold=1.5) == len(slower)
+    assert compare(report['results'], report, threshold=1.5) == 0
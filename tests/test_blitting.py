@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def yellow_pixels(canvas):
+    pixels = np.asarray(canvas.buffer_rgba())
+    return int(((pixels[..., 0] > 200) & (pixels[..., 1] > 200) & (pixels[..., 2] < 50)).sum())
+
+
+def blue_pixels(pixels):
+    return int(((pixels[..., 2] > 200) & (pixels[..., 0] < 50)).sum())
+
+
+def red_pixels(pixels):
+    return int(((pixels[..., 0] > 200) & (pixels[..., 2] < 50)).sum())
+
+
+def test_click_markers_are_blitted_without_a_full_draw(app_module):
+    import matplotlib.pyplot as plt
+
+    figure, ax = plt.subplots()
+    ax.plot([0, 10], [0, 10], color='blue')
+    cursor = app_module.BlittedCursor(ax)
+    draws = []
+    figure.canvas.mpl_connect('draw_event', draws.append)
+    figure.canvas.draw()
+    assert cursor.background is not None and len(draws) == 1
+    assert not any(artist in ax.get_children() for artist in cursor.artists)    # never part of a full draw
+
+    cursor.set_click(5, [5], [5])
+    assert len(draws) == 1 and yellow_pixels(figure.canvas) > 0      # painted over the cached background
+
+    cursor.clear_click()
+    cursor.blit()
+    assert len(draws) == 1 and yellow_pixels(figure.canvas) == 0
+
+    cursor.set_click(5, [5], [5])
+    figure.canvas.draw()    # a full draw paints the overlays back on
+    assert len(draws) == 2 and yellow_pixels(figure.canvas) > 0
+    plt.close(figure)
+
+
+def test_highlighting_dims_everything_but_the_line(app_module):
+    import matplotlib.pyplot as plt
+
+    figure, ax = plt.subplots()
+    highlighted, = ax.plot([0, 10], [0, 10], color='red', lw=5)
+    ax.plot([0, 10], [10, 0], color='blue', lw=5)
+    cursor = app_module.BlittedCursor(ax)
+    figure.canvas.draw()
+    before = np.asarray(figure.canvas.buffer_rgba()).copy()
+
+    cursor.set_highlight([highlighted], [])
+    pixels = np.asarray(figure.canvas.buffer_rgba())
+    assert blue_pixels(before) > 0 and blue_pixels(pixels) == 0      # the blue line is dimmed
+    assert red_pixels(pixels) > 0       # the red one is drawn on top
+
+    cursor.clear_highlight()
+    cursor.blit()
+    np.testing.assert_array_equal(np.asarray(figure.canvas.buffer_rgba()), before)
+    plt.close(figure)
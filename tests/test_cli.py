@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from postprocessing_cli import main
+
+
+def test_all_groups_prints_the_files_it_wrote(tmp_path, capsys):
+    log = tmp_path / 'log.csv'
+    pd.DataFrame({'Epoch_Time': np.arange(4.0), 'Voltage': np.arange(4.0)}).to_csv(log)     # no filter columns, one group
+
+    assert main([str(log), '--all-groups', '-o', str(tmp_path / 'out'), '-j', '1']) == 0
+    assert capsys.readouterr().out.split() == [f'{tmp_path / "out" / "log_all.csv"}:', '4', 'rows']
+
+
+def test_a_streamed_export_matches_an_in_memory_one(tmp_path):
+    log = tmp_path / 'log.csv'
+    pd.DataFrame({'mac': ['AA', 'BB'] * 4, 'channel': 'usb', 'cycle': 0, 'Epoch_Time': np.arange(8.0)[::-1], 'Voltage': np.arange(8.0)}).to_csv(log)
+    selection = ['--yeti', 'BB', '--load', 'usb', '--cycle', '0', '--x-axis', 'Epoch_Time', '-j', '1']
+
+    assert main([str(log), '-o', str(tmp_path / 'memory')] + selection) == 0
+    assert main([str(log), '-o', str(tmp_path / 'stream'), '--stream'] + selection) == 0
+    name = 'log_BB_usb_0.csv'
+    assert (tmp_path / 'memory' / name).read_text() == (tmp_path / 'stream' / name).read_text()
+    assert pd.read_csv(tmp_path / 'memory' / name).columns.tolist() == ['Epoch_Time', 'Voltage']
+
+
+def test_a_filtered_normalized_batch_skips_the_log_that_fails(tmp_path, capsys):
+    for name in ('run1', 'run2'):
+        pd.DataFrame({'mac': ['AA', 'BB'] * 4, 'channel': 'usb', 'cycle': 0, 'Epoch_Time': np.arange(8.0), 'Voltage': np.arange(8.0)}).to_csv(tmp_path / f'{name}.csv')
+    (tmp_path / 'run3.csv').write_text('Epoch_Time,Voltage\n1,2,3,4\n"')     # can't be parsed
+
+    argv = [str(tmp_path / 'run*.csv'), '--yeti', 'AA', '--load', 'usb', '--cycle', '0', '--x-axis', 'Epoch_Time', '--normalize', '-o', str(tmp_path / 'out'), '-j', '1']
+    assert main(argv) == 1
+    assert 'run3.csv' in capsys.readouterr().err
+
+    for name in ('run1', 'run2'):
+        exported = pd.read_csv(tmp_path / 'out' / f'{name}_AA_usb_0.csv')
+        np.testing.assert_allclose(exported['Epoch_Time'], [0, 2, 4, 6])      # the x axis isn't normalized
+        np.testing.assert_allclose(exported['Voltage'], [0, 1 / 3, 2 / 3, 1])
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from processing import CycleSplit
+
+
+def dataset():
+    rng = np.random.default_rng(0)
+    voltage = rng.random(90)
+    voltage[::7] = np.nan
+    return pd.DataFrame({'cycle': rng.permutation(np.repeat([2, 0, 1], 30)), 'Epoch_Time': rng.permutation(90).astype('float64'), 'Voltage': voltage})
+
+
+def test_every_cycle_matches_its_mask():
+    df = dataset()
+    split = CycleSplit(df, 'Epoch_Time')
+    plotted = df['Voltage'].to_numpy() * 2
+    x, y, raw, bounds = split.column('Voltage', plotted)
+
+    assert list(split.cycles) == [0, 1, 2]
+    for i, cycle in enumerate(split.cycles):
+        # the per cycle mask, dropna and sort the 'All' plot used to do
+        expected = df[df['cycle'] == cycle].dropna(subset=['Voltage']).sort_values('Epoch_Time', kind='stable')
+        np.testing.assert_array_equal(x[bounds[i]:bounds[i + 1]], expected['Epoch_Time'])
+        np.testing.assert_array_equal(raw[bounds[i]:bounds[i + 1]], expected['Voltage'])
+        np.testing.assert_array_equal(y[bounds[i]:bounds[i + 1]], expected['Voltage'] * 2)
+
+
+def test_all_cycles_plots_a_line_per_cycle(windowless_app):
+    df = dataset().assign(mac=pd.Categorical(['AA'] * 90), channel=pd.Categorical(['usb'] * 90), Current=1.0)
+    app = windowless_app(df)
+    app.cycle_selection.set('All')
+    app.parameter_selections['Voltage'].set(True)
+    app.drop_filter_data()
+    assert app.parameter_series['Voltage'] == ['Voltage-0', 'Voltage-1', 'Voltage-2']
+    assert app.cycle_split is not None and list(app.cycle_split.columns) == ['Voltage']
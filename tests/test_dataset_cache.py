@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import DatasetCache
+from processing import load_dataset
+from streaming import stream_dataset
+
+
+def test_stream_stores_are_evicted_least_recently_used_first(tmp_path):
+    cache = DatasetCache(tmp_path / 'import_cache', max_bytes=0)
+    stores = []
+    for i in range(3):
+        log = tmp_path / f'log{i}.csv'
+        pd.DataFrame({'Epoch_Time': np.arange(100.0), 'Voltage': np.arange(100.0)}).to_csv(log)
+        store_path = cache.stream_path('single', [log])
+        stream_dataset('single', [log], store_path)
+        os.utime(store_path / 'schema.json', (i, i))     # store 0 was used longest ago
+        stores.append(store_path)
+
+    cache.stream_used(stores[2])
+    assert [p.exists() for p in stores] == [False, False, True]      # the store in use is kept even past max_bytes
+
+    cache.clear()
+    assert not cache.stream_dir.exists()
+
+
+def fridgeplexor_files(tmp_path):
+    # one Mdata and one Ydata file, meter 2 logged packets the yeti never sent
+    mdata = tmp_path / 'mdata.csv'
+    pd.DataFrame({'M_ID': [1, 2, 1, 2, 2], 'packet_num': [0, 0, 1, 1, 2], 'Power': np.arange(5.0)}).to_csv(mdata)
+    ydata = tmp_path / 'ydata.csv'
+    with open(ydata, 'w', newline='') as file:
+        file.write('"{\'AA\': (0, 1), \'BB\': (0, 2)}"\n')
+        pd.DataFrame({'mac': ['AA', 'BB', 'AA', 'BB'], 'channel': 'usb', 'cycle': 0, 'packet_num': [0, 0, 1, 1], 'Load': np.arange(4.0)}).to_csv(file)
+    return [mdata, ydata]
+
+
+def test_a_cached_import_keeps_the_unmatched_counts(tmp_path):
+    cache = DatasetCache(tmp_path / 'import_cache')
+    filenames = fridgeplexor_files(tmp_path)
+
+    texts = []
+    cold, _ = load_dataset('fridgeplexor', filenames, cache=cache)
+    cached, _ = load_dataset('fridgeplexor', filenames, cache=cache, progress=lambda fraction, text: texts.append(text))
+    assert 'Loaded from cache' in texts
+    assert cold.attrs['unmatched'] == cached.attrs['unmatched'] == {'Mdata': 1, 'Ydata': 0}
+
+
+def test_storing_an_import_keeps_the_open_stream_store(tmp_path):
+    cache = DatasetCache(tmp_path / 'import_cache', max_bytes=0)
+    log = tmp_path / 'log.csv'
+    pd.DataFrame({'Epoch_Time': np.arange(100.0), 'Voltage': np.arange(100.0)}).to_csv(log)
+    store_path = cache.stream_path('single', [log])
+    stream_dataset('single', [log], store_path)
+    cache.stream_used(store_path)
+
+    load_dataset('single', [log], cache=cache)      # stored, then evicted past max_bytes
+    assert store_path.exists()
+
+    cache.store_closed(store_path)
+    cache.evict()
+    assert not store_path.exists()
+
+
+def test_a_cached_import_round_trips_and_misses_once_the_file_changes(tmp_path):
+    cache = DatasetCache(tmp_path / 'import_cache')
+    log = tmp_path / 'log.csv'
+    pd.DataFrame({'mac': ['AA', 'BB'] * 5, 'channel': 'usb', 'cycle': 0, 'Epoch_Time': np.arange(10.0), 'Voltage': np.arange(10.0)}).to_csv(log)
+
+    texts = []
+    full_df, filters = load_dataset('single', [log], cache=cache)
+    cached, cached_filters = load_dataset('single', [log], cache=cache, progress=lambda fraction, text: texts.append(text))
+    assert 'Loaded from cache' in texts
+    pd.testing.assert_frame_equal(cached, full_df)
+    assert cached_filters == filters
+
+    texts = []
+    os.utime(log, ns=(0, 0))    # same size, different mtime, the entry no longer applies
+    load_dataset('single', [log], cache=cache, progress=lambda fraction, text: texts.append(text))
+    assert 'Loaded from cache' not in texts
+
+
+def test_feather_entries_are_evicted_least_recently_used_first(tmp_path):
+    cache = DatasetCache(tmp_path / 'import_cache')
+    df = pd.DataFrame({'Voltage': np.arange(1000.0)})
+    logs = []
+    for i in range(3):
+        logs.append(tmp_path / f'log{i}.csv')
+        logs[-1].write_text('')
+        cache.store('single', [logs[-1]], df, None)
+        os.utime(cache.cache_dir / f'{cache.key("single", [logs[-1]])}.feather', (i, i))
+
+    cache.load('single', [logs[0]])     # used again, now the most recent
+    cache.max_bytes = 2 * next(cache.cache_dir.glob('*.feather')).stat().st_size
+    cache.evict()
+    assert [cache.load('single', [log]) is not None for log in logs] == [True, False, True]
@@ -0,0 +1,50 @@
+import matplotlib
+import numpy as np
+
+from decimation import LevelOfDetail, minmax_decimate
+
+matplotlib.use('Agg')
+
+
+def test_minmax_decimate_keeps_every_buckets_extremes():
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.random(10000)) * 100
+    y = rng.normal(size=len(x))
+    y[1234] = 50.0      # a spike a stride would skip
+    keep = minmax_decimate(x, y, 20)
+
+    assert len(keep) <= 2 * 20 + 2 and np.all(np.diff(keep) > 0)
+    assert {0, len(x) - 1, 1234, int(np.argmin(y))} <= set(keep)
+
+    edges = np.linspace(x[0], x[-1], 21)
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        bucket = np.flatnonzero((x >= lo) & (x < hi))
+        if len(bucket):
+            assert y[keep][(x[keep] >= lo) & (x[keep] < hi)].max() == y[bucket].max()
+            assert y[keep][(x[keep] >= lo) & (x[keep] < hi)].min() == y[bucket].min()
+
+    np.testing.assert_array_equal(minmax_decimate(x[:30], y[:30], 20), np.arange(30))    # short enough to draw as is
+
+
+def test_zooming_in_brings_the_detail_back():
+    import matplotlib.pyplot as plt
+
+    _, ax = plt.subplots()
+    lod = LevelOfDetail(ax)
+    x = np.arange(100000.0)
+    y = np.sin(x / 10)
+    line = lod.plot(x, y)
+    assert len(line.get_xdata()) <= 2 * lod.n_buckets() + 2
+
+    ax.set_xlim(500, 600)
+    np.testing.assert_array_equal(line.get_xdata(), x[499:602])     # every point in the window, plus one past each edge
+
+    lod.extend(line, np.arange(100000.0, 100010.0), np.zeros(10))
+    full_x, full_y = lod.full_data(line)
+    assert len(full_x) == len(full_y) == 100010
+
+    shuffled = lod.plot(x[::-1][:50], y[:50])     # unsorted x can't be bucketed, it is drawn as is
+    assert len(shuffled.get_xdata()) == 50
+    lod.remove(shuffled)
+    assert shuffled not in lod.series and shuffled not in ax.lines
+    plt.close('all')
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from derived import DerivedChannels, Expression
+
+UNSAFE = [
+    '__import__("os").system("echo")',     # a call to anything but the functions
+    'open("log.csv")',
+    'Voltage.__class__',                    # attribute access
+    'np.abs(Voltage)',
+    'Voltage[0]',                           # subscripts
+    'lambda: Voltage',
+    '[Voltage, Current]',
+    '(Voltage, Current)',
+    'Voltage if Current else 0',
+    'Voltage > Current',
+    'Voltage and Current',
+    'Voltage // Current',                   # operators outside the arithmetic ones
+    'Voltage @ Current',
+    '~Voltage',
+    'not Voltage',
+    'abs(x=Voltage)',                       # keyword arguments
+    'abs(*Voltage)',
+    '(x := Voltage)',
+    'f"{Voltage}"',
+    'b"Voltage"',
+    'None',
+    '1j * Voltage',
+]
+
+
+@pytest.mark.parametrize('text', UNSAFE)
+def test_anything_but_arithmetic_is_rejected(text):
+    with pytest.raises(ValueError, match='is not allowed'):
+        Expression('Bad', text)
+
+
+def test_expressions_that_dont_parse_or_name_themselves_are_rejected():
+    for definitions in ({'Bad': 'Voltage *'}, {'Bad': 'Bad + 1'}, {'cycle': 'Voltage'}, {' ': 'Voltage'}):
+        with pytest.raises(ValueError):
+            DerivedChannels(definitions)
+
+    channels = DerivedChannels({'Power': 'Voltage * Current'})
+    with pytest.raises(ValueError):
+        channels.parse('Power = Voltage * Current\nEnergy = open("x")')
+    assert list(channels) == ['Power']      # nothing changed
+
+
+def test_channels_are_computed_on_whole_columns():
+    df = pd.DataFrame({'Voltage': np.array([1.0, 4.0, 9.0], dtype='float32'), 'Current': [2.0, 0.0, np.nan], 'Voltage 3': [1.0, 2.0, 3.0]})
+    channels = DerivedChannels()
+    channels.parse('# power and friends\nPower = Voltage * Current\n\nRoot = sqrt(Voltage) - "Voltage 3"\nRatio = Voltage / Current\nTwice = 2 * Power + -1')
+
+    assert channels.available(df.columns) == ['Power', 'Root', 'Ratio', 'Twice']
+    assert channels.available(['Voltage']) == []
+    assert sorted(channels.sources(['Twice', 'Root'])) == ['Current', 'Voltage', 'Voltage 3']
+
+    np.testing.assert_array_equal(channels.evaluate('Root', df), [0, 0, 0])
+    np.testing.assert_array_equal(channels.evaluate('Ratio', df), [.5, np.inf, np.nan])    # no ZeroDivisionError
+    twice = channels.evaluate('Twice', df)
+    assert twice.dtype == 'float64' and twice.tolist()[:2] == [3, -1]
+    assert list(channels.add_to(df).columns) == ['Voltage', 'Current', 'Voltage 3', 'Power', 'Root', 'Ratio', 'Twice']
+    assert 'Power' not in df.columns
+
+    constant = DerivedChannels({'One': '1'})
+    assert constant.evaluate('One', df).tolist() == [1, 1, 1]
+
+
+def test_definitions_round_trip_through_json(tmp_path):
+    channels = DerivedChannels({'Power': 'Voltage * Current', 'Delta': '"Voltage 3" - "Voltage 7"'})
+    channels.save(tmp_path / 'derived' / 'channels.json')
+    loaded = DerivedChannels()
+    loaded.load(tmp_path / 'derived' / 'channels.json')
+    assert loaded.definitions() == channels.definitions() and loaded.text() == channels.text()
@@ -0,0 +1,56 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from derived import DerivedChannels
+from export import export_groups
+from processing import ImportCancelled, build_group_index
+
+
+def test_groups_are_exported_with_derived_channels(tmp_path):
+    full_df = pd.DataFrame({'mac': ['AA'] * 3 + ['BB'] * 3, 'channel': 'usb', 'cycle': 0, 'Epoch_Time': np.arange(6.0),
+                            'Voltage': np.arange(6.0), 'Current': np.full(6, 2.0)})
+    derived = DerivedChannels({'Power': 'Voltage * Current', 'Double Power': '2 * Power'})
+
+    written = export_groups(full_df, build_group_index(full_df), tmp_path, columns=['Epoch_Time', 'Double Power'], derived=derived, chunk_rows=2)
+    exported = pd.read_csv(tmp_path / 'BB_usb_0.csv')
+    assert [rows for path, rows in written] == [3, 3]
+    assert list(exported.columns) == ['Epoch_Time', 'Double Power']      # Voltage and Current are only read to compute it
+    assert exported['Double Power'].tolist() == [12.0, 16.0, 20.0]
+
+    export_groups(full_df, build_group_index(full_df), tmp_path / 'all', derived=derived)
+    assert list(pd.read_csv(tmp_path / 'all' / 'AA_usb_0.csv').columns) == ['Epoch_Time', 'Voltage', 'Current', 'Power', 'Double Power']
+
+
+def test_parquet_export_reads_back_the_filter_values(tmp_path):
+    full_df = pd.DataFrame({'mac': ['00:1B:44'] * 2 + ['00:1B:45/a b'] * 2, 'channel': 'usb', 'cycle': [0, 1, 0, 1], 'Voltage': np.arange(4.0)})
+
+    export_groups(full_df, build_group_index(full_df), tmp_path, format='parquet')
+    read = pd.read_parquet(tmp_path).sort_values('Voltage')
+    assert read['mac'].astype(str).tolist() == full_df['mac'].tolist()
+    assert read['cycle'].astype(int).tolist() == [0, 1, 0, 1]
+
+
+def test_every_group_matches_its_filtered_view(tmp_path):
+    rng = np.random.default_rng(0)
+    full_df = pd.DataFrame({'mac': pd.Categorical(rng.choice(['AA', 'BB'], 300)), 'channel': pd.Categorical(rng.choice(['usb', 'ac'], 300)),
+                            'cycle': rng.integers(0, 3, 300), 'Epoch_Time': rng.permutation(300).astype('float64'), 'Voltage': rng.random(300)})
+    group_index = build_group_index(full_df)
+
+    written = export_groups(full_df, group_index, tmp_path, compression='gzip', sort_by='Epoch_Time', prefix='run_', chunk_rows=7)
+    assert len(written) == len(group_index.groups) and sum(rows for _, rows in written) == 300
+    for mac, channel, cycle in group_index.groups:
+        exported = pd.read_csv(tmp_path / f'run_{mac}_{channel}_{cycle}.csv.gz')
+        view = group_index.select(mac, channel, cycle, 'Epoch_Time').reset_index(drop=True)
+        pd.testing.assert_frame_equal(exported, view, check_dtype=False)
+
+
+def test_a_cancelled_export_leaves_no_half_written_group(tmp_path):
+    full_df = pd.DataFrame({'mac': 'AA', 'channel': 'usb', 'cycle': np.repeat([0, 1], 50), 'Voltage': np.arange(100.0)})
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ImportCancelled):
+        export_groups(full_df, build_group_index(full_df), tmp_path, cancel=cancel, chunk_rows=10, workers=1)
+    assert not list(tmp_path.iterdir())
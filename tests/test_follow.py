@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from streaming import LiveTail
+
+
+def rows(start, count):
+    epoch = np.arange(start, start + count, dtype='float64')
+    return pd.DataFrame({'mac': pd.Categorical(['AA'] * count), 'channel': pd.Categorical(['usb'] * count), 'cycle': np.zeros(count, dtype='int64'),
+                         'Epoch_Time': epoch, 'Voltage': epoch / 10, 'Current': np.full(count, 2.0)})
+
+
+def test_follow_extends_a_plotted_derived_channel(windowless_app):
+    app = windowless_app(rows(0, 10))
+    app.parameter_selections['Power'].set(True)
+    app.drop_filter_data()
+    app.update_graph()
+    assert 'Power' in app.series
+
+    app.append_rows(rows(10, 5))
+
+    x, y, raw_y = app.readout.series['Power']
+    np.testing.assert_array_equal(raw_y, y)     # not normalized, the readout shows the plotted values
+    assert len(x) == 15
+    np.testing.assert_allclose(y, np.arange(15) / 10 * 2.0)
+
+    app.update_graph()      # folds the rows in, the derived column is computed again for every row
+    np.testing.assert_allclose(app.filtered_df['Power'], np.arange(15) / 10 * 2.0)
+
+
+def test_a_half_written_line_waits_for_the_next_poll(tmp_path):
+    log = tmp_path / 'log.csv'
+    log.write_text('Epoch_Time,Voltage\n0,0.5\n1,1.5\n2,2')     # the logger is in the middle of row 2
+    tail = LiveTail('single', [log])
+    assert tail.poll()['Epoch_Time'].tolist() == [0, 1]
+    assert tail.poll().empty
+
+    with open(log, 'a') as file:
+        file.write('.5\n3,3.5\n')
+    new = tail.poll()
+    assert new['Epoch_Time'].tolist() == [2, 3] and new['Voltage'].tolist() == [2.5, 3.5]
+    assert tail.unmatched is None
+
+
+def test_a_followed_fridgeplexor_pair_joins_as_packets_arrive(tmp_path):
+    mdata = tmp_path / 'mdata.csv'
+    ydata = tmp_path / 'ydata.csv'
+    mdata.write_text('M_ID,packet_num,Power\n1,0,0.5\n1,1,1.5\n1,2,2.5\n')
+    ydata.write_text('"{\'AA\': (0, 1)}"\nmac,channel,cycle,packet_num,Load\nAA,usb,0,0,10.5\n')
+    tail = LiveTail('fridgeplexor', [mdata, ydata])
+    assert tail.poll().empty        # packet 0 may still get a second Ydata row, nothing is joined until a later packet shows up
+
+    with open(ydata, 'a') as file:
+        file.write('AA,usb,0,1,11.5\nAA,usb,0,2,12.5\n')
+    new = tail.poll()
+    assert new['Power'].tolist() == [0.5, 1.5] and new['Load'].tolist() == [10.5, 11.5]     # packet 2 is the last one read, it waits
+    assert tail.unmatched == {'Mdata': 0, 'Ydata': 0}
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+
+def dataset():
+    epoch = np.arange(30, dtype='float64')
+    return pd.DataFrame({'mac': pd.Categorical(['AA'] * 30), 'channel': pd.Categorical(['usb'] * 30), 'cycle': np.repeat([0, 1, 2], 10),
+                         'Epoch_Time': epoch, 'Voltage': epoch / 10, 'Current': np.full(30, 2.0)})
+
+
+def test_toggling_a_parameter_only_touches_its_own_line(windowless_app):
+    app = windowless_app(dataset())
+    app.parameter_selections['Voltage'].set(True)
+    app.drop_filter_data()
+    voltage = app.series['Voltage'][2]
+
+    app.parameter_selections['Current'].set(True)
+    app.update_graph()
+    assert app.series['Voltage'][2] is voltage      # not replotted
+    assert set(app.series) == {'Voltage', 'Current'} and set(app.summary_rows) == {'Epoch_Time', 'Voltage', 'Current'}
+
+    app.parameter_selections['Current'].set(False)
+    app.update_graph()
+    assert app.series['Voltage'][2] is voltage and set(app.series) == {'Voltage'}
+    assert 'Current' not in app.summary_rows and 'Current' not in app.readout.series
+    assert list(app.ax1.lines) == [voltage]
+
+
+def test_a_new_selection_replots_every_line(windowless_app):
+    app = windowless_app(dataset())
+    app.parameter_selections['Voltage'].set(True)
+    app.drop_filter_data()
+    voltage = app.series['Voltage'][2]
+
+    app.normalize_state.set(1)
+    app.update_graph()
+    assert app.series['Voltage'][2] is not voltage
+    np.testing.assert_allclose(app.series['Voltage'][2].get_ydata(), np.arange(10) / 9)     # cycle 0 on its own, min-max normalized
+
+    app.cycle_selection.set('1')
+    app.drop_filter_data()
+    np.testing.assert_allclose(app.readout.series['Voltage'][2], np.arange(10, 20) / 10)    # the summary shows the raw values
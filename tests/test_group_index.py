@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from processing import GroupIndex, build_group_index, filter_data
+
+
+def dataset():
+    rng = np.random.default_rng(0)
+    rows = 500
+    return pd.DataFrame({'mac': pd.Categorical(rng.choice(['AA', 'BB'], rows)), 'channel': pd.Categorical(rng.choice(['usb', 'ac'], rows)),
+                         'cycle': rng.integers(0, 3, rows), 'Epoch_Time': rng.permutation(rows).astype('float64'), 'Voltage': rng.random(rows)})
+
+
+def query(df, mac, channel, cycle, sort_by):
+    # the string built query the index replaced
+    text = f'mac == "{mac}" and channel == "{channel}"' + ('' if cycle == 'All' else f' and cycle == {cycle}')
+    drop = ['mac', 'channel'] if cycle == 'All' else ['mac', 'channel', 'cycle']
+    return df.query(text).drop(columns=drop).sort_values(sort_by, kind='stable')
+
+
+def test_select_matches_the_query():
+    df = dataset()
+    index = build_group_index(df)
+    for mac in ('AA', 'BB'):
+        for channel in ('usb', 'ac'):
+            for cycle in ('0', '1', '2', 'All'):
+                pd.testing.assert_frame_equal(index.select(mac, channel, cycle, 'Epoch_Time'), query(df, mac, channel, cycle, 'Epoch_Time'))
+
+    assert index.select('CC', 'usb', '0', 'Epoch_Time').empty
+    assert build_group_index(df.drop(columns=['cycle'])) is None
+    assert filter_data(df, None, 'AA', 'usb', '0', 'Epoch_Time') is df      # nothing to filter on
+
+
+def test_select_keeps_the_last_views():
+    index = GroupIndex(dataset(), max_views=2)
+    first = index.select('AA', 'usb', '0', 'Epoch_Time')
+    index.select('AA', 'usb', '1', 'Epoch_Time')
+    assert index.select('AA', 'usb', '0', 'Epoch_Time') is first      # a hit, and now the most recent
+    index.select('AA', 'usb', '2', 'Epoch_Time')
+
+    assert list(index.views) == [('AA', 'usb', '0', 'Epoch_Time'), ('AA', 'usb', '2', 'Epoch_Time')]
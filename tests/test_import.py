@@ -0,0 +1,39 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing import ImportCancelled, load_dataset
+
+
+def meter_log(tmp_path):
+    log = tmp_path / 'log.csv'
+    pd.DataFrame({'M_ID': np.tile([1, 2], 50), 'Voltage': np.arange(100.0), 'Time': np.repeat([f't{i}' for i in range(50)], 2),
+                  'Epoch_Time': np.repeat(np.arange(50.0), 2)}).to_csv(log)
+    return log
+
+
+def test_load_dataset_reports_progress_up_to_done(tmp_path):
+    reports = []
+    full_df, filters = load_dataset('single', [meter_log(tmp_path)], progress=lambda fraction, text: reports.append((fraction, text)))
+
+    fractions = [fraction for fraction, _ in reports]
+    assert fractions == sorted(fractions) and reports[-1] == (1, 'Done')
+    assert 'Reshaping meters' in [text for _, text in reports]
+    assert list(full_df.columns) == ['Voltage 1', 'Epoch_Time', 'Voltage 2'] and len(full_df) == 50
+    assert filters is None
+
+
+def test_a_cancelled_import_raises_between_stages(tmp_path):
+    cancel = threading.Event()
+    reports = []
+
+    def progress(fraction, text):
+        reports.append(text)
+        if text == 'Reshaping meters':
+            cancel.set()
+
+    with pytest.raises(ImportCancelled):
+        load_dataset('single', [meter_log(tmp_path)], progress=progress, cancel=cancel)
+    assert 'Dropping unused columns' not in reports      # nothing after the stage that saw the cancel ran
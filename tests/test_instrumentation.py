@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from instrumentation import Instrumentation, format_bytes, format_record
+from processing import ImportCancelled
+
+
+def test_an_operation_records_its_stages_and_status(tmp_path):
+    instruments = Instrumentation(tmp_path, keep=2)
+    with instruments.operation('filter', rows_in=100) as timings:
+        with timings.stage('select', rows_in=100) as stage:
+            stage['rows_out'] = 10
+        timings.mark('sort')
+        timings.rows_out = 10
+
+    record = instruments.records[-1]
+    assert (record['operation'], record['status'], record['rows_in'], record['rows_out']) == ('filter', 'done', 100, 10)
+    assert [(s['stage'], s['rows_in'], s['rows_out'], s['bytes']) for s in record['stages']] == [('select', 100, 10, None), ('sort', None, None, None)]
+    assert record['seconds'] >= sum(s['seconds'] for s in record['stages'])
+
+    with pytest.raises(ImportCancelled):
+        with instruments.operation('import'):
+            raise ImportCancelled()
+    assert instruments.records[-1]['status'] == 'ImportCancelled'
+
+    with instruments.operation('redraw'):
+        pass
+    assert [r['operation'] for r in instruments.records] == ['import', 'redraw']      # only the last keep
+
+
+def test_memory_logging_and_profiling_are_opt_in(tmp_path):
+    instruments = Instrumentation(tmp_path)
+    instruments.log_to_file = True
+    instruments.set_track_memory(True)
+    instruments.profile_next()
+    try:
+        with instruments.operation('import') as timings:
+            with timings.stage('read'):
+                timings.rows_out = len([0] * 100000)     # 800 kB at its peak
+    finally:
+        instruments.set_track_memory(False)
+
+    record = instruments.records[-1]
+    assert record['stages'][0]['bytes'] >= 800000 and record['bytes'] is not None
+    assert record['profile'].endswith('.prof') and (tmp_path / 'timings.jsonl').exists()
+    assert json.loads((tmp_path / 'timings.jsonl').read_text())['operation'] == 'import'
+
+    with instruments.operation('redraw'):     # profile_next only applies to one operation
+        pass
+    assert instruments.records[-1]['profile'] is None and instruments.records[-1]['bytes'] is None
+
+
+def test_format_record():
+    record = {'operation': 'import', 'status': 'done', 'seconds': .5, 'rows_in': None, 'rows_out': 10, 'bytes': 2048, 'profile': None,
+              'stages': [{'stage': 'read', 'seconds': .25, 'rows_in': 5, 'rows_out': None, 'bytes': None}]}
+    assert format_record(record).split('\n') == [f'{"import":<22}    500.0 ms  out 10  2 KiB', f'  {"read":<20}    250.0 ms  in 5']
+    assert format_bytes(3 * 1024**3) == '3.0 GiB'
@@ -0,0 +1,151 @@
+from functools import reduce
+
+import pandas as pd
+
+from processing import concat_frames, join_packets, load_dataset, pivot_meters, split_fridgeplexor
+from streaming import MeterPivot, PacketJoin
+
+# the reshape and joins against the pd.merge chains they replaced, on logs with gaps, duplicate packet numbers and files out of order
+
+ASSOCIATIONS = {'AA': 1, 'BB': 2}
+
+
+def merge_meters(df):
+    # the original per meter mask + merge chain
+    frames = []
+    for meter in df['M_ID'].unique():
+        frame = df[df['M_ID'] == meter].drop(columns=['M_ID', 'Unnamed: 0'])
+        frame.columns = [f'{col} {str(meter)}' for col in frame.columns if col not in ('Time', 'Epoch_Time')] + ['Time', 'Epoch_Time']
+        frames.append(frame)
+    return reduce(lambda left, right: pd.merge(left, right, on=['Time', 'Epoch_Time']), frames)
+
+
+def merge_packets(mdata, ydata):
+    # the original inner merge on (M_ID, packet_num)
+    return mdata.merge(ydata, on=['M_ID', 'packet_num'], how='inner')
+
+
+def meter_log():
+    # meters 1-3 every sample, meter 2 misses sample 4 and meter 3 logs before meter 1 from sample 6 on
+    rows = []
+    for sample in range(10):
+        meters = [3, 1, 2] if sample >= 6 else [1, 2, 3]
+        rows += [(meter, sample * 10 + meter, sample * .5, f't{sample}', 1000.0 + sample) for meter in meters if (meter, sample) != (2, 4)]
+    df = pd.DataFrame(rows, columns=['M_ID', 'Voltage', 'Current', 'Time', 'Epoch_Time'])
+    return df.reset_index().rename(columns={'index': 'Unnamed: 0'})
+
+
+def packet_logs():
+    # Mdata for meters 1 and 2 with packet 3 missing for meter 1 and packet 5 logged twice for meter 2, Ydata with packet 7 missing for AA,
+    # packet 5 twice for BB and a meter (CC) the association header doesn't have
+    mdata = pd.DataFrame([(m, p, p * 10.0 + m) for p in range(10) for m in (1, 2) if (m, p) != (1, 3)] + [(2, 5, 99.0)],
+                         columns=['M_ID', 'packet_num', 'Power']).sort_values(['packet_num', 'M_ID'], kind='stable', ignore_index=True)
+    ydata = pd.DataFrame([(mac, p, p * 2.0, 'usb', 0) for p in range(10) for mac in ('AA', 'BB', 'CC') if (mac, p) != ('AA', 7)] + [('BB', 5, -1.0, 'usb', 0)],
+                         columns=['mac', 'packet_num', 'Load', 'channel', 'cycle']).sort_values(['packet_num', 'mac'], kind='stable', ignore_index=True)
+    ydata['M_ID'] = ydata['mac'].map(ASSOCIATIONS)
+    return mdata, ydata
+
+
+def same_rows(result, expected, keys):
+    # the joins may order rows differently within a packet, compared sorted on every column
+    result = result[list(expected.columns)].sort_values(keys + [c for c in expected.columns if c not in keys], ignore_index=True)
+    expected = expected.sort_values(keys + [c for c in expected.columns if c not in keys], ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+
+
+def test_pivot_meters_matches_the_merge_chain():
+    df = meter_log()
+    pd.testing.assert_frame_equal(pivot_meters(df), merge_meters(df), check_dtype=False)
+
+
+def test_meter_pivot_matches_the_merge_chain():
+    df = meter_log()
+    for chunk_rows in (2, 4, 7):
+        pivot = MeterPivot()
+        pieces = [pivot.feed(df.iloc[start:start + chunk_rows].reset_index(drop=True)) for start in range(0, len(df), chunk_rows)] + [pivot.flush()]
+        streamed = pd.concat([p for p in pieces if p is not None], ignore_index=True)
+        pd.testing.assert_frame_equal(streamed, merge_meters(df), check_dtype=False)
+
+
+def test_join_packets_matches_the_merge():
+    mdata, ydata = packet_logs()
+    expected = merge_packets(mdata, ydata)
+
+    joined, unmatched = join_packets(mdata, ydata)
+    same_rows(joined, expected, ['packet_num', 'M_ID'])
+    assert unmatched == {'Mdata': 1, 'Ydata': 11}     # meter 1 packet 7, CC's 10 rows and BB's packet 3
+
+    # files read out of order, the later Mdata and Ydata files first
+    mdata_files = [mdata[mdata['packet_num'] >= 5], mdata[mdata['packet_num'] < 5]]
+    ydata_files = [ydata[ydata['packet_num'] >= 5], ydata[ydata['packet_num'] < 5]]
+    joined, _ = join_packets(concat_frames(mdata_files), concat_frames(ydata_files))
+    same_rows(joined, expected, ['packet_num', 'M_ID'])
+
+
+def test_packet_join_matches_the_merge():
+    mdata, ydata = packet_logs()
+    expected = merge_packets(mdata, ydata).drop(columns=['packet_num'])
+    ydata = ydata.drop(columns=['M_ID'])    # PacketJoin looks the meters up itself
+
+    for chunk_rows in (1, 3, 8):
+        join = PacketJoin(ASSOCIATIONS)
+        pieces = []
+        for start in range(0, max(len(mdata), len(ydata)), chunk_rows):
+            join.feed(0, mdata.iloc[start:start + chunk_rows].copy())
+            join.feed(1, ydata.iloc[start:start + chunk_rows].copy())
+            pieces.append(join.joined())
+        pieces.append(join.joined(done=(True, True)))
+        same_rows(pd.concat([p for p in pieces if p is not None], ignore_index=True), expected, ['M_ID'])
+        assert join.unmatched == {'Mdata': 1, 'Ydata': 11}      # the same rows join_packets counts
+
+
+
+def test_packet_join_lets_go_of_a_meter_only_one_file_has():
+    # meter 3 is associated (DD) but its yeti never logged, its Mdata rows must not wait for Ydata forever
+    mdata = pd.DataFrame([(m, p, float(p)) for p in range(20) for m in (1, 3)], columns=['M_ID', 'packet_num', 'Power'])
+    ydata = pd.DataFrame([('AA', p, float(p)) for p in range(20)], columns=['mac', 'packet_num', 'Load'])
+
+    join = PacketJoin({'AA': 1, 'DD': 3})
+    for start in range(0, 20, 4):
+        join.feed(0, mdata[mdata['packet_num'].between(start, start + 3)].copy())
+        join.feed(1, ydata[ydata['packet_num'].between(start, start + 3)].copy())
+        join.joined()
+        assert len(join.buffers[0]) <= 2 and len(join.buffers[1]) <= 1      # only the last packet read is held back
+
+    join.joined(done=(True, True))
+    assert join.unmatched == {'Mdata': 20, 'Ydata': 0}
+
+
+def test_pivot_meters_with_a_fixed_meter_set():
+    # meters fixes the columns even when a meter is missing, samples it didn't log are dropped like the inner merge would
+    df = meter_log()
+    wide = pivot_meters(df, meters=[2, 1])
+    assert list(wide.columns) == ['Voltage 2', 'Current 2', 'Time', 'Epoch_Time', 'Voltage 1', 'Current 1']
+    assert 't4' not in set(wide['Time'])
+
+    df = pd.concat([df, df.iloc[[0]]], ignore_index=True)     # meter 1 logging sample 0 twice keeps its first row
+    pd.testing.assert_frame_equal(pivot_meters(df), merge_meters(df.iloc[:-1]), check_dtype=False)
+
+
+def test_a_fixture_logged_by_several_yetis_imports_like_one_pair(tmp_path):
+    mdata, ydata = packet_logs()
+    ydata = ydata.drop(columns=['M_ID'])
+    header = f'"{ {mac: (0, meter) for mac, meter in ASSOCIATIONS.items()}!r}"\n'     # mac -> (port, M_ID)
+
+    def write(name, frame, associations=False):
+        path = tmp_path / name
+        with open(path, 'w', newline='') as file:
+            if associations:
+                file.write(header)
+            frame.to_csv(file)
+        return path
+
+    pair = [write('Ydata.csv', ydata, True), write('Mdata.csv', mdata)]
+    files = [write('Mdata_2.csv', mdata[mdata['M_ID'] == 2]), write('Ydata_BB.csv', ydata[ydata['mac'] != 'AA'], True),
+             write('Mdata_1.csv', mdata[mdata['M_ID'] == 1]), write('Ydata_AA.csv', ydata[ydata['mac'] == 'AA'], True)]
+    assert [len(found) for found in split_fridgeplexor(files)] == [2, 2]
+
+    expected, _ = load_dataset('fridgeplexor', pair)
+    combined, _ = load_dataset('fridgeplexor', files)
+    same_rows(combined, expected, ['M_ID'])
+    assert combined.attrs['unmatched'] == expected.attrs['unmatched'] == {'Mdata': 1, 'Ydata': 11}
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing import Normalizer, normalize
+
+
+def dataset():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'cycle': np.repeat([0, 1, 2], 40), 'Epoch_Time': np.arange(120.0),
+                         'Voltage': (rng.random(120) + np.repeat([0, 10, 20], 40)).astype('float32'), 'Flat': np.ones(120)})
+
+
+def test_every_mode_matches_a_direct_computation():
+    df = dataset()
+    normalizer = Normalizer(df)
+    voltage = df['Voltage'].astype('float64')
+
+    np.testing.assert_allclose(normalizer.column('Voltage', 'min-max'), (voltage - voltage.min()) / (voltage.max() - voltage.min()), rtol=1e-6)
+    np.testing.assert_allclose(normalizer.column('Voltage', 'z-score'), (voltage - voltage.mean()) / voltage.std(ddof=0), rtol=1e-5, atol=1e-6)
+    per_cycle = voltage.groupby(df['cycle']).transform(lambda v: (v - v.min()) / (v.max() - v.min()))
+    np.testing.assert_allclose(normalizer.column('Voltage', 'per-cycle'), per_cycle, rtol=1e-5, atol=1e-6)
+
+    assert normalizer.column('Voltage', 'min-max').dtype == 'float32'      # keeps the column's precision
+    np.testing.assert_array_equal(normalizer.column('Flat', 'min-max'), 0)      # no division by 0
+    with pytest.raises(ValueError):
+        normalizer.column('Voltage', 'log')
+
+
+def test_columns_are_normalized_once_and_only_when_asked_for():
+    df = dataset()
+    normalizer = Normalizer(df)
+    first = normalizer.column('Voltage', 'min-max')
+    normalizer.column('Voltage', 'z-score')
+    assert normalizer.column('Voltage', 'min-max') is first
+    assert list(normalizer.stats) == ['Voltage']       # one groupby for both modes, nothing for the other columns
+
+    normalized = normalize(df, 'Epoch_Time')
+    pd.testing.assert_series_equal(normalized['Epoch_Time'], df['Epoch_Time'])     # nor the x axis or cycle
+    pd.testing.assert_series_equal(normalized['cycle'], df['cycle'])
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from processing import SNIFF_ROWS, read_compact
+from streaming import stream_dataset
+
+
+def precision_log(tmp_path):
+    # a coarse column and one whose values only get fine grained after the sampled rows, float32 can't hold 1e6 + 0.01 steps
+    rows = SNIFF_ROWS * 3
+    fine = np.r_[np.arange(SNIFF_ROWS) * 1.0, 1e6 + np.arange(rows - SNIFF_ROWS) * .01]
+    log = tmp_path / 'log.csv'
+    pd.DataFrame({'Epoch_Time': np.arange(rows, dtype='float64'), 'Coarse': np.arange(rows) * .5, 'Fine': fine}).to_csv(log)
+    return log, fine
+
+
+def test_read_compact_downcasts_only_columns_that_keep_their_precision(tmp_path):
+    log, fine = precision_log(tmp_path)
+    df = read_compact(log)
+    assert df['Coarse'].dtype == 'float32' and df['Fine'].dtype == 'float64'
+    np.testing.assert_array_equal(df['Fine'], fine)
+
+
+def test_streaming_widens_a_column_a_later_chunk_needs_float64_for(tmp_path):
+    log, fine = precision_log(tmp_path)
+    store, _ = stream_dataset('single', [log], tmp_path / 'store', chunk_rows=SNIFF_ROWS)
+    assert store.dtypes['Coarse'] == 'float32' and store.dtypes['Fine'] == 'float64'
+    np.testing.assert_array_equal(store['Fine'], fine)     # the float32 rows written before were widened too
+
+
+def test_read_compact_keeps_identifiers_and_keys_compact_and_exact(tmp_path):
+    log = tmp_path / 'log.csv'
+    pd.DataFrame({'mac': ['AA', 'BB'] * 50, 'channel': 'usb', 'cycle': 0, 'packet_num': np.arange(100), 'Epoch_Time': 1.7e9 + np.arange(100) * .1,
+                  'Count': np.arange(100), 'Voltage': np.arange(100) * .5, 'Note': 'text'}).to_csv(log)
+
+    df = read_compact(log)
+    assert list(df.columns) == ['mac', 'channel', 'cycle', 'packet_num', 'Epoch_Time', 'Count', 'Voltage']     # index and text never parsed
+    assert df['mac'].dtype == 'category' and df['channel'].dtype == 'category'
+    assert df['packet_num'].dtype == 'int64' and df['Epoch_Time'].dtype == 'float64'
+    assert df['Count'].dtype == 'int8' and df['Voltage'].dtype == 'float32'
+
+    assert read_compact(log, downcast=False)['Voltage'].dtype == 'float64'
@@ -0,0 +1,39 @@
+import numpy as np
+
+from readout import Readout
+
+
+def brute_force(x, y, x_value):
+    # the argmin scan the readout replaced, the first of two equally near points wins
+    i = int(np.argmin(np.abs(x - x_value)))
+    return x[i], y[i]
+
+
+def test_nearest_matches_a_scan():
+    rng = np.random.default_rng(0)
+    x = rng.permutation(500).astype('float64')      # unsorted
+    y = rng.random(500)
+    readout = Readout()
+    readout.add('Voltage', x, y, y * 10)
+
+    order = np.argsort(x, kind='stable')
+    for x_value in np.r_[rng.uniform(-10, 510, 300), np.arange(0, 500, .5)]:    # and every tie halfway between two points
+        nearest_x, nearest_y, raw_y = readout.nearest('Voltage', x_value)
+        assert (nearest_x, nearest_y) == brute_force(x[order], y[order], x_value)
+        assert raw_y == nearest_y * 10
+
+    readout.add('Empty', [], [])
+    assert readout.nearest('Empty', 1.0) is None
+
+
+def test_extended_series_stay_sorted():
+    readout = Readout()
+    readout.add('Voltage', [0.0, 1.0, 2.0], [0.0, 1.0, 2.0])
+    readout.extend('Voltage', [3.0, 4.0], [3.0, 4.0])
+    assert 'Voltage' in readout.buffers      # appended in place
+    readout.extend('Voltage', [1.5], [1.5])  # before the end, sorted in
+    np.testing.assert_array_equal(readout.series['Voltage'][0], [0, 1, 1.5, 2, 3, 4])
+    assert readout.nearest('Voltage', 1.6)[0] == 1.5
+
+    readout.remove('Voltage')
+    assert 'Voltage' not in readout.series and 'Voltage' not in readout.buffers
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+import session
+from session import load_run, load_session
+from streaming import ColumnStore
+
+
+def write_log(path, offset):
+    pd.DataFrame({'mac': 'AA', 'channel': 'usb', 'cycle': [0, 0, 1, 1], 'Epoch_Time': np.arange(4.0) + offset, 'Voltage': np.arange(4.0)}).to_csv(path)
+    return path
+
+
+def test_a_streamable_run_is_spilled_without_a_whole_import(tmp_path, monkeypatch):
+    def whole_import(*args, **kwargs):
+        raise AssertionError('load_dataset holds the whole run in memory')
+    monkeypatch.setattr(session, 'load_dataset', whole_import)
+
+    filters = load_run('single', [write_log(tmp_path / 'log.csv', 0)], tmp_path / 'store')
+    assert filters == (['AA'], ['usb'], ['0', '1', 'All'])
+    assert len(ColumnStore(tmp_path / 'store')) == 4
+
+
+def test_a_session_view_has_the_x_axis_of_every_run(tmp_path):
+    jobs = [('single', [write_log(tmp_path / 'a.csv', 0)]), ('single', [write_log(tmp_path / 'b.csv', 10)])]
+    loaded = load_session(jobs, tmp_path / 'sessions', workers=2)
+    try:
+        view = loaded.select('AA', 'usb', '1', 'Epoch_Time')
+        np.testing.assert_array_equal(view.x_values(), [2, 3, 12, 13])
+        np.testing.assert_array_equal(view.series('b: Voltage')[0], [12, 13])
+    finally:
+        loaded.close()
+
+
+def test_a_run_that_fails_is_left_out_of_the_session(tmp_path):
+    bad = tmp_path / 'run' / 'bad.csv'
+    bad.parent.mkdir()
+    bad.write_text('Epoch_Time,Voltage\n1,2,3,4\n"')
+    jobs = [('single', [write_log(tmp_path / 'run.csv', 0)]), ('single', [write_log(tmp_path / 'run' / 'run.csv', 10)]), ('single', [bad])]
+    loaded = load_session(jobs, tmp_path / 'sessions', workers=2)
+    try:
+        assert [run.label for run in loaded.runs] == ['run', 'run (2)']     # same file name, numbered
+        assert [label for label, _ in loaded.errors] == ['bad']
+        assert list(loaded.parameters) == ['run: Epoch_Time', 'run: Voltage', 'run (2): Epoch_Time', 'run (2): Voltage']
+        assert loaded.filter_values() == (['AA'], ['usb'], ['0', '1', 'All']) and len(loaded) == 8
+    finally:
+        loaded.close()
+    assert not loaded.path.exists()
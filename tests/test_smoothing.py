@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import Var
+
+from processing import Smoother, smooth_series
+from readout import Readout
+
+
+def test_every_mode_matches_pandas():
+    rng = np.random.default_rng(0)
+    x = np.arange(200.0) * .25
+    y = rng.normal(size=200)
+
+    np.testing.assert_allclose(smooth_series(x, y, 'rolling mean', 5)[1], pd.Series(y).rolling(5, min_periods=1, center=True).mean())
+    np.testing.assert_allclose(smooth_series(x, y, 'rolling median', 5)[1], pd.Series(y).rolling(5, min_periods=1, center=True).median())
+    np.testing.assert_allclose(smooth_series(x, y, 'ema', 5)[1], pd.Series(y).ewm(span=5, adjust=False).mean())
+
+    resampled_x, resampled_y = smooth_series(x, y, 'resample', 2)     # 8 points per 2 s bucket
+    expected = pd.DataFrame({'x': x, 'y': y}).groupby(np.floor(x / 2)).mean()
+    np.testing.assert_allclose(resampled_x, expected['x'])
+    np.testing.assert_allclose(resampled_y, expected['y'])
+
+    with pytest.raises(ValueError):
+        smooth_series(x, y, 'spline', 5)
+    assert len(smooth_series(np.array([]), np.array([]), 'ema', 5)[0]) == 0
+
+
+def test_smoothed_series_are_cached_per_mode_and_window():
+    smoother = Smoother(None)
+    x, y = np.arange(10.0), np.arange(10.0) ** 2
+    first = smoother.series('Voltage', 'raw', x, y, 'ema', 3)
+    assert smoother.series('Voltage', 'raw', x, y, 'ema', 3) is first
+    assert smoother.series('Voltage', 'raw', x, y, 'ema', 4) is not first
+    assert len(smoother.values) == 2
+
+
+def test_the_readout_snaps_to_raw_points_and_reads_the_smoothed_line():
+    readout = Readout()
+    x, y = np.arange(10.0), np.arange(10.0) ** 2
+    readout.add('Voltage', x, y)
+    readout.add_smoothed('Voltage', *smooth_series(x, y, 'resample', 2))
+    assert readout.nearest('Voltage', 4.2)[:2] == (4, 16)
+    assert readout.nearest_smoothed('Voltage', 4.2)[:2] == (4.5, 20.5)     # the bucket of 4 and 5
+    assert readout.nearest_smoothed('Current', 4.2) is None
+
+    readout.add('Voltage', x, y)        # plotted again without smoothing
+    assert readout.nearest_smoothed('Voltage', 4.2) is None
+
+
+def test_a_smoothed_line_is_plotted_with_its_raw_readout(windowless_app):
+    epoch = np.arange(20, dtype='float64')
+    app = windowless_app(pd.DataFrame({'mac': pd.Categorical(['AA'] * 20), 'channel': pd.Categorical(['usb'] * 20), 'cycle': np.zeros(20, dtype='int64'),
+                                       'Epoch_Time': epoch, 'Voltage': epoch, 'Current': np.full(20, 2.0)}))
+    app.smooth_state.set(1)
+    app.smooth_mode, app.smooth_window = Var('resample'), Var('5')
+    app.parameter_selections['Voltage'].set(True)
+    app.drop_filter_data()
+
+    np.testing.assert_allclose(app.series['Voltage'][2].get_xdata(), [2, 7, 12, 17])
+    assert len(app.readout.series['Voltage'][0]) == 20 and len(app.readout.smoothed['Voltage'][0]) == 4
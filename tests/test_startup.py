@@ -0,0 +1,24 @@
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / 'src'
+
+# a fresh interpreter, the test process already has pandas and matplotlib imported. customtkinter is stubbed, there is no display here
+CHECK = '''
+import sys, types
+ctk = types.ModuleType('customtkinter')
+ctk.CTk = ctk.CTkFrame = type('CTk', (), {})
+ctk.set_appearance_mode = lambda mode: None
+sys.modules['customtkinter'] = ctk
+
+import postprocessing_app
+print(sorted(m for m in ('pandas', 'numpy', 'matplotlib', 'pyarrow', 'processing') if m in sys.modules))
+postprocessing_app.load_libraries()
+print(postprocessing_app.pd.__name__, postprocessing_app.load_dataset.__module__)
+'''
+
+
+def test_the_window_module_imports_without_the_heavy_libraries():
+    result = subprocess.run([sys.executable, '-c', CHECK], cwd=SRC, capture_output=True, text=True, check=True)
+    assert result.stdout.split('\n')[:2] == ['[]', 'pandas processing']
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from processing import CycleStatistics
+
+
+def test_cycle_statistics_match_a_groupby():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'cycle': rng.integers(0, 4, 200), 'Epoch_Time': np.arange(200.0), 'Voltage': rng.normal(size=200).astype('float32')})
+    df.loc[3, 'Voltage'] = np.nan
+
+    statistics = CycleStatistics(df, 'Epoch_Time')
+    assert statistics.stats == {}       # nothing is aggregated until a table is asked for
+    table = statistics.table('Voltage')
+
+    grouped = df['Voltage'].astype('float64').groupby(df['cycle'])
+    np.testing.assert_allclose(table['mean'], grouped.mean())
+    np.testing.assert_allclose(table['rms'], (grouped.apply(lambda v: (v ** 2).mean())) ** .5)
+    np.testing.assert_allclose(table['duration'], df.groupby('cycle')['Epoch_Time'].agg(lambda t: t.max() - t.min()))
+    assert list(table.index) == ['0', '1', '2', '3'] and list(statistics.stats) == ['Voltage', 'Epoch_Time']
+
+
+def test_groups_of_an_unfiltered_dataset():
+    df = pd.DataFrame({'mac': pd.Categorical(['AA', 'AA', 'BB', 'BB', 'BB']), 'channel': pd.Categorical(['usb'] * 5), 'cycle': [0, 1, 0, 0, np.nan],
+                       'Epoch_Time': [0.0, 1.0, 2.0, 5.0, 9.0], 'Voltage': [1.0, 2.0, 3.0, 4.0, 100.0]})
+    statistics = CycleStatistics(df, 'Epoch_Time')
+    table = statistics.table('Voltage')
+    assert list(table.index) == ['AA / usb / 0.0', 'AA / usb / 1.0', 'BB / usb / 0.0'] and len(statistics) == 3
+    assert table['max'].tolist() == [1, 2, 4] and table['duration'].tolist() == [0, 0, 3]      # the row without a cycle is in no group
+    np.testing.assert_array_equal(statistics.x, [0, 1, 2])
+
+    statistics = CycleStatistics(df[['Epoch_Time', 'Voltage']], 'Epoch_Time')
+    assert list(statistics.table('Voltage').index) == ['all'] and statistics.table('Voltage')['count'].tolist() == [5]
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing import build_group_index, filter_values, load_dataset
+from streaming import ColumnStoreWriter, stream_dataset
+
+
+def test_integer_keys_keep_their_type(tmp_path):
+    with ColumnStoreWriter(tmp_path / 'store') as writer:
+        writer.append(pd.DataFrame({'cycle': [0, 1], 'packet_num': [5, 6], 'Voltage': np.array([1, 2], dtype='float32')}))
+        writer.append(pd.DataFrame({'cycle': [np.nan, 2.0], 'packet_num': [7, 8], 'Voltage': np.array([3, 4], dtype='float32')}))    # a gap
+        store = writer.close()
+
+    assert store.dtypes == {'cycle': 'int64', 'packet_num': 'int64', 'Voltage': 'float32'}
+    assert store['cycle'].tolist() == [0, 1, pd.NA, 2]
+    np.testing.assert_array_equal(store.values('cycle'), [0, 1, np.nan, 2])
+    assert store['packet_num'].tolist() == [5, 6, 7, 8]
+
+
+def test_streamed_filter_values_match_an_import(tmp_path):
+    log = tmp_path / 'log.csv'
+    pd.DataFrame({'mac': ['AA'] * 4 + ['BB'] * 4, 'channel': 'usb', 'cycle': [0, 0, 1, 1] * 2, 'Epoch_Time': np.arange(8.0), 'Voltage': np.arange(8.0)}).to_csv(log)
+
+    full_df, filters = load_dataset('single', [log])
+    store, streamed_filters = stream_dataset('single', [log], tmp_path / 'store', chunk_rows=3)
+    assert streamed_filters == filters
+    assert list(build_group_index(store).groups) == list(build_group_index(full_df).groups)
+    assert filter_values(store)[2] == ['0', '1', 'All']
+
+
+def test_a_failed_write_closes_and_deletes_the_store(tmp_path):
+    with pytest.raises(ValueError):
+        with ColumnStoreWriter(tmp_path / 'store') as writer:
+            writer.append(pd.DataFrame({'Voltage': [1.0, 2.0]}))
+            files = list(writer.files.values())
+            raise ValueError('a bad chunk')
+
+    assert all(file.closed for file in files)
+    assert not (tmp_path / 'store').exists()
+
+
+def test_a_streamed_import_matches_an_in_memory_one(tmp_path):
+    meter_log = tmp_path / 'meters.csv'
+    pd.DataFrame({'M_ID': np.tile([1, 2], 50), 'Voltage': np.arange(100.0), 'Time': np.repeat([f't{i}' for i in range(50)], 2),
+                  'Epoch_Time': np.repeat(np.arange(50.0), 2)}).to_csv(meter_log)
+    mdata = tmp_path / 'mdata.csv'
+    pd.DataFrame({'M_ID': np.tile([1, 2], 50), 'packet_num': np.repeat(np.arange(50), 2), 'Power': np.arange(100.0)}).to_csv(mdata)
+    ydata = tmp_path / 'ydata.csv'
+    with open(ydata, 'w', newline='') as file:
+        file.write('"{\'AA\': (0, 1), \'BB\': (0, 2)}"\n')
+        pd.DataFrame({'mac': np.tile(['AA', 'BB'], 50), 'channel': 'usb', 'cycle': 0, 'packet_num': np.repeat(np.arange(50), 2), 'Load': np.arange(100.0)}).to_csv(file)
+
+    for mode, filenames in (('single', [meter_log]), ('fridgeplexor', [mdata, ydata])):
+        full_df, _ = load_dataset(mode, filenames)
+        store, _ = stream_dataset(mode, filenames, tmp_path / mode, chunk_rows=7)
+        streamed = store.to_frame()
+        assert list(streamed.columns) == list(full_df.columns)
+        sort = [c for c in ('Epoch_Time', 'mac', 'Power') if c in full_df.columns]
+        pd.testing.assert_frame_equal(streamed.sort_values(sort, ignore_index=True), full_df.sort_values(sort, ignore_index=True),
+                                      check_dtype=False, check_categorical=False)
+        store.close()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+
+class Label:
+    # stands in for CTkLabel, counts how many were made
+    made = 0
+
+    def __init__(self, master, **options):
+        Label.made += 1
+        self.options = options
+        self.gridded = False
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def grid(self, **options):
+        self.gridded = True
+
+    def grid_remove(self):
+        self.gridded = False
+
+
+def dataset():
+    epoch = np.arange(20, dtype='float64')
+    return pd.DataFrame({'mac': pd.Categorical(['AA'] * 20), 'channel': pd.Categorical(['usb'] * 20), 'cycle': np.zeros(20, dtype='int64'),
+                         'Epoch_Time': epoch, 'Voltage': epoch / 10, 'Current': np.full(20, 2.0)})
+
+
+def test_summary_rows_are_reused(app_module, windowless_app, monkeypatch):
+    monkeypatch.setattr(app_module.ctk, 'CTkLabel', Label, raising=False)
+    app = windowless_app(dataset())
+    app.add_summary_row = app_module.APP.add_summary_row.__get__(app)      # the real pool instead of the stub
+    app.release_summary_row = app_module.APP.release_summary_row.__get__(app)
+    app.summary_frame, app.font2, app.free_rows, app.summary_row_count = None, None, [], 0
+    Label.made = 0
+
+    app.parameter_selections['Voltage'].set(True)
+    app.drop_filter_data()
+    assert Label.made == 4      # the x axis row and Voltage's
+    voltage_labels = app.summary_rows['Voltage'][:2]
+
+    app.parameter_selections['Voltage'].set(False)
+    app.parameter_selections['Current'].set(True)
+    app.update_graph()
+    assert Label.made == 4 and app.summary_rows['Current'][:2] == voltage_labels      # Voltage's labels now show Current
+    assert app.summary_rows['Current'][0].options['text'] == 'Current: ' and all(label.gridded for label in voltage_labels)
+
+    app.cycle_selection.set('All')      # a new selection replots everything, every row goes back to the pool first
+    app.drop_filter_data()
+    assert Label.made == 4 and not app.free_rows